@@ -1,24 +1,37 @@
+from typing import Awaitable, Callable
 from fastapi import Depends
-from ..roles.service import RoleRepository
+from ..roles.permissions import Permission, permission_table
 from ..users.responses.http_errors import HTTTPError
-from ..users.schemas import UserInfo
-from ..users.dependencies import get_current_user
+from ..users.schemas import Principal
+from ..users.dependencies import get_current_principal
 
 
-async def get_current_admin_user(current_user: UserInfo = Depends(get_current_user)):
-    """Checks if the current user has the role of an admin.
+def require_permissions(permissions: Permission) -> Callable[..., Awaitable[Principal]]:
+    """Creates a dependency that lets through only users whose role has all the given permissions.
+
+    The check is a bitmask test against permission_table, it does not query the database.
 
     Args:
-        current_user (UserInfo): The current user object retrieved from the dependency.
+        permissions (Permission): The required permissions.
 
     Returns:
-        A UserCreate, the current user object if they have the role of an admin.
-
-    Raises:
-        HTTTPError.NO_ACCESS_RIGHTS_403: If the current user does not have the role of an admin
+        A dependency returning the authorization data of the current user.
     """
-    role_db = await RoleRepository.get_role_by_id(current_user.role_id)
+    async def check_permissions(current_user: Principal = Depends(get_current_principal)) -> Principal:
+        """Checks if the role of the current user has the required permissions.
+
+        Args:
+            current_user (Principal): The authorization data of the current user retrieved from the dependency.
+
+        Returns:
+            A Principal, the authorization data of the current user if the role has the permissions.
+
+        Raises:
+            HTTTPError.NO_ACCESS_RIGHTS_403: If the role of the current user lacks a required permission
+        """
+        if permission_table.get(current_user.role_id) & permissions == permissions:
+            return current_user
+        raise HTTTPError.NO_ACCESS_RIGHTS_403
+
+    return check_permissions
 
-    if role_db.role_type == "admin":
-        return current_user
-    raise HTTTPError.NO_ACCESS_RIGHTS_403
\ No newline at end of file
@@ -1,12 +1,17 @@
 from fastapi import APIRouter, status, Response, Depends
 from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
 from .responses.responses import base_admin_response, AdminResponses
-from ..users.schemas import UserInfo
+from ..users.schemas import UserInfo, Principal
 from .service import AdminRepository
-from .dependencies import get_current_admin_user
+from .dependencies import require_permissions
+from ..bulkhead import admin_bulkhead
+from ..database import get_session
+from ..roles.permissions import Permission
+from ..serialization import json_response
 
 
-router = APIRouter(prefix="/admin", tags=["Admin 👔"])
+router = APIRouter(prefix="/admin", tags=["Admin 👔"], dependencies=[Depends(admin_bulkhead.enter)])
 
 
 @router.get(
@@ -18,8 +23,9 @@ router = APIRouter(prefix="/admin", tags=["Admin 👔"])
     response_model=List[UserInfo],
     responses=base_admin_response,
 )
-async def get_all_users(user_data: UserInfo = Depends(get_current_admin_user)):
-    return await AdminRepository.find_all_user()
+async def get_all_users(user_data: Principal = Depends(require_permissions(Permission.USERS_READ))):
+    users = await AdminRepository.find_all_user()
+    return json_response(List[UserInfo], users)
 
 
 @router.put(
@@ -30,8 +36,13 @@ async def get_all_users(user_data: UserInfo = Depends(get_current_admin_user)):
     status_code=status.HTTP_200_OK,
     responses=AdminResponses.update_user_role_put,
 )
-async def update_user_role(id_user: int, role_id: int, user_data: UserInfo = Depends(get_current_admin_user)):
-    await AdminRepository.change_role(id_user, role_id)
+async def update_user_role(
+    id_user: int,
+    role_id: int,
+    user_data: Principal = Depends(require_permissions(Permission.USERS_WRITE)),
+    session: AsyncSession = Depends(get_session),
+):
+    await AdminRepository.change_role(id_user, role_id, session=session)
     return Response(status_code=status.HTTP_200_OK)
 
 
@@ -43,6 +54,10 @@ async def update_user_role(id_user: int, role_id: int, user_data: UserInfo = Dep
     status_code=status.HTTP_204_NO_CONTENT,
     responses=AdminResponses.delete_user,
 )
-async def delete_user(id_user: int, user_data: UserInfo = Depends(get_current_admin_user)):
-    await AdminRepository.delete_user_by_id(id_user)
+async def delete_user(
+    id_user: int,
+    user_data: Principal = Depends(require_permissions(Permission.USERS_WRITE)),
+    session: AsyncSession = Depends(get_session),
+):
+    await AdminRepository.delete_user_by_id(id_user, session=session)
     return Response(status_code=status.HTTP_200_OK)
\ No newline at end of file
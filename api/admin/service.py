@@ -1,33 +1,39 @@
-from typing import List
-from ..database import new_session
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import use_session, commit, after_commit
 from ..roles.database import RolesOrm
 from ..roles.responses.http_errors import HTTTPError as HTTTPErrorRoles
 from .responses.http_errors import HTTTPError as HTTTPErrorAdmin
+from ..users.cache import principal_cache
 from ..users.database import UsersOrm
 from sqlalchemy import select, update, delete
+from ..serialization import validate_rows
 from ..users.schemas import UserInfo
 
 
 class AdminRepository:
     @classmethod
-    async def find_all_user(cls) -> List[UserInfo]:
+    async def find_all_user(cls, session: Optional[AsyncSession] = None) -> List[UserInfo]:
         """Finds all users in the database.
 
+        Args:
+            session (Optional[AsyncSession]): The session of the request, a read-only session of its own if None.
+
        Returns:
            A List[UserInfo], list of all user objects.
        """
-        async with new_session() as session:
-            result = await session.execute(select(UsersOrm))
-            user_models = result.scalars().all()
-            return [UserInfo.model_validate(user.__dict__) for user in user_models]
+        async with use_session(session, read_only=True) as session:
+            result = await session.execute(select(*UsersOrm.__table__.columns))
+            return validate_rows(UserInfo, result.all())
 
     @classmethod
-    async def change_role(cls, id_user: int, new_role_id: int) -> None:
+    async def change_role(cls, id_user: int, new_role_id: int, session: Optional[AsyncSession] = None) -> None:
         """Change the role of a user.
 
         Args:
             id_user (int): The ID of the user whose role needs to be changed.
             new_role_id (int): The ID of the new role to be assigned to the user.
+            session (Optional[AsyncSession]): The session of the request, a session of its own if None.
 
         Returns:
             None
@@ -36,7 +42,7 @@ class AdminRepository:
             HTTTPErrorAdmin.USER_NOT_FOUND_404: If the user not found
             HTTTPErrorRoles.ROLE_NOT_FOUND_404: If the role not found
         """
-        async with new_session() as session:
+        async with use_session(session) as session:
             user = await session.get(UsersOrm, id_user)
             if user is None:
                 raise HTTTPErrorAdmin.USER_NOT_FOUND_404
@@ -46,25 +52,30 @@ class AdminRepository:
                 raise HTTTPErrorRoles.ROLE_NOT_FOUND_404
 
             await session.execute(update(UsersOrm).where(UsersOrm.id == id_user).values(role_id=role.id))
-            await session.commit()
+            await commit(session)
+
+        await after_commit(session, lambda: principal_cache.invalidate(id_user))
 
 
     @classmethod
-    async def delete_user_by_id(cls, id_user: int) -> None:
+    async def delete_user_by_id(cls, id_user: int, session: Optional[AsyncSession] = None) -> None:
         """Deletes a user by ID.
 
         This method deletes a user from the database based on the provided ID.
 
         Args:
             id_user (int): The ID of the user to delete.
+            session (Optional[AsyncSession]): The session of the request, a session of its own if None.
 
         Raises:
             HTTTPErrorAdmin.USER_NOT_FOUND_404: If the user is not found.
         """
-        async with new_session() as session:
+        async with use_session(session) as session:
             user = await session.get(UsersOrm, id_user)
             if user is None:
                 raise HTTTPErrorAdmin.USER_NOT_FOUND_404
 
             await session.execute(delete(UsersOrm).where(UsersOrm.id == id_user))
-            await session.commit()
\ No newline at end of file
+            await commit(session)
+
+        await after_commit(session, lambda: principal_cache.invalidate(id_user))
@@ -0,0 +1,13 @@
+from .schemas import BookRead
+from ..cache import TwoTierCache
+from ..config import BOOKS_CACHE_SIZE, BOOKS_CACHE_TTL_SECONDS, BOOKS_CACHE_REDIS_TTL_SECONDS
+
+
+book_cache: TwoTierCache[BookRead] = TwoTierCache(
+    namespace="books",
+    model=BookRead,
+    maxsize=BOOKS_CACHE_SIZE,
+    ttl=BOOKS_CACHE_TTL_SECONDS,
+    redis_ttl=BOOKS_CACHE_REDIS_TTL_SECONDS,
+)
+"""Books by ID, read-through in BookRepository.db_get_one."""
@@ -1,11 +1,48 @@
 from typing import Optional
+from sqlalchemy import DDL, FetchedValue, Index, event, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column
 from ..database import Model
 
 
+SEARCH_CONFIG = "simple"
+"""Text search configuration of books.search_vector, language-neutral since the catalog is multilingual."""
+
+
 class BookOrm(Model):
     __tablename__ = "books"
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str]
-    description: Mapped[Optional[str]]
\ No newline at end of file
+    description: Mapped[Optional[str]]
+    # Incremented by every update, source of the ETag of the book
+    version: Mapped[int] = mapped_column(default=1, server_default=text("1"), nullable=False)
+
+    # Maintained by the books_search_vector trigger on every INSERT/UPDATE, so the write path does not have to know about it
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        FetchedValue(),
+        server_onupdate=FetchedValue(),
+        deferred=True,
+    )
+
+
+# Same as revision c6a4dc745288, for tables created by Model.metadata.create_all
+event.listen(BookOrm.__table__, "after_create", DDL(
+    "CREATE OR REPLACE FUNCTION books_search_vector() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN "
+    f"NEW.search_vector := setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.name, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.description, '')), 'B'); "
+    "RETURN NEW; END $$"
+))
+event.listen(BookOrm.__table__, "after_create", DDL(
+    "CREATE TRIGGER books_search_vector BEFORE INSERT OR UPDATE OF name, description ON books "
+    "FOR EACH ROW EXECUTE FUNCTION books_search_vector()"
+))
+
+
+# Keyset pagination by name: byte-ordered ("C") so prefix filters become index range scans
+Index("ix_books_name_c_id", BookOrm.name.collate("C"), BookOrm.id)
+# Keyset pagination by id restricted to books with a description
+Index("ix_books_id_described", BookOrm.id, postgresql_where=text("description IS NOT NULL"))
+# Full-text search
+Index("ix_books_search_vector", BookOrm.search_vector, postgresql_using="gin")
@@ -7,8 +7,20 @@ class BookErrorCode:
 
     Attributes:
         BOOK_NOT_FOUND: Book not found on database.
+        BAD_CURSOR: Pagination cursor is malformed.
+        BAD_CSV_HEADER: CSV header has no name column.
+        INVALID_ROW: Row of the bulk import did not pass validation.
+        DUPLICATE_ROW: Row of the bulk import duplicates another row.
+        VERSION_MISMATCH: Book was changed since the version the client has.
+        BAD_IDS: List of IDs is malformed or too long.
     """
     BOOK_NOT_FOUND = "BOOK_NOT_FOUND"
+    BAD_CURSOR = "BAD_CURSOR"
+    BAD_CSV_HEADER = "BAD_CSV_HEADER"
+    INVALID_ROW = "INVALID_ROW"
+    DUPLICATE_ROW = "DUPLICATE_ROW"
+    VERSION_MISMATCH = "VERSION_MISMATCH"
+    BAD_IDS = "BAD_IDS"
 
 
 class HTTTPError:
@@ -16,6 +28,10 @@ class HTTTPError:
 
     Attributes:
         BOOK_NOT_FOUNT_404: Book not found on database.
+        BAD_CURSOR_400: Pagination cursor is malformed or belongs to another sort order.
+        BAD_CSV_HEADER_400: CSV header is missing or has no name column.
+        VERSION_MISMATCH_412: Book does not exist or was changed since the version in If-Match.
+        BAD_IDS_400: List of IDs is malformed or longer than BOOKS_BATCH_MAX_IDS.
     """
     BOOK_NOT_FOUNT_404 = HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
@@ -23,4 +39,36 @@ class HTTTPError:
             code=BookErrorCode.BOOK_NOT_FOUND,
             reason="Book not found"
         ).model_dump(),
-    )
\ No newline at end of file
+    )
+
+    BAD_CURSOR_400 = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=ErrorDetail(
+            code=BookErrorCode.BAD_CURSOR,
+            reason="Bad pagination cursor"
+        ).model_dump(),
+    )
+
+    BAD_CSV_HEADER_400 = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=ErrorDetail(
+            code=BookErrorCode.BAD_CSV_HEADER,
+            reason="CSV header must contain the name column"
+        ).model_dump(),
+    )
+
+    VERSION_MISMATCH_412 = HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail=ErrorDetail(
+            code=BookErrorCode.VERSION_MISMATCH,
+            reason="Book was changed by another request"
+        ).model_dump(),
+    )
+
+    BAD_IDS_400 = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=ErrorDetail(
+            code=BookErrorCode.BAD_IDS,
+            reason="IDs must be comma-separated integers, no more than the limit"
+        ).model_dump(),
+    )
@@ -3,15 +3,45 @@ from .http_errors import HTTTPError
 from ...users.responses.utils import convert_to_example
 
 
+NOT_MODIFIED = {"description": "Not modified, the ETag from If-None-Match is still current"}
+"""Response without a body for conditional requests."""
+
+
 class BookResponses:
     """Users responses.
 
     Attributes:
+        get_books: Responses for get_books
+        search_books: Responses for search_books
+        bulk_import: Responses for bulk_import
         get_book: Responses for get_book
         update_book_put: Responses for update_book_put
+        update_book_patch: Responses for update_book_patch
         delete_book: Responses for delete_book
     """
+    get_books = {
+        status.HTTP_304_NOT_MODIFIED: NOT_MODIFIED,
+        status.HTTP_400_BAD_REQUEST: convert_to_example([
+            HTTTPError.BAD_CURSOR_400,
+            HTTTPError.BAD_IDS_400,
+        ]),
+    }
+
+    search_books = {
+        status.HTTP_304_NOT_MODIFIED: NOT_MODIFIED,
+        status.HTTP_400_BAD_REQUEST: convert_to_example([
+            HTTTPError.BAD_CURSOR_400,
+        ]),
+    }
+
+    bulk_import = {
+        status.HTTP_400_BAD_REQUEST: convert_to_example([
+            HTTTPError.BAD_CSV_HEADER_400,
+        ]),
+    }
+
     get_book = {
+        status.HTTP_304_NOT_MODIFIED: NOT_MODIFIED,
         status.HTTP_404_NOT_FOUND: convert_to_example([
             HTTTPError.BOOK_NOT_FOUNT_404,
         ]),
@@ -21,6 +51,18 @@ class BookResponses:
         status.HTTP_404_NOT_FOUND: convert_to_example([
             HTTTPError.BOOK_NOT_FOUNT_404,
         ]),
+        status.HTTP_412_PRECONDITION_FAILED: convert_to_example([
+            HTTTPError.VERSION_MISMATCH_412,
+        ]),
+    }
+
+    update_book_patch = {
+        status.HTTP_404_NOT_FOUND: convert_to_example([
+            HTTTPError.BOOK_NOT_FOUNT_404,
+        ]),
+        status.HTTP_412_PRECONDITION_FAILED: convert_to_example([
+            HTTTPError.VERSION_MISMATCH_412,
+        ]),
     }
 
     delete_book = {
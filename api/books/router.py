@@ -1,27 +1,73 @@
-from typing import List
-from fastapi import APIRouter, status
-from fastapi.responses import Response
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, Query, Request, status
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from .responses.http_errors import HTTTPError
 from .responses.responses import BookResponses
-from .schemas import BookCreate, BookRead
+from .schemas import BookCreate, BookUpdate, BookRead, BookPage, BookSort, BookFormat, BookBulkReport
 from .service import BookRepository
+from .utils import (
+    encode_ndjson,
+    encode_csv,
+    iter_ndjson_records,
+    iter_csv_records,
+    parse_ndjson_record,
+    make_csv_parser,
+    book_etag,
+    page_etag,
+    if_match_versions,
+    conditional_response,
+    parse_ids,
+)
+from ..bulkhead import books_bulkhead, BulkheadStreamingResponse
+from ..database import get_session
+from ..serialization import json_response
+from ..config import (
+    BOOKS_PAGE_DEFAULT_LIMIT,
+    BOOKS_PAGE_MAX_LIMIT,
+    BOOKS_EXPORT_BATCH_SIZE,
+    BOOKS_BULK_CHUNK_SIZE,
+    BOOKS_BATCH_MAX_IDS,
+)
 
 
-router = APIRouter(prefix="/books", tags=["Books 📚"])
+router = APIRouter(prefix="/books", tags=["Books 📚"], dependencies=[Depends(books_bulkhead.enter)])
 
 
 @router.get(
     path="/",
     summary="Get all books",
-    description="Get all books",
-    response_description="A list of all books in the database",
+    description="Get all books page by page, the next page is requested with `after=next_cursor`. "
+                "With `ids` returns these books only (in the given order, missing ones are skipped), "
+                "the other parameters are ignored",
+    response_description="A page of books and the cursor of the next page",
     status_code=status.HTTP_200_OK,
-    response_model=List[BookRead],
+    response_model=BookPage,
+    responses=BookResponses.get_books,
 )
-async def get_all():
-    books = await BookRepository.db_get_all()
-    return [BookRead.model_validate(row) for row in books]
+async def get_all(
+        after: Optional[str] = Query(default=None, description="Cursor of the previous page"),
+        limit: int = Query(default=BOOKS_PAGE_DEFAULT_LIMIT, ge=1, le=BOOKS_PAGE_MAX_LIMIT),
+        sort: BookSort = Query(default=BookSort.ID),
+        name_prefix: Optional[str] = Query(default=None, min_length=1),
+        has_description: Optional[bool] = Query(default=None),
+        ids: Optional[str] = Query(default=None, description="Comma-separated IDs, e.g. 1,2,3"),
+        if_none_match: Optional[str] = Header(default=None),
+):
+    if ids is not None:
+        books = await BookRepository.db_get_many(parse_ids(ids, BOOKS_BATCH_MAX_IDS))
+        page = BookPage(items=books)
+        return conditional_response(page, page_etag(page), if_none_match)
+
+    page = await BookRepository.db_get_page(
+        limit=limit,
+        after=after,
+        sort=sort,
+        name_prefix=name_prefix,
+        has_description=has_description,
+    )
+    return conditional_response(page, page_etag(page), if_none_match)
 
 
 @router.post(
@@ -32,9 +78,92 @@ async def get_all():
     status_code=status.HTTP_201_CREATED,
     response_model=BookRead,
 )
-async def add_book(book: BookCreate):
-    book_id = await BookRepository.db_add_one(book)
-    return BookRead(id=book_id, name=book.name, description=book.description)
+async def add_book(book: BookCreate, session: AsyncSession = Depends(get_session)):
+    book_read = await BookRepository.db_add_one(book, session=session)
+    return json_response(
+        BookRead,
+        book_read,
+        status_code=status.HTTP_201_CREATED,
+        headers={"ETag": book_etag(book_read.id, book_read.version)},
+    )
+
+
+@router.post(
+    path="/bulk",
+    summary="Add many books",
+    description="Adds books from an NDJSON or CSV (with a header row) body, the body is processed while it is uploaded",
+    response_description="The number of added books and the rows that were skipped",
+    status_code=status.HTTP_200_OK,
+    response_model=BookBulkReport,
+    responses=BookResponses.bulk_import,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {"schema": {"type": "string"}},
+                "text/csv": {"schema": {"type": "string"}},
+            },
+        },
+    },
+)
+async def bulk_import(request: Request, import_format: BookFormat = Query(default=BookFormat.NDJSON, alias="format")):
+    if import_format == BookFormat.CSV:
+        records = iter_csv_records(request.stream())
+        parse = make_csv_parser(await anext(records, None))
+    else:
+        records = iter_ndjson_records(request.stream())
+        parse = parse_ndjson_record
+    return await BookRepository.db_bulk_import(records, parse, chunk_size=BOOKS_BULK_CHUNK_SIZE)
+
+
+@router.get(
+    path="/search",
+    summary="Search books",
+    description="Full-text search by name and description, best matches first",
+    response_description="A page of found books and the cursor of the next page",
+    status_code=status.HTTP_200_OK,
+    response_model=BookPage,
+    responses=BookResponses.search_books,
+)
+async def search(
+        q: str = Query(min_length=1, max_length=256, description="Search query"),
+        after: Optional[str] = Query(default=None, description="Cursor of the previous page"),
+        limit: int = Query(default=BOOKS_PAGE_DEFAULT_LIMIT, ge=1, le=BOOKS_PAGE_MAX_LIMIT),
+        if_none_match: Optional[str] = Header(default=None),
+):
+    page = await BookRepository.db_search(q=q, limit=limit, after=after)
+    return conditional_response(page, page_etag(page), if_none_match)
+
+
+@router.get(
+    path="/export",
+    summary="Export all books",
+    description="Streams the whole catalog as NDJSON or CSV",
+    response_description="All books ordered by ID",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {"content": {"application/x-ndjson": {}, "text/csv": {}}},
+    },
+)
+async def export_books(export_format: BookFormat = Query(default=BookFormat.NDJSON, alias="format")):
+    # StreamingResponse awaits every send, so a slow client pauses the generator and with it
+    # the server-side cursor: at most one batch is buffered in the worker.
+    # The body is read in a slot of the books bulkhead, on its pool.
+    batches = BookRepository.db_stream_all(batch_size=BOOKS_EXPORT_BATCH_SIZE)
+    if export_format == BookFormat.CSV:
+        return BulkheadStreamingResponse(
+            books_bulkhead,
+            encode_csv(batches),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="books.csv"'},
+        )
+    return BulkheadStreamingResponse(
+        books_bulkhead,
+        encode_ndjson(batches),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="books.ndjson"'},
+    )
 
 
 @router.get(
@@ -46,24 +175,54 @@ async def add_book(book: BookCreate):
     response_model=BookRead,
     responses=BookResponses.get_book,
 )
-async def get_one(id_book: int):
+async def get_one(id_book: int, if_none_match: Optional[str] = Header(default=None)):
     book = await BookRepository.db_get_one(id_book)
-    return BookRead.model_validate(book)
+    return conditional_response(book, book_etag(book.id, book.version), if_none_match)
 
 
 @router.put(
     path="/{id_book}",
     summary="Update a specific book",
-    description="Update a specific book",
-    response_description="A message indicating whether the update was successful",
+    description="Replace a specific book, with `If-Match: <ETag>` only if nobody changed it since the ETag was received",
+    response_description="The updated book, its new ETag in the header",
     status_code=status.HTTP_200_OK,
+    response_model=BookRead,
     responses=BookResponses.update_book_put,
 )
-async def update_book(book: BookCreate, id_book: int, response: Response):
-    result = await BookRepository.db_update(book, id_book)
-    if result:
-        return Response(status_code=status.HTTP_200_OK)
-    raise HTTTPError.BOOK_NOT_FOUNT_404
+async def update_book(
+    book: BookCreate,
+    id_book: int,
+    if_match: Optional[str] = Header(default=None),
+    session: AsyncSession = Depends(get_session),
+):
+    versions = None if if_match is None else if_match_versions(if_match, id_book)
+    book_read = await BookRepository.db_update(book, id_book, versions, session=session)
+    if book_read is None:
+        # A failed If-Match is 412 whether the book was changed or deleted
+        raise HTTTPError.VERSION_MISMATCH_412 if if_match is not None else HTTTPError.BOOK_NOT_FOUNT_404
+    return json_response(BookRead, book_read, headers={"ETag": book_etag(book_read.id, book_read.version)})
+
+
+@router.patch(
+    path="/{id_book}",
+    summary="Partially update a specific book",
+    description="Change only the given fields of a specific book, `If-Match: <ETag>` works as for PUT",
+    response_description="The updated book, its new ETag in the header",
+    status_code=status.HTTP_200_OK,
+    response_model=BookRead,
+    responses=BookResponses.update_book_patch,
+)
+async def patch_book(
+    book: BookUpdate,
+    id_book: int,
+    if_match: Optional[str] = Header(default=None),
+    session: AsyncSession = Depends(get_session),
+):
+    versions = None if if_match is None else if_match_versions(if_match, id_book)
+    book_read = await BookRepository.db_update(book, id_book, versions, session=session)
+    if book_read is None:
+        raise HTTTPError.VERSION_MISMATCH_412 if if_match is not None else HTTTPError.BOOK_NOT_FOUNT_404
+    return json_response(BookRead, book_read, headers={"ETag": book_etag(book_read.id, book_read.version)})
 
 
 @router.delete(
@@ -74,8 +233,8 @@ async def update_book(book: BookCreate, id_book: int, response: Response):
     status_code=status.HTTP_204_NO_CONTENT,
     responses=BookResponses.delete_book,
 )
-async def delete_book(id_book: int):
-    result = await BookRepository.db_delete(id_book)
+async def delete_book(id_book: int, session: AsyncSession = Depends(get_session)):
+    result = await BookRepository.db_delete(id_book, session=session)
     if result:
         return Response(status_code=status.HTTP_204_NO_CONTENT)
-    return HTTTPError.BOOK_NOT_FOUNT_404
\ No newline at end of file
+    raise HTTTPError.BOOK_NOT_FOUNT_404
@@ -1,5 +1,6 @@
-from typing import Optional
-from pydantic import BaseModel
+from enum import Enum
+from typing import List, Optional
+from pydantic import BaseModel, Field, field_validator
 
 
 class BookCreate(BaseModel):
@@ -18,10 +19,39 @@ class BookCreate(BaseModel):
     }
 
 
+class BookUpdate(BaseModel):
+    """Partial update of a book, only the fields present in the request are changed.
+
+    Attributes:
+        name: New name, can't be null.
+        description: New description, null removes it.
+    """
+    name: Optional[str] = None
+    description: Optional[str] = None
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "description": "Example2",
+                }
+            ]
+        }
+    }
+
+    @field_validator("name")
+    @classmethod
+    def name_is_not_null(cls, name: Optional[str]) -> str:
+        if name is None:
+            raise ValueError("name can't be null")
+        return name
+
+
 class BookRead(BaseModel):
     id: int
     name: str
     description: Optional[str] = None
+    version: int = Field(description="Версия, увеличивается при каждом изменении")
 
     model_config = {
         "json_schema_extra": {
@@ -30,7 +60,69 @@ class BookRead(BaseModel):
                     "id": 1,
                     "name": "Example1",
                     "description": "Example2",
+                    "version": 1,
                 }
             ]
         }
-    }
\ No newline at end of file
+    }
+
+
+class BookSort(str, Enum):
+    """Stable sort orders available for the list of books.
+
+    Attributes:
+        ID: By ID.
+        NAME: By name (byte order), then by ID.
+    """
+    ID = "id"
+    NAME = "name"
+
+
+class BookFormat(str, Enum):
+    """File formats of the books export and bulk import.
+
+    Attributes:
+        NDJSON: One JSON object per line.
+        CSV: CSV with a header row.
+    """
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class BookPage(BaseModel):
+    """A page of books.
+
+    Attributes:
+        items: Books of the page.
+        next_cursor: Cursor for the next page, None on the last page.
+    """
+    items: List[BookRead]
+    next_cursor: Optional[str] = Field(default=None, description="Передать в `after`, чтобы получить следующую страницу")
+
+
+class BookBulkError(BaseModel):
+    """A row of the bulk import that was not inserted.
+
+    Attributes:
+        row: Line number of the row in the request body.
+        code: Error code.
+        reason: Error reason.
+    """
+    row: int
+    code: str
+    reason: str
+
+
+class BookBulkReport(BaseModel):
+    """Result of the bulk import.
+
+    Attributes:
+        inserted: Number of inserted books.
+        duplicates: Number of rows skipped as duplicates of another row of the same chunk.
+        failed: Number of rows that did not pass validation.
+        errors: Skipped rows, at most BOOKS_BULK_MAX_ERRORS of them.
+    """
+    inserted: int = 0
+    duplicates: int = 0
+    failed: int = 0
+    errors: List[BookBulkError] = []
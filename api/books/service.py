@@ -1,50 +1,291 @@
-from sqlalchemy import select, update
-from sqlalchemy.exc import NoResultFound
-from .database import BookOrm
-from .responses.http_errors import HTTTPError
-from .schemas import BookCreate, BookRead
-from ..database import new_session
+import csv
+from typing import AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from pydantic import ValidationError
+from sqlalchemy import select, insert, update, delete, tuple_, func, or_, and_, any_, bindparam, Integer, Row
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from .cache import book_cache
+from .database import BookOrm, SEARCH_CONFIG
+from .responses.http_errors import HTTTPError, BookErrorCode
+from .schemas import BookCreate, BookUpdate, BookRead, BookPage, BookSort, BookBulkReport, BookBulkError
+from .utils import encode_cursor, decode_cursor, prefix_upper_bound
+from ..config import BOOKS_BULK_MAX_ERRORS, BOOKS_BATCH_MAX_IDS
+from ..database import new_session, use_session, commit, after_commit
+from ..loader import BatchLoader
+from ..serialization import validate_row, validate_rows
+
+
+BOOK_COLUMNS = (BookOrm.id, BookOrm.name, BookOrm.description, BookOrm.version)
+"""Columns of BookRead, selected as Core rows instead of ORM instances."""
+
+# Hot statements are built once, like the ones of UserRepository
+BOOK_INSERT = insert(BookOrm).returning(*BOOK_COLUMNS)
+# One parameter whatever the number of IDs, so the statement stays the same for every batch
+BOOKS_BY_IDS = select(*BOOK_COLUMNS).where(BookOrm.id == any_(bindparam("ids", type_=ARRAY(Integer))))
+BOOK_DELETE = delete(BookOrm).where(BookOrm.id == bindparam("id_book")).returning(BookOrm.id)
+
+
+def _report_error(report: BookBulkReport, row: int, code: str, reason: str) -> None:
+    if len(report.errors) < BOOKS_BULK_MAX_ERRORS:
+        report.errors.append(BookBulkError(row=row, code=code, reason=reason))
+
+
+def _error_reason(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in detail['loc']) or 'row'}: {detail['msg']}"
+            for detail in error.errors()
+        )
+    return str(error)
 
 
 class BookRepository:
     @classmethod
-    async def db_add_one(cls, data: BookCreate) -> int:
+    async def db_add_one(cls, data: BookCreate, session: Optional[AsyncSession] = None) -> BookRead:
         """Adds a new book to the database.
 
-        This method adds a new book to the database and returns the ID of the created book.
+        This method adds a new book to the database and returns the created book,
+        the generated ID and version come back from the same INSERT ... RETURNING.
 
         Args:
             data (BookCreate): The data for the new book.
+            session (Optional[AsyncSession]): The session of the request, a session of its own if None.
 
         Returns:
-            A int, the ID of the newly created book.
+            A BookRead, the newly created book with its ID and version.
         """
-        async with new_session() as session:
-            book_dict = data.model_dump()
-            # Можно указывать явно -> BookOrm(name=book_dict["name"], и т.д.)
-            book = BookOrm(**book_dict)
-            session.add(book)       # Добавить изменения
-            await session.flush()   # Отправит изменение, не завершая транзакцию
-            await session.commit()  # Сохранит все изменения в БД, завершит транзакцию
-            return book.id
+        async with use_session(session) as session:
+            result = await session.execute(BOOK_INSERT, data.model_dump())
+            book = validate_row(BookRead, result.one())
+            await commit(session)
+            return book
 
     @classmethod
-    async def db_get_all(cls):
-        """Retrieves all books from the database.
+    async def db_add_many(cls, books: List[BookCreate]) -> int:
+        """Adds new books to the database in one statement.
+
+        Uses COPY when the driver supports it (asyncpg), otherwise a multi-row INSERT.
+
+        Args:
+            books (List[BookCreate]): The data for the new books.
 
         Returns:
-            A List[BookRead], list of all book objects.
+            A int, the number of added books.
         """
         async with new_session() as session:
-            query = select(BookOrm)
-            result = await session.execute(query)
-            book_models = result.scalars().all()
-            return [BookRead(id=book.id, name=book.name, description=book.description) for book in book_models]
+            connection = await session.connection()
+            raw_connection = await connection.get_raw_connection()
+            driver_connection = raw_connection.driver_connection
+            if hasattr(driver_connection, "copy_records_to_table"):
+                await driver_connection.copy_records_to_table(
+                    BookOrm.__tablename__,
+                    records=[(book.name, book.description) for book in books],
+                    columns=("name", "description"),
+                )
+            else:
+                await session.execute(insert(BookOrm), [book.model_dump() for book in books])
+            await session.commit()
+            return len(books)
+
+    @classmethod
+    async def db_bulk_import(
+            cls,
+            records: AsyncIterator[Tuple[int, bytes]],
+            parse: Callable[[bytes], BookCreate],
+            chunk_size: int,
+    ) -> BookBulkReport:
+        """Validates and adds books chunk by chunk while the records are still being received.
+
+        Every chunk is committed on its own, so the rows of a failed request that were
+        already reported as inserted stay in the database.
+
+        Args:
+            records (AsyncIterator[Tuple[int, bytes]]): Line numbers and raw records.
+            parse (Callable[[bytes], BookCreate]): Validates a raw record.
+            chunk_size (int): The number of books validated and written at a time.
+
+        Returns:
+            A BookBulkReport, the number of inserted books and the rows that were skipped.
+        """
+        report = BookBulkReport()
+        seen: Dict[Tuple[str, Optional[str]], int] = {}
+        chunk: List[BookCreate] = []
+
+        async for row, record in records:
+            try:
+                book = parse(record)
+            except (ValueError, csv.Error) as error:
+                report.failed += 1
+                _report_error(report, row, BookErrorCode.INVALID_ROW, _error_reason(error))
+                continue
+
+            key = (book.name, book.description)
+            if key in seen:
+                report.duplicates += 1
+                _report_error(report, row, BookErrorCode.DUPLICATE_ROW, f"Duplicate of row {seen[key]}")
+                continue
+            seen[key] = row
+            chunk.append(book)
+
+            if len(chunk) >= chunk_size:
+                report.inserted += await cls.db_add_many(chunk)
+                seen.clear()
+                chunk = []
+
+        if chunk:
+            report.inserted += await cls.db_add_many(chunk)
+
+        return report
+
+    @classmethod
+    async def db_get_page(
+            cls,
+            limit: int,
+            after: Optional[str] = None,
+            sort: BookSort = BookSort.ID,
+            name_prefix: Optional[str] = None,
+            has_description: Optional[bool] = None,
+            session: Optional[AsyncSession] = None,
+    ) -> BookPage:
+        """Retrieves one page of books using keyset pagination.
+
+        Every page is an index range scan (see ix_books_name_c_id and ix_books_id_described),
+        so the cost of a page does not depend on its position in the catalog.
+
+        Args:
+            limit (int): The maximum number of books on the page.
+            after (Optional[str]): The cursor of the previous page.
+            sort (BookSort): The sort order.
+            name_prefix (Optional[str]): Only books whose name starts with this prefix.
+            has_description (Optional[bool]): Only books with (True) or without (False) a description.
+            session (Optional[AsyncSession]): The session of the request, a read-only session of its own if None.
+
+        Returns:
+            A BookPage, the books of the page and the cursor of the next page.
+
+        Raises:
+            HTTTPError.BAD_CURSOR_400: If the cursor is malformed.
+        """
+        name_key = BookOrm.name.collate("C")
+        query = select(*BOOK_COLUMNS)
+
+        if name_prefix:
+            query = query.where(name_key >= name_prefix)
+            upper_bound = prefix_upper_bound(name_prefix)
+            if upper_bound is not None:
+                query = query.where(name_key < upper_bound)
+
+        if has_description is not None:
+            query = query.where(
+                BookOrm.description.is_not(None) if has_description else BookOrm.description.is_(None)
+            )
+
+        if sort == BookSort.NAME:
+            if after is not None:
+                after_name, after_id = decode_cursor(after, sort.value, (str, int))
+                query = query.where(tuple_(name_key, BookOrm.id) > tuple_(after_name, after_id))
+            query = query.order_by(name_key, BookOrm.id)
+        else:
+            if after is not None:
+                (after_id,) = decode_cursor(after, sort.value, (int,))
+                query = query.where(BookOrm.id > after_id)
+            query = query.order_by(BookOrm.id)
+
+        async with use_session(session, read_only=True) as session:
+            result = await session.execute(query.limit(limit + 1))
+            rows = result.all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            key = [last.name, last.id] if sort == BookSort.NAME else [last.id]
+            next_cursor = encode_cursor(sort.value, key)
+
+        return BookPage(
+            items=validate_rows(BookRead, rows),
+            next_cursor=next_cursor,
+        )
+
+    @classmethod
+    async def db_search(
+            cls,
+            q: str,
+            limit: int,
+            after: Optional[str] = None,
+            session: Optional[AsyncSession] = None,
+    ) -> BookPage:
+        """Full-text search over the name and description of books, best matches first.
+
+        Matches are found through the GIN index ix_books_search_vector; names weigh more than descriptions.
+
+        Args:
+            q (str): The search query, web search syntax ("quoted phrase", or, -exclude).
+            limit (int): The maximum number of books on the page.
+            after (Optional[str]): The cursor of the previous page.
+            session (Optional[AsyncSession]): The session of the request, a read-only session of its own if None.
+
+        Returns:
+            A BookPage, the found books of the page and the cursor of the next page.
+
+        Raises:
+            HTTTPError.BAD_CURSOR_400: If the cursor is malformed.
+        """
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+        rank = func.ts_rank_cd(BookOrm.search_vector, ts_query)
+        query = (
+            select(*BOOK_COLUMNS, rank.label("rank"))
+            .where(BookOrm.search_vector.bool_op("@@")(ts_query))
+        )
+
+        if after is not None:
+            after_rank, after_id = decode_cursor(after, "rank", (float, int))
+            query = query.where(or_(rank < after_rank, and_(rank == after_rank, BookOrm.id > after_id)))
+
+        async with use_session(session, read_only=True) as session:
+            result = await session.execute(query.order_by(rank.desc(), BookOrm.id).limit(limit + 1))
+            rows = result.all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor("rank", [rows[-1].rank, rows[-1].id])
+
+        return BookPage(
+            items=validate_rows(BookRead, rows),
+            next_cursor=next_cursor,
+        )
+
+    @classmethod
+    async def db_stream_all(cls, batch_size: int) -> AsyncIterator[Sequence[Row]]:
+        """Streams all books from the database through a server-side cursor.
+
+        Only one batch of rows is held in memory at a time, the next batch is fetched
+        when the consumer asks for it.
+
+        Args:
+            batch_size (int): The number of rows fetched from the cursor at a time.
+
+        Returns:
+            A AsyncIterator[Sequence[Row]], batches of (id, name, description) rows ordered by ID.
+        """
+        query = (
+            select(BookOrm.id, BookOrm.name, BookOrm.description)
+            .order_by(BookOrm.id)
+            .execution_options(yield_per=batch_size)
+        )
+        async with new_session(read_only=True) as session:
+            result = await session.stream(query)
+            async for partition in result.partitions():
+                yield partition
 
     @classmethod
     async def db_get_one(cls, id_book: int):
         """Retrieves a single book by ID from database.
 
+        The book is read through book_cache. On a miss the lookup goes through book_loader,
+        so concurrent lookups of this worker are merged into one query.
+
         Args:
             id_book (int): The ID of the book to retrieve.
 
@@ -54,51 +295,96 @@ class BookRepository:
         Raises:
             HTTTPError.BOOK_NOT_FOUNT_404: If book not found.
         """
+        book = await book_cache.get_or_load(id_book, lambda: book_loader.load(id_book))
+        if book is None:
+            raise HTTTPError.BOOK_NOT_FOUNT_404
+        return book
+
+    @classmethod
+    async def db_get_many(cls, ids: List[int]) -> List[BookRead]:
+        """Retrieves books by IDs in one query.
 
+        Args:
+            ids (List[int]): The IDs of the books to retrieve.
+
+        Returns:
+            A List[BookRead], the found books in the order of ids, missing books are skipped.
+        """
+        books = await cls._db_load_many(ids)
+        return [books[id_book] for id_book in ids if id_book in books]
+
+    @classmethod
+    async def _db_load_many(cls, ids: List[int]) -> Dict[int, BookRead]:
         async with new_session() as session:
-            book = await session.get(BookOrm, id_book)
-            if not book:
-                raise HTTTPError.BOOK_NOT_FOUNT_404
-            return BookRead(id=book.id, name=book.name, description=book.description)
+            result = await session.execute(BOOKS_BY_IDS, {"ids": ids})
+            return {book.id: book for book in validate_rows(BookRead, result.all())}
 
     @classmethod
-    async def db_update(cls, data: BookCreate, id_book: int) -> bool:
+    async def db_update(
+            cls,
+            data: Union[BookCreate, BookUpdate],
+            id_book: int,
+            versions: Optional[List[int]] = None,
+            session: Optional[AsyncSession] = None,
+    ) -> Optional[BookRead]:
         """Updates an existing book in the database.
 
+        The version check, the update and reading the result are a single
+        UPDATE ... WHERE version IN (...) RETURNING statement, so a concurrent update
+        can't be lost between reading and writing the version.
+
         Args:
-            data (BookCreate): The updated data for the book.
+            data (Union[BookCreate, BookUpdate]): The new data, BookCreate replaces the book, BookUpdate only its set fields.
             id_book (int): The ID of the book to update.
+            versions (Optional[List[int]]): Update only if the current version is one of these, any version if None.
+            session (Optional[AsyncSession]): The session of the request, a session of its own if None.
 
         Returns:
-            A bool, true if the update is successful.
+            A Optional[BookRead], the updated book, None if the book is not found or its version does not match.
         """
-        async with new_session() as session:
-            stmt = update(BookOrm).where(BookOrm.id == id_book).values(**data.model_dump(exclude_unset=True))
-            await session.execute(stmt)
-            await session.commit()
-            return True
+        values = data.model_dump(exclude_unset=isinstance(data, BookUpdate))
+        stmt = update(BookOrm).where(BookOrm.id == id_book)
+        if versions is not None:
+            stmt = stmt.where(BookOrm.version.in_(versions))
+        # An empty patch changes nothing, so it keeps the version (and the ETag)
+        version = BookOrm.version + 1 if values else BookOrm.version
+        stmt = stmt.values(**values, version=version).returning(*BOOK_COLUMNS)
+
+        async with use_session(session) as session:
+            result = await session.execute(stmt)
+            row = result.one_or_none()
+            await commit(session)
+
+        if row is None:
+            return None
+        if values:
+            await after_commit(session, lambda: book_cache.invalidate(id_book))
+        return validate_row(BookRead, row)
 
     @classmethod
-    async def db_delete(cls, id_book: int):
+    async def db_delete(cls, id_book: int, session: Optional[AsyncSession] = None) -> bool:
         """Deletes a book from the database by ID.
 
         Args:
             id_book (int): The ID of the book to delete.
+            session (Optional[AsyncSession]): The session of the request, a session of its own if None.
 
         Returns:
             A bool, true if the book is successfully deleted, False if the book is not found.
-
-        Raises:
-            NoResultFound: If the book is not found in the database.
         """
-        async with new_session() as session:
-            try:
-                book = await session.get(BookOrm, id_book)
-                if book:
-                    await session.delete(book)
-                    await session.commit()
-                    return True
-                else:
-                    return False
-            except NoResultFound:
-                return NoResultFound
\ No newline at end of file
+        async with use_session(session) as session:
+            result = await session.execute(BOOK_DELETE, {"id_book": id_book})
+            deleted = result.scalar_one_or_none() is not None
+            await commit(session)
+
+        if deleted:
+            await after_commit(session, lambda: book_cache.invalidate(id_book))
+        return deleted
+
+
+book_loader: BatchLoader[int, BookRead] = BatchLoader(
+    BookRepository._db_load_many,
+    max_batch_size=BOOKS_BATCH_MAX_IDS,
+    generation=lambda: book_cache.generation,
+)
+"""Batches the cache misses of BookRepository.db_get_one."""
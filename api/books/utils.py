@@ -0,0 +1,325 @@
+import base64
+import csv
+import hashlib
+import io
+import json
+from typing import Any, AsyncIterator, Callable, List, Optional, Sequence, Tuple
+from fastapi import status
+from fastapi.responses import Response
+from pydantic import BaseModel
+from sqlalchemy import Row
+from .responses.http_errors import HTTTPError
+from .schemas import BookCreate, BookPage
+from ..serialization import json_response
+
+
+def encode_cursor(sort: str, key: List[Any]) -> str:
+    """Encodes the keyset position of the last row of a page into an opaque cursor.
+
+    Args:
+        sort (str): The sort order the cursor belongs to.
+        key (List[Any]): The sort key values of the last row.
+
+    Returns:
+        A str, url-safe cursor.
+    """
+    raw = json.dumps({"s": sort, "k": key}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, types: Tuple[type, ...]) -> List[Any]:
+    """Decodes a cursor created by encode_cursor.
+
+    Args:
+        cursor (str): The cursor received from the client.
+        sort (str): The sort order of the current request.
+        types (Tuple[type, ...]): The expected types of the sort key values.
+
+    Returns:
+        A List[Any], the sort key values of the last row of the previous page.
+
+    Raises:
+        HTTTPError.BAD_CURSOR_400: If the cursor is malformed or belongs to another sort order.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        key = payload["k"]
+        if payload["s"] != sort or not isinstance(key, list) or len(key) != len(types):
+            raise ValueError
+        if not all(type(value) is expected for value, expected in zip(key, types)):
+            raise ValueError
+        return key
+    except (ValueError, KeyError, TypeError):
+        raise HTTTPError.BAD_CURSOR_400
+
+
+def prefix_upper_bound(prefix: str) -> Optional[str]:
+    """Returns the smallest string greater than every string starting with prefix ("C" collation).
+
+    Args:
+        prefix (str): The prefix to search for.
+
+    Returns:
+        A Optional[str], the exclusive upper bound, None if there is no such bound.
+    """
+    while prefix and ord(prefix[-1]) == 0x10FFFF:
+        prefix = prefix[:-1]
+    if not prefix:
+        return None
+    next_code = ord(prefix[-1]) + 1
+    if 0xD800 <= next_code <= 0xDFFF:
+        next_code = 0xE000
+    return prefix[:-1] + chr(next_code)
+
+
+def parse_ids(ids: str, max_ids: int) -> List[int]:
+    """Parses a comma-separated list of IDs.
+
+    Args:
+        ids (str): The IDs, e.g. "1,2,3".
+        max_ids (int): The maximum number of distinct IDs.
+
+    Returns:
+        A List[int], distinct IDs in the order of the first occurrence.
+
+    Raises:
+        HTTTPError.BAD_IDS_400: If an ID is not an integer or there are too many IDs.
+    """
+    try:
+        parsed = list(dict.fromkeys(int(part) for part in ids.split(",") if part.strip()))
+    except ValueError:
+        raise HTTTPError.BAD_IDS_400
+    if not parsed or len(parsed) > max_ids:
+        raise HTTTPError.BAD_IDS_400
+    return parsed
+
+
+def book_etag(id_book: int, version: int) -> str:
+    """Returns the strong ETag of a version of a book.
+
+    Args:
+        id_book (int): The ID of the book.
+        version (int): The version of the book.
+
+    Returns:
+        A str, quoted ETag.
+    """
+    return f'"{id_book}-{version}"'
+
+
+def page_etag(page: BookPage) -> str:
+    """Returns the strong ETag of a page of books, it changes when any book of the page changes.
+
+    Args:
+        page (BookPage): The page of books.
+
+    Returns:
+        A str, quoted ETag.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for book in page.items:
+        digest.update(f"{book.id}-{book.version};".encode("ascii"))
+    digest.update((page.next_cursor or "").encode("ascii"))
+    return f'"{digest.hexdigest()}"'
+
+
+def is_not_modified(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluates If-None-Match (weak comparison).
+
+    Args:
+        if_none_match (Optional[str]): The If-None-Match header.
+        etag (str): The current ETag.
+
+    Returns:
+        A bool, True if the client already has the current representation.
+    """
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def if_match_versions(if_match: str, id_book: int) -> Optional[List[int]]:
+    """Extracts the versions of a book from If-Match (strong comparison).
+
+    Args:
+        if_match (str): The If-Match header.
+        id_book (int): The ID of the book.
+
+    Returns:
+        A Optional[List[int]], None for "*" (any version), otherwise the matching versions, may be empty.
+    """
+    tags = [tag.strip() for tag in if_match.split(",")]
+    if "*" in tags:
+        return None
+
+    versions = []
+    prefix = f'"{id_book}-'
+    for tag in tags:
+        if tag.startswith(prefix) and tag.endswith('"') and tag[len(prefix):-1].isdigit():
+            versions.append(int(tag[len(prefix):-1]))
+    return versions
+
+
+def conditional_response(content: BaseModel, etag: str, if_none_match: Optional[str]) -> Response:
+    """Returns 304 without a body if the client has the current version, otherwise the content with its ETag.
+
+    Args:
+        content (BaseModel): The response content.
+        etag (str): The ETag of the content.
+        if_none_match (Optional[str]): The If-None-Match header.
+
+    Returns:
+        A Response, 200 with the content or 304.
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if is_not_modified(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return json_response(type(content), content, headers=headers)
+
+
+async def encode_ndjson(batches: AsyncIterator[Sequence[Row]]) -> AsyncIterator[bytes]:
+    """Encodes batches of book rows as NDJSON, one chunk per batch.
+
+    Args:
+        batches (AsyncIterator[Sequence[Row]]): Batches of (id, name, description) rows.
+
+    Returns:
+        A AsyncIterator[bytes], encoded chunks.
+    """
+    async for batch in batches:
+        yield "".join(
+            json.dumps({"id": row.id, "name": row.name, "description": row.description}, ensure_ascii=False) + "\n"
+            for row in batch
+        ).encode("utf-8")
+
+
+async def encode_csv(batches: AsyncIterator[Sequence[Row]]) -> AsyncIterator[bytes]:
+    """Encodes batches of book rows as CSV with a header row, one chunk per batch.
+
+    Args:
+        batches (AsyncIterator[Sequence[Row]]): Batches of (id, name, description) rows.
+
+    Returns:
+        A AsyncIterator[bytes], encoded chunks.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(("id", "name", "description"))
+    async for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    """Splits a byte stream into lines without reading it whole.
+
+    Args:
+        stream (AsyncIterator[bytes]): The request body stream.
+
+    Returns:
+        A AsyncIterator[Tuple[int, bytes]], line numbers (from 1) and lines without line endings.
+    """
+    number = 0
+    tail = b""
+    async for chunk in stream:
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        for line in lines:
+            number += 1
+            yield number, line.rstrip(b"\r")
+    if tail:
+        yield number + 1, tail.rstrip(b"\r")
+
+
+async def iter_ndjson_records(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    """Splits an NDJSON body into records, skipping blank lines.
+
+    Args:
+        stream (AsyncIterator[bytes]): The request body stream.
+
+    Returns:
+        A AsyncIterator[Tuple[int, bytes]], line numbers and records.
+    """
+    async for number, line in iter_lines(stream):
+        if line.strip():
+            yield number, line
+
+
+async def iter_csv_records(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    """Splits a CSV body into records, a quoted field may span several lines.
+
+    Args:
+        stream (AsyncIterator[bytes]): The request body stream.
+
+    Returns:
+        A AsyncIterator[Tuple[int, bytes]], line numbers of the first line of every record and records.
+    """
+    start = 0
+    parts: List[bytes] = []
+    quotes = 0
+    async for number, line in iter_lines(stream):
+        if not parts:
+            if not line.strip():
+                continue
+            start = number
+        parts.append(line)
+        # Escaped quotes are doubled, so an odd count means a quoted field continues on the next line
+        quotes += line.count(b'"')
+        if quotes % 2 == 0:
+            yield start, b"\n".join(parts)
+            parts = []
+            quotes = 0
+    if parts:
+        yield start, b"\n".join(parts)
+
+
+def parse_ndjson_record(record: bytes) -> BookCreate:
+    """Validates an NDJSON record as a new book.
+
+    Args:
+        record (bytes): The JSON object.
+
+    Returns:
+        A BookCreate, the validated book.
+    """
+    return BookCreate.model_validate_json(record)
+
+
+def make_csv_parser(header: Optional[Tuple[int, bytes]]) -> Callable[[bytes], BookCreate]:
+    """Creates a validator of CSV records for the given header row.
+
+    Args:
+        header (Optional[Tuple[int, bytes]]): The first record of the body.
+
+    Returns:
+        A Callable[[bytes], BookCreate], validates a CSV record as a new book.
+
+    Raises:
+        HTTTPError.BAD_CSV_HEADER_400: If the header is missing or has no name column.
+    """
+    if header is None:
+        raise HTTTPError.BAD_CSV_HEADER_400
+    try:
+        columns = [column.strip() for column in next(csv.reader([header[1].decode("utf-8-sig")]))]
+    except (ValueError, csv.Error):
+        raise HTTTPError.BAD_CSV_HEADER_400
+    if "name" not in columns:
+        raise HTTTPError.BAD_CSV_HEADER_400
+
+    def parse_csv_record(record: bytes) -> BookCreate:
+        values = next(csv.reader([record.decode("utf-8")]))
+        if len(values) != len(columns):
+            raise ValueError(f"Expected {len(columns)} fields, got {len(values)}")
+        data = dict(zip(columns, values))
+        # CSV can't tell an empty description from a missing one
+        if data.get("description") == "":
+            data["description"] = None
+        return BookCreate.model_validate(data)
+
+    return parse_csv_record
@@ -0,0 +1,175 @@
+import asyncio
+from contextlib import asynccontextmanager
+from time import perf_counter
+from typing import AsyncIterator, Optional
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+from .config import (
+    BULKHEAD_AUTH_CONCURRENCY,
+    BULKHEAD_AUTH_QUEUE_TIMEOUT_SECONDS,
+    BULKHEAD_AUTH_POOL_SIZE,
+    BULKHEAD_BOOKS_CONCURRENCY,
+    BULKHEAD_BOOKS_QUEUE_TIMEOUT_SECONDS,
+    BULKHEAD_BOOKS_POOL_SIZE,
+    BULKHEAD_ADMIN_CONCURRENCY,
+    BULKHEAD_ADMIN_QUEUE_TIMEOUT_SECONDS,
+    BULKHEAD_ADMIN_POOL_SIZE,
+)
+from .database import make_engine, make_sessionmaker, session_factory
+from .pool import pool_stats
+from .users.responses.http_errors import HTTTPError
+
+
+class Bulkhead:
+    """Limits the requests of a group of routers in progress at once, optionally with its own connection pool.
+
+    Used as a router dependency: a request waits at most queue_timeout for a free slot,
+    then it is rejected with HTTTPError.SERVICE_OVERLOADED_503, so a storm in one group
+    queues only behind itself. With pool_size the sessions of the group's requests
+    use a pool of their own instead of the shared one.
+    A slot is held until the route returns; a streamed body, sent after the route's slot is
+    released, takes a slot of its own with BulkheadStreamingResponse.
+    """
+    def __init__(self, name: str, max_concurrent: int, queue_timeout: float, pool_size: int) -> None:
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.queue_timeout = queue_timeout
+        self.pool_size = pool_size
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._engine: Optional[AsyncEngine] = None
+        self._sessionmaker: Optional[async_sessionmaker] = None
+
+    def start(self) -> None:
+        """Creates the connection pool of the group, if it has one.
+
+        Returns:
+            None
+        """
+        if self.pool_size > 0:
+            self._engine = make_engine(pool_size=self.pool_size, max_overflow=0)
+            self._sessionmaker = make_sessionmaker(self._engine)
+
+    async def stop(self) -> None:
+        """Closes the connection pool of the group.
+
+        Returns:
+            None
+        """
+        if self._engine is not None:
+            engine, self._engine, self._sessionmaker = self._engine, None, None
+            await engine.dispose()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Holds a slot of the bulkhead, its sessions use the pool of the group if it has one.
+
+        Returns:
+            A AsyncIterator[None], to be used as an async context manager.
+
+        Raises:
+            HTTTPError.SERVICE_OVERLOADED_503: If no slot was freed within queue_timeout.
+        """
+        started = perf_counter()
+        self.waiting += 1
+        try:
+            async with asyncio.timeout(self.queue_timeout):
+                await self._semaphore.acquire()
+        except TimeoutError:
+            self.rejected += 1
+            raise HTTTPError.SERVICE_OVERLOADED_503
+        finally:
+            self.waiting -= 1
+
+        wait_time = perf_counter() - started
+        self.admitted += 1
+        self.wait_total += wait_time
+        self.wait_max = max(self.wait_max, wait_time)
+        self.active += 1
+        token = session_factory.set(self._sessionmaker) if self._sessionmaker is not None else None
+        try:
+            yield
+        finally:
+            if token is not None:
+                session_factory.reset(token)
+            self.active -= 1
+            self._semaphore.release()
+
+    async def enter(self) -> AsyncIterator[None]:
+        """FastAPI dependency holding a slot of the bulkhead for the request.
+
+        Returns:
+            A AsyncIterator[None], a dependency with yield.
+
+        Raises:
+            HTTTPError.SERVICE_OVERLOADED_503: If no slot was freed within queue_timeout.
+        """
+        async with self.slot():
+            yield
+
+    def stats(self) -> dict:
+        """Returns the slots in use, the queue and the queue wait in milliseconds.
+
+        Returns:
+            A dict, counters of this worker and the state of the group's pool.
+        """
+        return {
+            "max_concurrent": self.max_concurrent,
+            "queue_timeout_seconds": self.queue_timeout,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "wait_ms_mean": round(self.wait_total / self.admitted * 1000, 2) if self.admitted else None,
+            "wait_ms_max": round(self.wait_max * 1000, 2),
+            "pool": pool_stats(self._engine) if self._engine is not None else "shared",
+        }
+
+
+auth_bulkhead = Bulkhead(
+    name="auth",
+    max_concurrent=BULKHEAD_AUTH_CONCURRENCY,
+    queue_timeout=BULKHEAD_AUTH_QUEUE_TIMEOUT_SECONDS,
+    pool_size=BULKHEAD_AUTH_POOL_SIZE,
+)
+"""Register, login, tokens and password reset."""
+
+books_bulkhead = Bulkhead(
+    name="books",
+    max_concurrent=BULKHEAD_BOOKS_CONCURRENCY,
+    queue_timeout=BULKHEAD_BOOKS_QUEUE_TIMEOUT_SECONDS,
+    pool_size=BULKHEAD_BOOKS_POOL_SIZE,
+)
+"""The catalog."""
+
+admin_bulkhead = Bulkhead(
+    name="admin",
+    max_concurrent=BULKHEAD_ADMIN_CONCURRENCY,
+    queue_timeout=BULKHEAD_ADMIN_QUEUE_TIMEOUT_SECONDS,
+    pool_size=BULKHEAD_ADMIN_POOL_SIZE,
+)
+"""Users and roles administration."""
+
+BULKHEADS = (auth_bulkhead, books_bulkhead, admin_bulkhead)
+"""Started and stopped in the application lifespan."""
+
+
+class BulkheadStreamingResponse(StreamingResponse):
+    """StreamingResponse sending its body in a slot of a bulkhead.
+
+    The body runs after the route and its dependencies returned, so without it a streamed export
+    would read outside the bulkhead, on the shared pool. The slot is taken before the headers are
+    sent, a full bulkhead still answers with HTTTPError.SERVICE_OVERLOADED_503.
+    """
+    def __init__(self, bulkhead: Bulkhead, content, **kwargs) -> None:
+        super().__init__(content, **kwargs)
+        self.bulkhead = bulkhead
+
+    async def __call__(self, scope, receive, send) -> None:
+        async with self.bulkhead.slot():
+            await super().__call__(scope, receive, send)
@@ -0,0 +1,302 @@
+import asyncio
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, List, Optional, Tuple, Type, TypeVar
+from pydantic import BaseModel, ValidationError
+from redis.exceptions import RedisError
+from .res_passwd.redis import RedisDB
+
+
+T = TypeVar("T", bound=BaseModel)
+
+
+class TTLCache:
+    """In-process LRU cache whose entries also expire after a time to live.
+
+    Not thread-safe, meant to be used from the event loop only.
+    """
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+
+        expires_at, value = item
+        if expires_at <= monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self._data[key] = (monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TwoTierCache(Generic[T]):
+    """Read-through cache of pydantic models: in-process TTLCache in front of Redis.
+
+    Invalidations are published over Redis pub/sub, so every worker drops its local copy.
+    They also bump a version of the key in Redis: a value loaded on a miss is written to Redis
+    only if the version is still the one seen by the miss, so a load that raced an invalidation
+    in any worker can't put a stale value back for the other workers.
+    Without Redis (not started or unavailable) the cache works with the local tier only.
+    """
+    def __init__(self, namespace: str, model: Type[T], maxsize: int, ttl: float, redis_ttl: int) -> None:
+        self.namespace = namespace
+        self.model = model
+        self.redis_ttl = redis_ttl
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self.redis_errors = 0
+        self._redis: Optional[RedisDB] = None
+        self._listener: Optional[asyncio.Task] = None
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        """Invalidations seen by this worker, a load started under an older generation may be stale."""
+        return self._generation
+
+    @property
+    def channel(self) -> str:
+        return f"cache:{self.namespace}:invalidate"
+
+    def _redis_key(self, key: str) -> str:
+        return f"cache:{self.namespace}:{key}"
+
+    def _version_key(self, key: str) -> str:
+        return f"cache:{self.namespace}:{key}:version"
+
+    async def get(self, key: Hashable) -> Optional[T]:
+        """Returns the cached model, None if neither tier has it.
+
+        Args:
+            key (Hashable): The cache key.
+
+        Returns:
+            A Optional[T], the cached model.
+        """
+        value, _ = await self._get(str(key))
+        return value
+
+    async def _get(self, key: str) -> Tuple[Optional[T], Optional[str]]:
+        # Also returns the Redis version of the key on a miss, None without Redis
+        value = self.local.get(key)
+        if value is not None or self._redis is None:
+            return value, None
+
+        try:
+            raw, version = await self._redis.get_versioned(self._redis_key(key), self._version_key(key))
+        except RedisError:
+            self.redis_errors += 1
+            return None, None
+
+        if raw is None:
+            self.redis_misses += 1
+            return None, version
+
+        try:
+            value = self.model.model_validate_json(raw)
+        except ValidationError:
+            # Written by a version of the application with another schema
+            self.redis_misses += 1
+            return None, version
+
+        self.redis_hits += 1
+        self.local.set(key, value)
+        return value, version
+
+    async def set(self, key: Hashable, value: T) -> None:
+        """Puts the model into both tiers.
+
+        Args:
+            key (Hashable): The cache key.
+            value (T): The model to cache.
+
+        Returns:
+            None
+        """
+        key = str(key)
+        self.local.set(key, value)
+        if self._redis is None:
+            return
+
+        try:
+            await self._redis.set_value(self._redis_key(key), value.model_dump_json(), self.redis_ttl)
+        except RedisError:
+            self.redis_errors += 1
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Optional[T]]]) -> Optional[T]:
+        """Returns the cached model, loads and caches it on a miss.
+
+        Args:
+            key (Hashable): The cache key.
+            loader (Callable[[], Awaitable[Optional[T]]]): Loads the model from the database.
+
+        Returns:
+            A Optional[T], the model, None if the loader did not find it.
+        """
+        key = str(key)
+        value, version = await self._get(key)
+        if value is not None:
+            return value
+
+        generation = self._generation
+        value = await loader()
+        if value is None:
+            return value
+
+        # An invalidation during the load means the loaded value may already be stale:
+        # one seen by this worker skips the local tier, one made by any worker skips Redis
+        if generation == self._generation:
+            self.local.set(key, value)
+        if self._redis is None or version is None:
+            return value
+
+        try:
+            await self._redis.set_if_version(
+                self._redis_key(key), value.model_dump_json(), self.redis_ttl, self._version_key(key), version
+            )
+        except RedisError:
+            self.redis_errors += 1
+        return value
+
+    async def get_many_or_load(
+            self,
+            keys: List[Hashable],
+            load_many: Callable[[List[Hashable]], Awaitable[Dict[Hashable, T]]],
+    ) -> Dict[Hashable, T]:
+        """Returns the models in the local tier, loads all the others with one call.
+
+        The loaded models are put into the local tier only, writing them to Redis would cost a round trip each.
+
+        Args:
+            keys (List[Hashable]): The cache keys.
+            load_many (Callable[[List[Hashable]], Awaitable[Dict[Hashable, T]]]):
+                Loads the models of the missing keys from the database, by key.
+
+        Returns:
+            A Dict[Hashable, T], the models by key, keys the loader did not find are missing.
+        """
+        found, missing = {}, []
+        for key in keys:
+            value = self.local.get(str(key))
+            if value is not None:
+                found[key] = value
+            else:
+                missing.append(key)
+        if not missing:
+            return found
+
+        generation = self._generation
+        loaded = await load_many(missing)
+        if generation == self._generation:
+            for key, value in loaded.items():
+                self.local.set(str(key), value)
+        found.update(loaded)
+        return found
+
+    async def invalidate(self, key: Hashable) -> None:
+        """Drops the model from both tiers in every worker.
+
+        Args:
+            key (Hashable): The cache key.
+
+        Returns:
+            None
+        """
+        key = str(key)
+        self._generation += 1
+        self.local.delete(key)
+        if self._redis is None:
+            return
+
+        try:
+            # The version outlives any load that may have read it
+            await self._redis.delete_and_bump_version(self._redis_key(key), self._version_key(key), self.redis_ttl)
+            await self._redis.publish(self.channel, key)
+        except RedisError:
+            self.redis_errors += 1
+
+    async def start(self, redis_db: RedisDB) -> None:
+        """Connects the cache to Redis and starts listening for invalidations of other workers.
+
+        Args:
+            redis_db (RedisDB): The application Redis.
+
+        Returns:
+            None
+        """
+        self._redis = redis_db
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        self._listener = None
+        self._redis = None
+        self.local.clear()
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                # Invalidations may have been missed while disconnected
+                self._generation += 1
+                self.local.clear()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._generation += 1
+                        self.local.delete(message["data"].decode("utf-8"))
+            except RedisError:
+                self.redis_errors += 1
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.reset()
+
+    def stats(self) -> dict:
+        """Returns hit and miss counters of both tiers.
+
+        Returns:
+            A dict, counters and the current size of the local tier.
+        """
+        lookups = self.local.hits + self.local.misses
+        hits = self.local.hits + self.redis_hits
+        return {
+            "size": len(self.local),
+            "maxsize": self.local.maxsize,
+            "local_hits": self.local.hits,
+            "local_misses": self.local.misses,
+            "redis_hits": self.redis_hits,
+            "redis_misses": self.redis_misses,
+            "redis_errors": self.redis_errors,
+            "hit_ratio": round(hits / lookups, 4) if lookups else None,
+        }
@@ -4,6 +4,25 @@ from dotenv import load_dotenv
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", 30))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))
+DB_QUERY_CACHE_SIZE = int(os.getenv("DB_QUERY_CACHE_SIZE", 500))
+DB_PREPARED_STATEMENT_CACHE_SIZE = int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", 100))
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() == "true"
+DB_NULL_POOL = os.getenv("DB_NULL_POOL", "false").lower() == "true"
+DB_POOL_ADAPTIVE = os.getenv("DB_POOL_ADAPTIVE", "false").lower() == "true"
+DB_POOL_ADAPTIVE_MAX_OVERFLOW = int(os.getenv("DB_POOL_ADAPTIVE_MAX_OVERFLOW", 40))
+DB_POOL_ADAPTIVE_TARGET_WAIT_MS = float(os.getenv("DB_POOL_ADAPTIVE_TARGET_WAIT_MS", 20))
+DB_POOL_ADAPTIVE_INTERVAL_SECONDS = float(os.getenv("DB_POOL_ADAPTIVE_INTERVAL_SECONDS", 5))
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+DB_REPLICA_STRATEGY = os.getenv("DB_REPLICA_STRATEGY", "round_robin")
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", 5))
+DB_REPLICA_CHECK_INTERVAL_SECONDS = float(os.getenv("DB_REPLICA_CHECK_INTERVAL_SECONDS", 2))
+DB_READ_YOUR_WRITES_SECONDS = int(os.getenv("DB_READ_YOUR_WRITES_SECONDS", 10))
 
 REDIS_URL = os.getenv("REDIS_URL")
 
@@ -15,4 +34,58 @@ SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
 SECRET_KEY_JWT = os.getenv("SECRET_KEY_JWT")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
-REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 30))
\ No newline at end of file
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 30))
+JWT_BACKEND = os.getenv("JWT_BACKEND", "jose")
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+JWT_KEYS_DIR = os.getenv("JWT_KEYS_DIR", "keys")
+JWT_KEY_ROTATION_DAYS = float(os.getenv("JWT_KEY_ROTATION_DAYS", 30))
+JWT_KEY_ACTIVATION_MINUTES = float(os.getenv("JWT_KEY_ACTIVATION_MINUTES", 60))
+JWT_KEYS_RELOAD_SECONDS = float(os.getenv("JWT_KEYS_RELOAD_SECONDS", 60))
+JWKS_MAX_AGE_SECONDS = int(os.getenv("JWKS_MAX_AGE_SECONDS", 300))
+INTROSPECT_MAX_TOKENS = int(os.getenv("INTROSPECT_MAX_TOKENS", 100))
+INTROSPECT_CACHE_MAX_AGE_SECONDS = int(os.getenv("INTROSPECT_CACHE_MAX_AGE_SECONDS", 5))
+INTROSPECT_CLIENTS = dict(
+    item.strip().split(":", 1) for item in os.getenv("INTROSPECT_CLIENTS", "").split(",") if ":" in item
+)
+
+BOOKS_PAGE_DEFAULT_LIMIT = int(os.getenv("BOOKS_PAGE_DEFAULT_LIMIT", 50))
+BOOKS_PAGE_MAX_LIMIT = int(os.getenv("BOOKS_PAGE_MAX_LIMIT", 500))
+BOOKS_EXPORT_BATCH_SIZE = int(os.getenv("BOOKS_EXPORT_BATCH_SIZE", 1000))
+BOOKS_BULK_CHUNK_SIZE = int(os.getenv("BOOKS_BULK_CHUNK_SIZE", 5000))
+BOOKS_BULK_MAX_ERRORS = int(os.getenv("BOOKS_BULK_MAX_ERRORS", 1000))
+BOOKS_CACHE_SIZE = int(os.getenv("BOOKS_CACHE_SIZE", 10000))
+BOOKS_CACHE_TTL_SECONDS = float(os.getenv("BOOKS_CACHE_TTL_SECONDS", 30))
+BOOKS_CACHE_REDIS_TTL_SECONDS = int(os.getenv("BOOKS_CACHE_REDIS_TTL_SECONDS", 300))
+BOOKS_BATCH_MAX_IDS = int(os.getenv("BOOKS_BATCH_MAX_IDS", 200))
+
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", 10000))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", 5))
+PRINCIPAL_CACHE_REDIS_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_REDIS_TTL_SECONDS", 60))
+
+AUTH_RATE_WINDOW_SECONDS = int(os.getenv("AUTH_RATE_WINDOW_SECONDS", 60))
+LOGIN_RATE_LIMIT_PER_IP = int(os.getenv("LOGIN_RATE_LIMIT_PER_IP", 30))
+LOGIN_RATE_LIMIT_PER_EMAIL = int(os.getenv("LOGIN_RATE_LIMIT_PER_EMAIL", 10))
+FORGOT_PASSWORD_RATE_LIMIT_PER_IP = int(os.getenv("FORGOT_PASSWORD_RATE_LIMIT_PER_IP", 10))
+FORGOT_PASSWORD_RATE_LIMIT_PER_EMAIL = int(os.getenv("FORGOT_PASSWORD_RATE_LIMIT_PER_EMAIL", 3))
+INTROSPECT_RATE_LIMIT_PER_IP = int(os.getenv("INTROSPECT_RATE_LIMIT_PER_IP", 600))
+INTROSPECT_RATE_LIMIT_PER_CLIENT = int(os.getenv("INTROSPECT_RATE_LIMIT_PER_CLIENT", 600))
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 32))
+
+PASSWORD_HASH_SCHEME = os.getenv("PASSWORD_HASH_SCHEME", "bcrypt")
+PASSWORD_HASH_BUDGET_MS = float(os.getenv("PASSWORD_HASH_BUDGET_MS", 250))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", 3))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", 65536))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", 1))
+
+BULKHEAD_AUTH_CONCURRENCY = int(os.getenv("BULKHEAD_AUTH_CONCURRENCY", 64))
+BULKHEAD_AUTH_QUEUE_TIMEOUT_SECONDS = float(os.getenv("BULKHEAD_AUTH_QUEUE_TIMEOUT_SECONDS", 2))
+BULKHEAD_AUTH_POOL_SIZE = int(os.getenv("BULKHEAD_AUTH_POOL_SIZE", 0))
+BULKHEAD_BOOKS_CONCURRENCY = int(os.getenv("BULKHEAD_BOOKS_CONCURRENCY", 256))
+BULKHEAD_BOOKS_QUEUE_TIMEOUT_SECONDS = float(os.getenv("BULKHEAD_BOOKS_QUEUE_TIMEOUT_SECONDS", 5))
+BULKHEAD_BOOKS_POOL_SIZE = int(os.getenv("BULKHEAD_BOOKS_POOL_SIZE", 0))
+BULKHEAD_ADMIN_CONCURRENCY = int(os.getenv("BULKHEAD_ADMIN_CONCURRENCY", 16))
+BULKHEAD_ADMIN_QUEUE_TIMEOUT_SECONDS = float(os.getenv("BULKHEAD_ADMIN_QUEUE_TIMEOUT_SECONDS", 5))
+BULKHEAD_ADMIN_POOL_SIZE = int(os.getenv("BULKHEAD_ADMIN_POOL_SIZE", 0))
@@ -1,9 +1,313 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
-from sqlalchemy.orm import DeclarativeBase
-from .config import DATABASE_URL
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Awaitable, Callable, Optional
+from uuid import uuid4
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
+from sqlalchemy.orm import DeclarativeBase, Session
+from sqlalchemy.pool import NullPool
+from .config import (
+    DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT_SECONDS,
+    DB_POOL_RECYCLE_SECONDS,
+    DB_POOL_PRE_PING,
+    DB_STATEMENT_TIMEOUT_MS,
+    DB_QUERY_CACHE_SIZE,
+    DB_PREPARED_STATEMENT_CACHE_SIZE,
+    DB_PGBOUNCER,
+    DB_NULL_POOL,
+    DB_POOL_ADAPTIVE_MAX_OVERFLOW,
+    DB_POOL_ADAPTIVE_TARGET_WAIT_MS,
+    DB_POOL_ADAPTIVE_INTERVAL_SECONDS,
+    DATABASE_REPLICA_URLS,
+    DB_REPLICA_STRATEGY,
+    DB_REPLICA_MAX_LAG_SECONDS,
+    DB_REPLICA_CHECK_INTERVAL_SECONDS,
+)
+from .pool import InstrumentedPool, PoolTuner
+from .replicas import ReplicaSet, mark_written
+
+
+LOCAL_STATEMENT_TIMEOUT = "local_statement_timeout_ms"
+"""Execution option of engines behind PgBouncer, the statement timeout set in every transaction."""
+
+
+def connect_args(statement_timeout_ms: int = DB_STATEMENT_TIMEOUT_MS, pgbouncer: bool = DB_PGBOUNCER) -> dict:
+    """Returns the asyncpg connection arguments of the engines, also used by the migrations.
+
+    Behind PgBouncer in transaction mode (DB_PGBOUNCER) consecutive transactions of a connection
+    may run on different servers: statements are not kept prepared, their names are unique so
+    they can't clash on a server shared with other clients, and no settings are sent on connect,
+    PgBouncer rejects unknown startup parameters. The statement timeout is then set per
+    transaction by _set_local_statement_timeout.
+
+    Args:
+        statement_timeout_ms (int): The statement timeout of the connections, 0 for none.
+        pgbouncer (bool): The connections go through PgBouncer in transaction mode.
+
+    Returns:
+        A dict, the connect_args of create_async_engine.
+    """
+    if pgbouncer:
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+
+    args = {"prepared_statement_cache_size": DB_PREPARED_STATEMENT_CACHE_SIZE}
+    if statement_timeout_ms > 0:
+        args["server_settings"] = {"statement_timeout": str(statement_timeout_ms)}
+    return args
+
+
+def make_engine(
+        pool_size: int,
+        max_overflow: int,
+        url: str = DATABASE_URL,
+        statement_timeout_ms: int = DB_STATEMENT_TIMEOUT_MS,
+        pgbouncer: bool = DB_PGBOUNCER,
+        null_pool: bool = DB_NULL_POOL,
+) -> AsyncEngine:
+    """Creates an engine with the configured pool settings, statement timeout and statement caches.
+
+    Compiled SQL is cached by the engine (DB_QUERY_CACHE_SIZE statements), every connection
+    keeps its statements prepared on the server (DB_PREPARED_STATEMENT_CACHE_SIZE, 0 disables it).
+    With null_pool connections are not pooled by the application, for a PgBouncer that pools them.
+
+    Args:
+        pool_size (int): The connections kept open.
+        max_overflow (int): The connections opened above pool_size under load.
+        url (str): The database, the primary by default.
+        statement_timeout_ms (int): The statement timeout, 0 for none.
+        pgbouncer (bool): The connections go through PgBouncer in transaction mode, see connect_args.
+        null_pool (bool): Open a connection for every session instead of pooling them.
+
+    Returns:
+        A AsyncEngine, its pool is an InstrumentedPool or a NullPool.
+    """
+    if null_pool:
+        pool_args = {"poolclass": NullPool}
+    else:
+        pool_args = {
+            "poolclass": InstrumentedPool,
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_timeout": DB_POOL_TIMEOUT_SECONDS,
+            "pool_recycle": DB_POOL_RECYCLE_SECONDS,
+            "pool_pre_ping": DB_POOL_PRE_PING,
+        }
+    local_timeout = statement_timeout_ms if pgbouncer and statement_timeout_ms > 0 else None
+    return create_async_engine(
+        url,
+        **pool_args,
+        query_cache_size=DB_QUERY_CACHE_SIZE,
+        connect_args=connect_args(statement_timeout_ms, pgbouncer),
+        execution_options={LOCAL_STATEMENT_TIMEOUT: local_timeout} if local_timeout else {},
+    )
+
+
+_WROTE = "wrote"
+"""Key of session.info set once the transaction of the session changed rows."""
+
+_REPLICA_READS = "replica_reads"
+"""Key of session.info set while a repository reads from the session of a request with read_only, see use_session."""
+
+_REPLICA = "replica"
+"""Key of session.info with the replica picked for the replica reads of the session, None for the primary."""
+
+
+class RoutingSession(Session):
+    """Session sending the replica reads of a request session to a replica until the session writes.
+
+    A session keeps one transaction per engine, so the reads of a request may use a replica and
+    its writes the primary; reads after a write stay on the primary to see it.
+    """
+    def get_bind(self, mapper=None, *, clause=None, **kw):
+        if (
+            self.info.get(_REPLICA_READS)
+            and not self.info.get(_WROTE)
+            and not self._flushing
+            and getattr(clause, "is_select", False)
+        ):
+            if _REPLICA not in self.info:
+                self.info[_REPLICA] = replicas.choose()
+            replica = self.info[_REPLICA]
+            if replica is not None:
+                return replica.engine.sync_engine
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+def make_sessionmaker(engine: AsyncEngine) -> async_sessionmaker:
+    """Creates the sessions of a primary engine, their replica reads may go to a replica, see RoutingSession.
+
+    Args:
+        engine (AsyncEngine): The primary engine, the shared one or the pool of a bulkhead.
+
+    Returns:
+        A async_sessionmaker.
+    """
+    return async_sessionmaker(engine, expire_on_commit=False, sync_session_class=RoutingSession)
+
+
+engine = make_engine(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+shared_sessionmaker = make_sessionmaker(engine)
+
+session_factory: ContextVar[async_sessionmaker] = ContextVar("session_factory", default=shared_sessionmaker)
+"""Sessions of the current request, a bulkhead with its own connection pool replaces it."""
+
+pool_tuner = PoolTuner(
+    engine,
+    min_overflow=DB_MAX_OVERFLOW,
+    max_overflow=DB_POOL_ADAPTIVE_MAX_OVERFLOW,
+    target_wait=DB_POOL_ADAPTIVE_TARGET_WAIT_MS / 1000,
+    interval=DB_POOL_ADAPTIVE_INTERVAL_SECONDS,
+)
+"""Adapts the overflow of the shared pool, started in the application lifespan if DB_POOL_ADAPTIVE."""
+
+replicas = ReplicaSet(
+    [make_engine(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, url=url) for url in DATABASE_REPLICA_URLS],
+    strategy=DB_REPLICA_STRATEGY,
+    max_lag=DB_REPLICA_MAX_LAG_SECONDS,
+    interval=DB_REPLICA_CHECK_INTERVAL_SECONDS,
+)
+"""Read replicas from DATABASE_REPLICA_URLS, checked in the application lifespan."""
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_write_statement(orm_execute_state) -> None:
+    # INSERT/UPDATE/DELETE statements run through session.execute, not the unit of work
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[_WROTE] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session: Session, flush_context) -> None:
+    session.info[_WROTE] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    # A commit without changes, like the end of a read, must not move the client to the primary
+    if session.info.pop(_WROTE, False):
+        mark_written()
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_WROTE, None)
+
+
+@event.listens_for(Session, "after_begin")
+def _set_local_statement_timeout(session: Session, transaction, connection) -> None:
+    # SET LOCAL ends with the transaction, so it never stays on a server connection PgBouncer hands to others
+    timeout = connection.get_execution_options().get(LOCAL_STATEMENT_TIMEOUT)
+    if timeout:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout)}")
+
+
+def new_session(read_only: bool = False) -> AsyncSession:
+    """Creates a session on the connection pool of the current request.
+
+    Args:
+        read_only (bool): The session only reads, it may go to a replica.
+            Reads that fill a shared cache must not, a lagging replica would put old rows back after an invalidation.
+
+    Returns:
+        A AsyncSession, to be used as an async context manager.
+    """
+    if read_only:
+        replica = replicas.choose()
+        if replica is not None:
+            return replica.sessionmaker()
+    return session_factory.get()()
+
+
+_AFTER_COMMIT = "after_commit"
+"""Key of session.info with the callbacks of a request session to run after its commit."""
+
+
+async def get_session() -> AsyncIterator[AsyncSession]:
+    """FastAPI dependency, the session of the request: one connection and one transaction for all its repository calls.
+
+    The transaction is committed when the route returns, before the response is sent, if it changed rows,
+    otherwise it is rolled back on close; it is rolled back as well if the route raises.
+    The connection is taken on the first query, so a route that does not touch the database does not take one.
+    It starts on the primary pool of the request; the reads of use_session with read_only go to a replica
+    until the session writes.
+
+    Returns:
+        A AsyncIterator[AsyncSession], a dependency with yield.
+    """
+    async with new_session() as session:
+        session.info[_AFTER_COMMIT] = []
+        yield session
+        if session.in_transaction() and session.info.get(_WROTE):
+            await session.commit()
+        for callback in session.info.pop(_AFTER_COMMIT):
+            await callback()
+
+
+@asynccontextmanager
+async def use_session(session: Optional[AsyncSession] = None, read_only: bool = False) -> AsyncIterator[AsyncSession]:
+    """Uses the session of the request if there is one, otherwise a new session closed on exit.
+
+    Args:
+        session (Optional[AsyncSession]): The session of the request, from get_session.
+        read_only (bool): The block only reads: a new session may be a replica one, see new_session,
+            the reads of the request session may go to a replica, see RoutingSession.
+
+    Returns:
+        A AsyncIterator[AsyncSession], to be used as an async context manager.
+    """
+    if session is not None:
+        if not read_only or session.info.get(_REPLICA_READS):
+            yield session
+            return
+        session.info[_REPLICA_READS] = True
+        try:
+            yield session
+        finally:
+            session.info[_REPLICA_READS] = False
+        return
+
+    async with new_session(read_only) as session:
+        yield session
+
+
+async def commit(session: AsyncSession) -> None:
+    """Commits a session of its own, only flushes the session of a request, get_session commits it.
+
+    Args:
+        session (AsyncSession): The session.
+
+    Returns:
+        None
+    """
+    if _AFTER_COMMIT in session.info:
+        await session.flush()
+    else:
+        await session.commit()
+
+
+async def after_commit(session: AsyncSession, callback: Callable[[], Awaitable[None]]) -> None:
+    """Runs a callback once the changes of the session are committed, like invalidating a cache.
+
+    Args:
+        session (AsyncSession): The session that made the changes.
+        callback (Callable[[], Awaitable[None]]): Runs now for a committed session of its own,
+            after get_session commits for the session of a request.
+
+    Returns:
+        None
+    """
+    if _AFTER_COMMIT in session.info:
+        session.info[_AFTER_COMMIT].append(callback)
+    else:
+        await callback()
 
-engine = create_async_engine(DATABASE_URL)
-new_session = async_sessionmaker(engine, expire_on_commit=False)
 
 class Model(DeclarativeBase):
-    pass
\ No newline at end of file
+    pass
@@ -0,0 +1,73 @@
+from math import ceil
+from typing import Dict
+from uuid import uuid4
+from fastapi import HTTPException, status
+from redis.exceptions import RedisError
+from .res_passwd.redis import RedisDB
+from .users.responses.http_errors import HTTTPError
+
+
+class SlidingWindowLimiter:
+    """Allows at most limit requests per key in any window of the given length, for several scopes at once.
+
+    For example scopes ip and email: a request is allowed only if both its IP and its email are under their limits.
+    The hits are kept in Redis and checked by one Lua script, so every worker shares the limits
+    and a check costs one round trip. If Redis is unavailable requests are let through.
+    """
+    def __init__(self, name: str, window: int, limits: Dict[str, int]) -> None:
+        self.name = name
+        self.window = window
+        self.limits = limits
+        self.allowed = 0
+        self.limited = {scope: 0 for scope in limits}
+        self.redis_errors = 0
+
+    async def check(self, redis_db: RedisDB, **keys: str) -> None:
+        """Records a request, or rejects it if one of its keys is over the limit.
+
+        Args:
+            redis_db (RedisDB): The application Redis.
+            **keys (str): The key of the request in every scope of the limiter.
+
+        Returns:
+            None
+
+        Raises:
+            HTTPException: 429 like HTTTPError.TOO_MANY_REQUESTS_429, with Retry-After in seconds.
+        """
+        scopes = list(self.limits)
+        try:
+            retry_after_ms, limited = await redis_db.hit_sliding_windows(
+                keys=[f"limit:{self.name}:{scope}:{keys[scope]}" for scope in scopes],
+                limits=[self.limits[scope] for scope in scopes],
+                window_ms=self.window * 1000,
+                hit_id=uuid4().hex,
+            )
+        except RedisError:
+            self.redis_errors += 1
+            return
+
+        if not limited:
+            self.allowed += 1
+            return
+
+        self.limited[scopes[limited - 1]] += 1
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=HTTTPError.TOO_MANY_REQUESTS_429.detail,
+            headers={"Retry-After": str(ceil(retry_after_ms / 1000))},
+        )
+
+    def stats(self) -> dict:
+        """Returns how many requests were allowed and how many were rejected before doing any work.
+
+        Returns:
+            A dict, counters of this worker, rejections by the scope whose limit was reached.
+        """
+        return {
+            "window_seconds": self.window,
+            "limits": self.limits,
+            "allowed": self.allowed,
+            "limited": dict(self.limited),
+            "redis_errors": self.redis_errors,
+        }
@@ -0,0 +1,96 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class BatchLoader(Generic[K, V]):
+    """Merges concurrent lookups by key into batched loads (DataLoader / single-flight).
+
+    Keys requested during one event loop iteration are loaded by one call of load_many,
+    a key that is already being loaded joins the running load instead of starting another.
+    With generation, e.g. the invalidations seen by a cache, a running load started before
+    the generation changed may have read a stale value: a later lookup starts a new load.
+    """
+    def __init__(
+            self,
+            load_many: Callable[[List[K]], Awaitable[Dict[K, V]]],
+            max_batch_size: int,
+            generation: Callable[[], int] = lambda: 0,
+    ) -> None:
+        self._load_many = load_many
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        self.keys = 0
+        self.coalesced = 0
+        self._generation = generation
+        self._pending: Dict[K, asyncio.Future] = {}
+        self._in_flight: Dict[K, Tuple[int, asyncio.Future]] = {}
+
+    async def load(self, key: K) -> Optional[V]:
+        """Loads one value.
+
+        Args:
+            key (K): The key.
+
+        Returns:
+            A Optional[V], the value, None if load_many did not return it.
+        """
+        future = self._pending.get(key)
+        if future is None and key in self._in_flight:
+            generation, running = self._in_flight[key]
+            if generation == self._generation():
+                future = running
+        if future is not None:
+            self.coalesced += 1
+        else:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            if not self._pending:
+                loop.call_soon(self._dispatch)
+            self._pending[key] = future
+        # A cancelled caller must not cancel the load for the other callers
+        return await asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        pending, self._pending = self._pending, {}
+        generation = self._generation()
+        keys = list(pending)
+        for start in range(0, len(keys), self.max_batch_size):
+            batch = {key: pending[key] for key in keys[start:start + self.max_batch_size]}
+            self._in_flight.update((key, (generation, future)) for key, future in batch.items())
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: Dict[K, asyncio.Future]) -> None:
+        self.batches += 1
+        self.keys += len(batch)
+        try:
+            values = await self._load_many(list(batch))
+        except Exception as error:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(error)
+        else:
+            for key, future in batch.items():
+                if not future.done():
+                    future.set_result(values.get(key))
+        finally:
+            for key, future in batch.items():
+                # A newer load of the key may have replaced this one
+                if key in self._in_flight and self._in_flight[key][1] is future:
+                    del self._in_flight[key]
+
+    def stats(self) -> dict:
+        """Returns batching counters.
+
+        Returns:
+            A dict, the number of batches, loaded keys and lookups that joined another lookup.
+        """
+        return {
+            "batches": self.batches,
+            "keys": self.keys,
+            "coalesced": self.coalesced,
+            "mean_batch_size": round(self.keys / self.batches, 2) if self.batches else None,
+        }
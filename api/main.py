@@ -1,15 +1,33 @@
-from fastapi import FastAPI, status
+from fastapi import FastAPI, Depends, status
 from fastapi.responses import RedirectResponse
 from contextlib import asynccontextmanager
+from . import metrics
+from .bulkhead import BULKHEADS
+from .database import engine, pool_tuner, replicas
+from .pool import pool_stats
+from .books.cache import book_cache
 from .books.router import router as books_router
+from .books.service import book_loader
+from .replicas import ReadYourWritesMiddleware
 from .res_passwd.redis import RedisDB
 from .res_passwd.smtp import SmtpTools
+from .roles.permissions import permission_table
 from .roles.service import RoleRepository
-from .users.router import router as auth_router
+from .users.cache import principal_cache
+from .users.dependencies import get_introspection_client
+from .users.hashing import password_hasher
+from .users.limits import login_limiter, forgot_password_limiter, introspect_limiter
+from .users.revocation import token_revocation
+from .users.tokens import key_ring, token_verifier
+from .users.router import router as auth_router, jwks_router
 from .admin.router import router as admin_router
 from .roles.router import router as role_router
 from .res_passwd.router import router as res_passwd_router
 from .config import (
+    DB_POOL_ADAPTIVE,
+    DB_NULL_POOL,
+    DATABASE_REPLICA_URLS,
+    DB_READ_YOUR_WRITES_SECONDS,
     REDIS_URL,
     SMTP_HOST,
     SMTP_PORT,
@@ -26,19 +44,76 @@ async def lifespan(app: FastAPI):
     app.redis = RedisDB(url=REDIS_URL)
     print("Redis ready")
 
+    await permission_table.start(app.redis)
+    metrics.register("permissions", permission_table.stats)
+    print("Permissions ready")
+
+    await book_cache.start(app.redis)
+    metrics.register("books_cache", book_cache.stats)
+    metrics.register("books_loader", book_loader.stats)
+    print("Books cache ready")
+
+    await key_ring.start()
+    metrics.register("signing_keys", key_ring.stats)
+    print("Signing keys ready")
+
+    await principal_cache.start(app.redis)
+    metrics.register("principal_cache", principal_cache.stats)
+    metrics.register("token_cache", token_verifier.stats)
+    print("Principal cache ready")
+
+    await token_revocation.start(app.redis)
+    metrics.register("token_revocation", token_revocation.stats)
+    print("Token revocation ready")
+
+    await password_hasher.start()
+    metrics.register("password_hasher", password_hasher.stats)
+    metrics.register("login_limiter", login_limiter.stats)
+    metrics.register("forgot_password_limiter", forgot_password_limiter.stats)
+    metrics.register("introspect_limiter", introspect_limiter.stats)
+    print("Password hashing pool ready")
+
+    metrics.register("db_pool", lambda: pool_stats(engine))
+    if DB_POOL_ADAPTIVE and not DB_NULL_POOL:
+        await pool_tuner.start()
+        metrics.register("db_pool_tuner", pool_tuner.stats)
+
+    if DATABASE_REPLICA_URLS:
+        await replicas.start()
+        metrics.register("db_replicas", replicas.stats)
+        print("Read replicas ready")
+
+    for bulkhead in BULKHEADS:
+        bulkhead.start()
+        metrics.register(f"bulkhead_{bulkhead.name}", bulkhead.stats)
+    print("Bulkheads ready")
+
     app.smtp = SmtpTools(SMTP_HOST, SMTP_PORT, SMTP_EMAIL, SMTP_PASSWORD)
     print("Smtp ready")
 
     try:
         yield
     finally:
+        await password_hasher.stop()
+        await token_revocation.stop()
+        await principal_cache.stop()
+        await key_ring.stop()
+        await book_cache.stop()
+        await permission_table.stop()
+        for bulkhead in BULKHEADS:
+            await bulkhead.stop()
+        await pool_tuner.stop()
+        await replicas.stop()
         await app.redis.close()
         app.smtp.__del__()
 
 
 app = FastAPI(lifespan=lifespan)
+if DATABASE_REPLICA_URLS:
+    app.add_middleware(ReadYourWritesMiddleware, window=DB_READ_YOUR_WRITES_SECONDS)
 app.include_router(books_router)
 app.include_router(auth_router)
+app.include_router(jwks_router)
 app.include_router(admin_router)
 app.include_router(role_router)
 app.include_router(res_passwd_router)
@@ -46,4 +121,17 @@ app.include_router(res_passwd_router)
 
 @app.get("/")
 async def go_to_docs():
-    return RedirectResponse(url="/docs", status_code=status.HTTP_308_PERMANENT_REDIRECT)
\ No newline at end of file
+    return RedirectResponse(url="/docs", status_code=status.HTTP_308_PERMANENT_REDIRECT)
+
+
+@app.get(
+    path="/metrics",
+    summary="Metrics of the worker",
+    description="Counters of the worker that served the request (caches, pools, limiters). "
+                "Internal clients authenticate like gateways calling introspection (HTTP Basic)",
+    response_description="Metrics by section",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(get_introspection_client)],
+)
+async def get_metrics():
+    return metrics.collect()
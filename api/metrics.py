@@ -0,0 +1,26 @@
+from typing import Callable, Dict
+
+
+_providers: Dict[str, Callable[[], dict]] = {}
+
+
+def register(name: str, provider: Callable[[], dict]) -> None:
+    """Registers a source of metrics of this worker.
+
+    Args:
+        name (str): The section name in the metrics output.
+        provider (Callable[[], dict]): Returns the current values, called on every collect.
+
+    Returns:
+        None
+    """
+    _providers[name] = provider
+
+
+def collect() -> Dict[str, dict]:
+    """Collects the current metrics of this worker.
+
+    Returns:
+        A Dict[str, dict], metrics by section name.
+    """
+    return {name: provider() for name, provider in _providers.items()}
@@ -9,7 +9,7 @@ from api.config import DATABASE_URL
 from api.books.database import *
 from api.users.database import *
 from api.roles.database import *
-from api.database import Model
+from api.database import Model, connect_args
 
 config = context.config
 
@@ -63,6 +63,8 @@ def run_migrations_online() -> None:
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
         poolclass=pool.NullPool,
+        # Migrations may run longer than DB_STATEMENT_TIMEOUT_MS, and through PgBouncer
+        connect_args=connect_args(statement_timeout_ms=0),
     )
 
     with connectable.connect() as connection:
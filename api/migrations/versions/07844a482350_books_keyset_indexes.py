@@ -0,0 +1,44 @@
+"""books_keyset_indexes
+
+Revision ID: 07844a482350
+Revises: ab75eb0bb733
+Create Date: 2026-10-18 09:12:41.318502
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '07844a482350'
+down_revision: Union[str, None] = 'ab75eb0bb733'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY does not lock writes on a large table, but can't run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_books_name_c_id',
+            'books',
+            [sa.text('name COLLATE "C"'), 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_books_id_described',
+            'books',
+            ['id'],
+            unique=False,
+            postgresql_where=sa.text('description IS NOT NULL'),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_books_id_described', table_name='books', postgresql_concurrently=True)
+        op.drop_index('ix_books_name_c_id', table_name='books', postgresql_concurrently=True)
@@ -0,0 +1,28 @@
+"""roles_permissions
+
+Revision ID: 4a00e893fc46
+Revises: e16baeadc00f
+Create Date: 2026-10-18 14:02:37.518214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a00e893fc46'
+down_revision: Union[str, None] = 'e16baeadc00f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('roles', sa.Column('permissions', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    # The admin role keeps its access: every bit of roles.permissions.Permission.ALL
+    op.execute("UPDATE roles SET permissions = 15 WHERE role_type = 'admin'")
+
+
+def downgrade() -> None:
+    op.drop_column('roles', 'permissions')
@@ -0,0 +1,72 @@
+"""books_full_text_search
+
+Revision ID: c6a4dc745288
+Revises: 07844a482350
+Create Date: 2026-10-18 10:03:17.842196
+
+A stored generated column would rewrite the whole table under an ACCESS EXCLUSIVE lock.
+Instead the column is added empty (no rewrite), a trigger fills it on every insert and
+update, existing rows are backfilled in batches committed one by one and the GIN index
+is built concurrently, so reads and writes of books go on during the upgrade.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6a4dc745288'
+down_revision: Union[str, None] = '07844a482350'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 10000
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce({row}name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce({row}description, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    op.add_column('books', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+    op.execute(
+        "CREATE OR REPLACE FUNCTION books_search_vector() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN "
+        f"NEW.search_vector := {SEARCH_VECTOR.format(row='NEW.')}; "
+        "RETURN NEW; END $$"
+    )
+    op.execute(
+        "CREATE TRIGGER books_search_vector BEFORE INSERT OR UPDATE OF name, description ON books "
+        "FOR EACH ROW EXECUTE FUNCTION books_search_vector()"
+    )
+
+    # Rows written from now on are covered by the trigger; each batch commits on its own
+    with op.get_context().autocommit_block():
+        connection = op.get_bind()
+        low, high = connection.execute(sa.text("SELECT min(id), max(id) FROM books")).one()
+        if low is not None:
+            backfill = sa.text(
+                f"UPDATE books SET search_vector = {SEARCH_VECTOR.format(row='')} "
+                "WHERE id >= :low AND id < :high AND search_vector IS NULL"
+            )
+            for start in range(low, high + 1, BACKFILL_BATCH_SIZE):
+                connection.execute(backfill, {"low": start, "high": start + BACKFILL_BATCH_SIZE})
+
+        op.create_index(
+            'ix_books_search_vector',
+            'books',
+            ['search_vector'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_books_search_vector', table_name='books', postgresql_concurrently=True)
+    op.execute("DROP TRIGGER books_search_vector ON books")
+    op.execute("DROP FUNCTION books_search_vector()")
+    op.drop_column('books', 'search_vector')
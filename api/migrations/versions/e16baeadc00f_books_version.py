@@ -0,0 +1,27 @@
+"""books_version
+
+Revision ID: e16baeadc00f
+Revises: c6a4dc745288
+Create Date: 2026-10-18 11:26:54.107733
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e16baeadc00f'
+down_revision: Union[str, None] = 'c6a4dc745288'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # A constant default does not rewrite the table
+    op.add_column('books', sa.Column('version', sa.Integer(), server_default=sa.text('1'), nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('books', 'version')
@@ -0,0 +1,175 @@
+import asyncio
+from time import perf_counter
+from typing import Optional
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """The default pool of asyncpg engines that measures checkouts and can change its overflow at run time.
+
+    The checkout time includes waiting for a free connection and opening a new one.
+    """
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.peak_checked_out = 0
+
+    def _do_get(self):
+        started = perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+
+        wait_time = perf_counter() - started
+        self.checkouts += 1
+        self.wait_total += wait_time
+        self.wait_max = max(self.wait_max, wait_time)
+        self.peak_checked_out = max(self.peak_checked_out, self.checkedout())
+        return connection
+
+    @property
+    def max_overflow(self) -> int:
+        return self._max_overflow
+
+    def set_max_overflow(self, max_overflow: int) -> None:
+        """Changes how many connections may be opened above pool_size.
+
+        Lowering it closes the extra connections as they are returned.
+
+        Args:
+            max_overflow (int): The new limit.
+
+        Returns:
+            None
+        """
+        self._max_overflow = max_overflow
+
+    def stats(self) -> dict:
+        """Returns the connections in use and checkout counters, times are in milliseconds.
+
+        Returns:
+            A dict, the pool state and counters of this worker.
+        """
+        return {
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": self.checkedout(),
+            "overflow": max(0, self.overflow()),
+            "idle": self.checkedin(),
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_ms_mean": round(self.wait_total / self.checkouts * 1000, 2) if self.checkouts else None,
+            "wait_ms_max": round(self.wait_max * 1000, 2),
+        }
+
+
+def pool_stats(engine: AsyncEngine) -> dict:
+    """Returns the stats of an engine's pool, only the pool class when the engine does not pool (DB_NULL_POOL).
+
+    Args:
+        engine (AsyncEngine): The engine.
+
+    Returns:
+        A dict, see InstrumentedPool.stats.
+    """
+    pool = engine.sync_engine.pool
+    if isinstance(pool, InstrumentedPool):
+        return pool.stats()
+    return {"class": type(pool).__name__}
+
+
+class PoolTuner:
+    """Grows or shrinks the overflow of an engine's pool by the observed checkout time.
+
+    Every interval: if checkouts took longer than target_wait on average, or timed out,
+    the overflow grows by a step up to max_overflow. If they were fast and the connections
+    above what was in use were idle, it shrinks by one down to min_overflow.
+    """
+    def __init__(self, engine: AsyncEngine, min_overflow: int, max_overflow: int, target_wait: float, interval: float) -> None:
+        self.engine = engine
+        self.min_overflow = min_overflow
+        self.max_overflow = max_overflow
+        self.target_wait = target_wait
+        self.interval = interval
+        self.grows = 0
+        self.shrinks = 0
+        self._last = (0, 0.0, 0)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pool(self) -> InstrumentedPool:
+        # engine.dispose() replaces the pool, so it is looked up every time
+        return self.engine.sync_engine.pool
+
+    def tune(self) -> None:
+        """Adjusts the overflow by the checkouts since the previous call.
+
+        Returns:
+            None
+        """
+        pool = self.pool
+        checkouts, wait_total, timeouts = pool.checkouts, pool.wait_total, pool.timeouts
+        last_checkouts, last_wait_total, last_timeouts = self._last
+        self._last = (checkouts, wait_total, timeouts)
+        peak, pool.peak_checked_out = pool.peak_checked_out, pool.checkedout()
+        if checkouts < last_checkouts:
+            # The pool was recreated
+            return
+
+        window_checkouts = checkouts - last_checkouts
+        mean_wait = (wait_total - last_wait_total) / window_checkouts if window_checkouts else 0.0
+        step = max(1, pool.size() // 2)
+        if (mean_wait > self.target_wait or timeouts > last_timeouts) and pool.max_overflow < self.max_overflow:
+            pool.set_max_overflow(min(self.max_overflow, pool.max_overflow + step))
+            self.grows += 1
+        elif (
+            mean_wait < self.target_wait / 4
+            and pool.max_overflow > self.min_overflow
+            and peak < pool.size() + pool.max_overflow - step
+        ):
+            pool.set_max_overflow(pool.max_overflow - 1)
+            self.shrinks += 1
+
+    async def start(self) -> None:
+        """Starts tuning in the background.
+
+        Returns:
+            None
+        """
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            self.tune()
+
+    def stats(self) -> dict:
+        """Returns the overflow limits and how often the overflow changed.
+
+        Returns:
+            A dict, the current and allowed overflow and counters of this worker.
+        """
+        return {
+            "max_overflow": self.pool.max_overflow,
+            "min_overflow": self.min_overflow,
+            "max_overflow_limit": self.max_overflow,
+            "target_wait_ms": self.target_wait * 1000,
+            "grows": self.grows,
+            "shrinks": self.shrinks,
+        }
@@ -0,0 +1,229 @@
+import asyncio
+import itertools
+from contextvars import ContextVar
+from http.cookies import SimpleCookie
+from time import perf_counter
+from typing import List, Optional
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+from .pool import pool_stats
+
+
+REPLICA_STRATEGIES = ("round_robin", "least_latency")
+
+LAG_QUERY = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+    " END"
+)
+"""Seconds the replica is behind, 0 once it has replayed everything it received (also on an idle primary)."""
+
+
+class _RequestWrites:
+    def __init__(self, sticky: bool) -> None:
+        self.sticky = sticky
+        self.wrote = False
+
+
+_request_writes: ContextVar[Optional[_RequestWrites]] = ContextVar("request_writes", default=None)
+
+
+def primary_required() -> bool:
+    """Tells whether reads of the current request must see its caller's recent writes.
+
+    Returns:
+        A bool, True if the request or a request of the same client shortly before it wrote to the primary.
+    """
+    writes = _request_writes.get()
+    return writes is not None and (writes.sticky or writes.wrote)
+
+
+def mark_written() -> None:
+    """Records that the current request committed to the primary.
+
+    Returns:
+        None
+    """
+    writes = _request_writes.get()
+    if writes is not None:
+        writes.wrote = True
+
+
+class ReadYourWritesMiddleware:
+    """ASGI middleware keeping the reads of a client on the primary for a while after it wrote.
+
+    A request that committed gets a cookie living for `window` seconds; the requests that
+    carry it and the rest of the writing request read from the primary.
+    """
+    cookie = "db_primary"
+
+    def __init__(self, app, window: int) -> None:
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or self.window <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        writes = _RequestWrites(sticky=self._has_cookie(scope))
+        token = _request_writes.set(writes)
+
+        async def send_with_cookie(message) -> None:
+            if message["type"] == "http.response.start" and writes.wrote:
+                cookie = f"{self.cookie}=1; Max-Age={self.window}; Path=/; HttpOnly; SameSite=Lax"
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            _request_writes.reset(token)
+
+    def _has_cookie(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == b"cookie" and self.cookie in SimpleCookie(value.decode("latin-1")):
+                return True
+        return False
+
+
+class Replica:
+    """A read-only engine and what its last health check saw."""
+    def __init__(self, name: str, engine: AsyncEngine) -> None:
+        self.name = name
+        self.engine = engine
+        self.sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+        self.healthy = False
+        self.lag: Optional[float] = None
+        self.latency: Optional[float] = None
+        self.reads = 0
+        self.errors = 0
+
+    async def check(self, max_lag: float) -> None:
+        """Measures the replication lag and the round trip to the replica.
+
+        Args:
+            max_lag (float): The lag in seconds above which the replica is skipped.
+
+        Returns:
+            None
+        """
+        started = perf_counter()
+        try:
+            async with self.engine.connect() as connection:
+                lag = float((await connection.execute(LAG_QUERY)).scalar_one())
+        except (SQLAlchemyError, OSError):
+            self.errors += 1
+            self.healthy = False
+            return
+
+        latency = perf_counter() - started
+        # Smoothed, so one slow check does not move all reads away
+        self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+        self.lag = lag
+        self.healthy = lag <= max_lag
+
+    def stats(self) -> dict:
+        return {
+            "healthy": self.healthy,
+            "lag_seconds": round(self.lag, 3) if self.lag is not None else None,
+            "latency_ms": round(self.latency * 1000, 2) if self.latency is not None else None,
+            "reads": self.reads,
+            "errors": self.errors,
+            "pool": pool_stats(self.engine),
+        }
+
+
+class ReplicaSet:
+    """Read replicas of the database, checked in the background and picked for read-only sessions.
+
+    A replica that can't be reached or lags more than max_lag is skipped until a later
+    check finds it caught up. Without a healthy replica reads go to the primary.
+    """
+    def __init__(self, engines: List[AsyncEngine], strategy: str, max_lag: float, interval: float) -> None:
+        if strategy not in REPLICA_STRATEGIES:
+            raise ValueError(f"Unknown replica strategy {strategy!r}, expected one of {REPLICA_STRATEGIES}")
+
+        self.replicas = [Replica(f"replica{number}", engine) for number, engine in enumerate(engines, 1)]
+        self.strategy = strategy
+        self.max_lag = max_lag
+        self.interval = interval
+        self.sticky_reads = 0
+        self.primary_reads = 0
+        self._counter = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+
+    def choose(self) -> Optional[Replica]:
+        """Picks a healthy replica for a read, unless the caller has to see its own writes.
+
+        Returns:
+            A Optional[Replica], the picked replica, None to read from the primary.
+        """
+        if not self.replicas:
+            return None
+        if primary_required():
+            self.sticky_reads += 1
+            return None
+
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            self.primary_reads += 1
+            return None
+
+        if self.strategy == "least_latency":
+            replica = min(healthy, key=lambda replica: replica.latency)
+        else:
+            replica = healthy[next(self._counter) % len(healthy)]
+        replica.reads += 1
+        return replica
+
+    async def check(self) -> None:
+        """Checks all replicas at once.
+
+        Returns:
+            None
+        """
+        await asyncio.gather(*(replica.check(self.max_lag) for replica in self.replicas))
+
+    async def start(self) -> None:
+        """Checks the replicas and keeps checking them in the background.
+
+        Returns:
+            None
+        """
+        if not self.replicas:
+            return
+        await self.check()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.check()
+
+    def stats(self) -> dict:
+        """Returns the state of every replica and the reads sent to the primary.
+
+        Returns:
+            A dict, the strategy, reads kept on the primary after a write or without a healthy replica, and the replicas by name.
+        """
+        return {
+            "strategy": self.strategy,
+            "max_lag_seconds": self.max_lag,
+            "sticky_reads": self.sticky_reads,
+            "primary_reads": self.primary_reads,
+            "replicas": {replica.name: replica.stats() for replica in self.replicas},
+        }
@@ -1,5 +1,61 @@
-from typing import Optional
+from typing import List, Optional, Tuple, Union
 import redis.asyncio as redis
+from redis.asyncio.client import PubSub
+
+
+# Replaces the value only if it still is the expected one
+COMPARE_AND_SET = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    return 1
+end
+return 0
+"""
+
+# Sets KEYS[1] only if the version in KEYS[2] (0 if missing) still is ARGV[1]
+SET_IF_VERSION = """
+if (redis.call('GET', KEYS[2]) or '0') == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    return 1
+end
+return 0
+"""
+
+# Deletes KEYS[1] and bumps its version in KEYS[2], which lives ARGV[1] seconds
+DELETE_AND_BUMP_VERSION = """
+redis.call('DEL', KEYS[1])
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+return 1
+"""
+
+# Sliding window log per key: KEYS are the windows, ARGV the window in ms, a unique hit ID and the limit of every key.
+# The hit is recorded in all windows only if none of them is full.
+# Returns {0, 0} if allowed, else {retry after in ms, index of the first full window}.
+SLIDING_WINDOW = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local window = tonumber(ARGV[1])
+local retry_after, limited = 0, 0
+for i, key in ipairs(KEYS) do
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    if redis.call('ZCARD', key) >= tonumber(ARGV[i + 2]) then
+        local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+        retry_after = math.max(retry_after, tonumber(oldest[2]) + window - now)
+        if limited == 0 then
+            limited = i
+        end
+    end
+end
+if limited > 0 then
+    return {math.max(retry_after, 1), limited}
+end
+for _, key in ipairs(KEYS) do
+    redis.call('ZADD', key, now, ARGV[2])
+    redis.call('PEXPIRE', key, window)
+end
+return {0, 0}
+"""
 
 
 class RedisDB:
@@ -23,5 +79,51 @@ class RedisDB:
     async def del_email_code(self, email: str) -> None:
         await self.__redis_connect.delete(email)
 
+    async def get_value(self, key: str) -> Optional[bytes]:
+        return await self.__redis_connect.get(key)
+
+    async def set_value(self, key: str, value: Union[str, bytes], ttl: int) -> None:
+        await self.__redis_connect.setex(key, ttl, value)
+
+    async def delete_value(self, key: str) -> None:
+        await self.__redis_connect.delete(key)
+
+    async def compare_and_set(self, key: str, expected: str, value: str, ttl: int) -> bool:
+        return bool(await self.__redis_connect.eval(COMPARE_AND_SET, 1, key, expected, value, ttl))
+
+    async def get_versioned(self, key: str, version_key: str) -> Tuple[Optional[bytes], str]:
+        value, version = await self.__redis_connect.mget(key, version_key)
+        return value, version.decode('utf-8') if version is not None else '0'
+
+    async def set_if_version(self, key: str, value: Union[str, bytes], ttl: int, version_key: str, version: str) -> bool:
+        return bool(await self.__redis_connect.eval(SET_IF_VERSION, 2, key, version_key, version, value, ttl))
+
+    async def delete_and_bump_version(self, key: str, version_key: str, ttl: int) -> None:
+        await self.__redis_connect.eval(DELETE_AND_BUMP_VERSION, 2, key, version_key, ttl)
+
+    async def hit_sliding_windows(
+        self, keys: List[str], limits: List[int], window_ms: int, hit_id: str
+    ) -> Tuple[int, int]:
+        retry_after_ms, limited = await self.__redis_connect.eval(
+            SLIDING_WINDOW, len(keys), *keys, window_ms, hit_id, *limits
+        )
+        return retry_after_ms, limited
+
+    async def add_scored(self, key: str, member: str, score: float) -> None:
+        await self.__redis_connect.zadd(key, {member: score})
+
+    async def trim_scored(self, key: str, max_score: float) -> None:
+        await self.__redis_connect.zremrangebyscore(key, "-inf", max_score)
+
+    async def get_scored(self, key: str) -> List[Tuple[str, float]]:
+        members = await self.__redis_connect.zrange(key, 0, -1, withscores=True)
+        return [(member.decode('utf-8'), score) for member, score in members]
+
+    async def publish(self, channel: str, message: Union[str, bytes]) -> None:
+        await self.__redis_connect.publish(channel, message)
+
+    def pubsub(self) -> PubSub:
+        return self.__redis_connect.pubsub()
+
     async def close(self) -> None:
         await self.__redis_connect.close()
\ No newline at end of file
@@ -1,5 +1,6 @@
 from fastapi import status
 from .http_errors import HTTTPError
+from ...users.responses.http_errors import HTTTPError as UserHTTTPError
 from ...users.responses.utils import convert_to_example
 
 
@@ -14,6 +15,9 @@ class PasswdResponse:
         status.HTTP_400_BAD_REQUEST: convert_to_example([
             HTTTPError.BAD_EMAIL_400,
         ]),
+        status.HTTP_429_TOO_MANY_REQUESTS: convert_to_example([
+            UserHTTTPError.TOO_MANY_REQUESTS_429,
+        ]),
     }
 
     reset_password_post = {
@@ -22,4 +26,7 @@ class PasswdResponse:
             HTTTPError.BAD_RECOVERY_CODE_400,
             HTTTPError.LACK_OF_EMAIL_IN_FORGOTTEN_400,
         ]),
+        status.HTTP_503_SERVICE_UNAVAILABLE: convert_to_example([
+            UserHTTTPError.HASHING_OVERLOADED_503,
+        ]),
     }
\ No newline at end of file
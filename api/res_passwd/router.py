@@ -1,13 +1,17 @@
-from fastapi import APIRouter, status, Request, Response
+from fastapi import APIRouter, Depends, status, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from .responses.http_errors import HTTTPError
 from .responses.responses import PasswdResponse
 from .schemas import ForgotPassword, ResetPassword
 from .service import PasswdRepository
 from .utils import create_recovery_code
+from ..bulkhead import auth_bulkhead
+from ..database import get_session, after_commit
+from ..users.limits import forgot_password_limiter, client_ip
 from ..users.service import UserRepository
 
 
-router = APIRouter(prefix="/auth", tags=["Auth 🙎🏻‍♂️"])
+router = APIRouter(prefix="/auth", tags=["Auth 🙎🏻‍♂️"], dependencies=[Depends(auth_bulkhead.enter)])
 
 
 @router.post(
@@ -19,6 +23,8 @@ router = APIRouter(prefix="/auth", tags=["Auth 🙎🏻‍♂️"])
     responses=PasswdResponse.forgot_password_post,
 )
 async def forgot_password(request: Request, forgot: ForgotPassword):
+    await forgot_password_limiter.check(request.app.redis, ip=client_ip(request), email=str(forgot.email).lower())
+
     user = await UserRepository.find_one_or_none(str(forgot.email))
     if user is None:
         raise HTTTPError.BAD_EMAIL_400
@@ -39,7 +45,7 @@ async def forgot_password(request: Request, forgot: ForgotPassword):
     status_code=status.HTTP_204_NO_CONTENT,
     responses=PasswdResponse.reset_password_post,
 )
-async def reset_password(request: Request, reset: ResetPassword):
+async def reset_password(request: Request, reset: ResetPassword, session: AsyncSession = Depends(get_session)):
     recovery_code = await request.app.redis.get_email_code(reset.email)
     if not recovery_code:
         raise HTTTPError.LACK_OF_EMAIL_IN_FORGOTTEN_400
@@ -47,10 +53,13 @@ async def reset_password(request: Request, reset: ResetPassword):
     if recovery_code != reset.code:
         raise HTTTPError.BAD_RECOVERY_CODE_400
 
-    check = await PasswdRepository.update_password_by_email(email=str(reset.email), password=reset.password)
+    check = await PasswdRepository.update_password_by_email(
+        email=str(reset.email), password=reset.password, session=session
+    )
     if not check:
         raise HTTTPError.BAD_EMAIL_400
 
-    await request.app.redis.del_email_code(reset.email)
+    # The code stays usable if the new password is not committed
+    await after_commit(session, lambda: request.app.redis.del_email_code(reset.email))
 
     return Response(status_code=status.HTTP_200_OK)
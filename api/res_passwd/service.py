@@ -1,29 +1,36 @@
-from sqlalchemy import select
-from ..database import new_session
-from ..users.auth import get_password_hash
+from typing import Optional
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import use_session, commit, after_commit
+from ..users.cache import principal_cache
 from ..users.database import UsersOrm
+from ..users.hashing import password_hasher
 
 
 class PasswdRepository:
     @classmethod
-    async def update_password_by_email(cls, email: str, password: str) -> bool:
+    async def update_password_by_email(cls, email: str, password: str, session: Optional[AsyncSession] = None) -> bool:
         """Updates the password for a user identified by email.
 
         Args:
             email (str): The email of the user whose password needs to be updated.
             password (str): The new password to set for the user.
+            session (Optional[AsyncSession]): The session of the request, a session of its own if None.
 
         Returns:
             A bool, True if the password was successfully updated, False if the user was not found.
         """
-        async with new_session() as session:
-            result = await session.execute(select(UsersOrm).where(UsersOrm.email == email))
-            user = result.scalar_one_or_none()
+        # Hashed before taking a connection, so it is not held for the whole hash
+        hashed_password = await password_hasher.hash(password)
+        async with use_session(session) as session:
+            result = await session.execute(
+                update(UsersOrm).where(UsersOrm.email == email).values(password=hashed_password).returning(UsersOrm.id)
+            )
+            id_user = result.scalar_one_or_none()
+            await commit(session)
 
-            if user:
-                hashed_password = get_password_hash(password)
-                user.password = hashed_password
-                await session.commit()
-                return True
-            else:
-                return False
\ No newline at end of file
+        if id_user is None:
+            return False
+
+        await after_commit(session, lambda: principal_cache.invalidate(id_user))
+        return True
\ No newline at end of file
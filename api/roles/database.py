@@ -1,4 +1,5 @@
 from ..database import Model
+from sqlalchemy import text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 
@@ -7,5 +8,7 @@ class RolesOrm(Model):
 
     id: Mapped[int] = mapped_column(primary_key=True)
     role_type: Mapped[str] = mapped_column(unique=True)
+    # Bitmask of roles.permissions.Permission
+    permissions: Mapped[int] = mapped_column(default=0, server_default=text('0'), nullable=False)
 
     users = relationship(argument="UsersOrm", back_populates="roles")
\ No newline at end of file
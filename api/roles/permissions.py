@@ -0,0 +1,173 @@
+import asyncio
+from enum import IntFlag
+from typing import Dict, Iterable, List, Optional
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from .database import RolesOrm
+from ..database import new_session
+from ..res_passwd.redis import RedisDB
+
+
+class Permission(IntFlag):
+    """Permissions of a role, stored as a bitmask in roles.permissions.
+
+    The API names a permission by its lowercase member name, e.g. "users_read".
+    """
+    NONE = 0
+    USERS_READ = 1 << 0
+    USERS_WRITE = 1 << 1
+    ROLES_READ = 1 << 2
+    ROLES_WRITE = 1 << 3
+    ALL = USERS_READ | USERS_WRITE | ROLES_READ | ROLES_WRITE
+
+
+PERMISSION_NAMES: Dict[str, Permission] = {
+    permission.name.lower(): permission
+    for permission in Permission
+    if permission not in (Permission.NONE, Permission.ALL)
+}
+"""Single permissions by their API name."""
+
+DEFAULT_PERMISSIONS: Dict[str, Permission] = {
+    "user": Permission.NONE,
+    "admin": Permission.ALL,
+}
+"""Permissions of the default roles by role_type."""
+
+
+def compile_permissions(names: Iterable[str]) -> Permission:
+    """Compiles permission names into a bitmask.
+
+    Args:
+        names (Iterable[str]): Permission names, keys of PERMISSION_NAMES.
+
+    Returns:
+        A Permission, the bitmask.
+
+    Raises:
+        KeyError: If a name is not a known permission.
+    """
+    mask = Permission.NONE
+    for name in names:
+        mask |= PERMISSION_NAMES[name]
+    return mask
+
+
+def permission_names(mask: int) -> List[str]:
+    """Expands a bitmask into permission names.
+
+    Args:
+        mask (int): The bitmask.
+
+    Returns:
+        A List[str], names of the permissions set in the mask.
+    """
+    return [name for name, permission in PERMISSION_NAMES.items() if mask & permission]
+
+
+class PermissionTable:
+    """Permission bitmasks by role ID, held in memory so route guards never query the database.
+
+    Role mutations call publish_reload, every worker then reloads the table from the database.
+    """
+    channel = "roles:reload"
+
+    def __init__(self) -> None:
+        self.reloads = 0
+        self.errors = 0
+        self._masks: Dict[int, Permission] = {}
+        self._redis: Optional[RedisDB] = None
+        self._listener: Optional[asyncio.Task] = None
+
+    def get(self, role_id: int) -> Permission:
+        """Returns the permissions of a role.
+
+        Args:
+            role_id (int): The role ID.
+
+        Returns:
+            A Permission, the bitmask, Permission.NONE for an unknown role.
+        """
+        return self._masks.get(role_id, Permission.NONE)
+
+    async def reload(self) -> None:
+        """Loads the permissions of all roles from the database.
+
+        Returns:
+            None
+        """
+        async with new_session() as session:
+            result = await session.execute(select(RolesOrm.id, RolesOrm.permissions))
+            self._masks = {role_id: Permission(mask) for role_id, mask in result.all()}
+        self.reloads += 1
+
+    async def publish_reload(self) -> None:
+        """Reloads the table of this worker and tells the other workers to reload theirs.
+
+        Returns:
+            None
+        """
+        await self.reload()
+        if self._redis is None:
+            return
+
+        try:
+            await self._redis.publish(self.channel, "reload")
+        except RedisError:
+            self.errors += 1
+
+    async def start(self, redis_db: RedisDB) -> None:
+        """Loads the table and starts listening for reloads of other workers.
+
+        Args:
+            redis_db (RedisDB): The application Redis.
+
+        Returns:
+            None
+        """
+        await self.reload()
+        self._redis = redis_db
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        self._listener = None
+        self._redis = None
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                # Reloads may have been missed while disconnected
+                await self.reload()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        await self.reload()
+            except (RedisError, SQLAlchemyError):
+                self.errors += 1
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.reset()
+
+    def stats(self) -> dict:
+        """Returns the table size and reload counters.
+
+        Returns:
+            A dict, the number of roles, reloads and Redis or database errors.
+        """
+        return {
+            "roles": len(self._masks),
+            "reloads": self.reloads,
+            "errors": self.errors,
+        }
+
+
+permission_table = PermissionTable()
+"""Permissions of all roles, loaded in the application lifespan."""
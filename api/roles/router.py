@@ -1,12 +1,17 @@
 from fastapi import APIRouter, Depends, status, Response
 from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
 from .responses.responses import RoleResponse
 from .schemas import RoleRead, RoleCreate
 from .service import RoleRepository
-from ..admin.dependencies import get_current_admin_user
+from .permissions import Permission
+from ..admin.dependencies import require_permissions
 from ..admin.responses.responses import base_admin_response
+from ..bulkhead import admin_bulkhead
+from ..database import get_session
+from ..serialization import json_response
 
-router = APIRouter(prefix="/roles", tags=["Role 📍"])
+router = APIRouter(prefix="/roles", tags=["Role 📍"], dependencies=[Depends(admin_bulkhead.enter)])
 
 
 @router.get(
@@ -18,8 +23,9 @@ router = APIRouter(prefix="/roles", tags=["Role 📍"])
     response_model=List[RoleRead],
     responses=base_admin_response,
 )
-async def get_all_roles(user_data = Depends(get_current_admin_user)):
-    return await RoleRepository.get_all_roles_db()
+async def get_all_roles(user_data = Depends(require_permissions(Permission.ROLES_READ))):
+    roles = await RoleRepository.get_all_roles_db()
+    return json_response(List[RoleRead], roles)
 
 
 @router.post(
@@ -31,9 +37,13 @@ async def get_all_roles(user_data = Depends(get_current_admin_user)):
     response_model=RoleRead,
     responses=base_admin_response,
 )
-async def add_role(data_role: RoleCreate, user_data = Depends(get_current_admin_user)):
-    role_id = await RoleRepository.add_new_role_db(data_role)
-    return RoleRead(id=role_id, role_type=data_role.role_type)
+async def add_role(
+    data_role: RoleCreate,
+    user_data = Depends(require_permissions(Permission.ROLES_WRITE)),
+    session: AsyncSession = Depends(get_session),
+):
+    role_id = await RoleRepository.add_new_role_db(data_role, session=session)
+    return RoleRead(id=role_id, role_type=data_role.role_type, permissions=data_role.permissions)
 
 
 @router.put(
@@ -44,8 +54,13 @@ async def add_role(data_role: RoleCreate, user_data = Depends(get_current_admin_
     status_code=status.HTTP_200_OK,
     responses=RoleResponse.update_role_put,
 )
-async def update_role(role_id: int, data_role: RoleCreate, user_data = Depends(get_current_admin_user)):
-    await RoleRepository.update_role_db(role_id, data_role)
+async def update_role(
+    role_id: int,
+    data_role: RoleCreate,
+    user_data = Depends(require_permissions(Permission.ROLES_WRITE)),
+    session: AsyncSession = Depends(get_session),
+):
+    await RoleRepository.update_role_db(role_id, data_role, session=session)
     return Response(status_code=status.HTTP_200_OK)
 
 
@@ -57,7 +72,11 @@ async def update_role(role_id: int, data_role: RoleCreate, user_data = Depends(g
     status_code=status.HTTP_200_OK,
     responses=RoleResponse.delete_role,
 )
-async def delete_role(role_id: int, user_data = Depends(get_current_admin_user)):
-    await RoleRepository.delete_role_by_id(role_id)
+async def delete_role(
+    role_id: int,
+    user_data = Depends(require_permissions(Permission.ROLES_WRITE)),
+    session: AsyncSession = Depends(get_session),
+):
+    await RoleRepository.delete_role_by_id(role_id, session=session)
     return Response(status_code=status.HTTP_200_OK)
 
@@ -1,10 +1,29 @@
-from pydantic import BaseModel, Field
+from typing import List
+from pydantic import BaseModel, Field, field_validator
+from .permissions import PERMISSION_NAMES, permission_names
 
 
 class RoleRead(BaseModel):
     id: int = Field(description="ID роли")
     role_type: str = Field(description="Название роли")
+    permissions: List[str] = Field(default=[], description="Права роли")
+
+    @field_validator("permissions", mode="before")
+    @classmethod
+    def expand_bitmask(cls, permissions):
+        if isinstance(permissions, int):
+            return permission_names(permissions)
+        return permissions
 
 
 class RoleCreate(BaseModel):
-    role_type: str = Field(description="Название роли")
\ No newline at end of file
+    role_type: str = Field(description="Название роли")
+    permissions: List[str] = Field(default=[], description=f"Права роли: {', '.join(PERMISSION_NAMES)}")
+
+    @field_validator("permissions")
+    @classmethod
+    def permissions_are_known(cls, permissions: List[str]) -> List[str]:
+        unknown = [name for name in permissions if name not in PERMISSION_NAMES]
+        if unknown:
+            raise ValueError(f"unknown permissions: {', '.join(unknown)}")
+        return permissions
\ No newline at end of file
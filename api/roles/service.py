@@ -1,9 +1,12 @@
 from sqlalchemy import select
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from .database import RolesOrm
+from .permissions import DEFAULT_PERMISSIONS, compile_permissions, permission_table
 from .responses.http_errors import HTTTPError
 from .schemas import RoleRead, RoleCreate
-from ..database import new_session
+from ..database import new_session, use_session, commit, after_commit
+from ..serialization import validate_row, validate_rows
 
 
 class RoleRepository:
@@ -12,7 +15,7 @@ class RoleRepository:
         """Creates default roles if they do not already exist.
 
         This method checks for the existence of default roles ('user' and 'admin') in the database.
-        If these roles do not exist, it creates them.
+        If these roles do not exist, it creates them with DEFAULT_PERMISSIONS.
 
         Returns:
             None
@@ -25,21 +28,22 @@ class RoleRepository:
             admin_role_exists = admin_role_exists.scalars().one_or_none()
 
             if not user_role_exists:
-                user_role = RolesOrm(role_type="user")
+                user_role = RolesOrm(role_type="user", permissions=DEFAULT_PERMISSIONS["user"])
                 session.add(user_role)
 
             if not admin_role_exists:
-                admin_role = RolesOrm(role_type="admin")
+                admin_role = RolesOrm(role_type="admin", permissions=DEFAULT_PERMISSIONS["admin"])
                 session.add(admin_role)
 
             await session.commit()
 
     @classmethod
-    async def get_role_by_id(cls, role_id: int) -> RoleRead:
+    async def get_role_by_id(cls, role_id: int, session: Optional[AsyncSession] = None) -> RoleRead:
         """Retrieves a role by its ID.
 
         Args:
             role_id (int): The ID of the role to retrieve.
+            session (Optional[AsyncSession]): The session of the request, a read-only session of its own if None.
 
         Returns:
             A RoleRead, the role object corresponding to the provided role ID.
@@ -47,50 +51,59 @@ class RoleRepository:
         Raises:
             HTTTPError.ROLE_NOT_FOUND_404: If the role with the given ID is not found.
         """
-        async with new_session() as session:
-            role_exists = await session.get(RolesOrm, role_id)
+        async with use_session(session, read_only=True) as session:
+            result = await session.execute(
+                select(RolesOrm.id, RolesOrm.role_type, RolesOrm.permissions).where(RolesOrm.id == role_id)
+            )
+            role_exists = result.one_or_none()
             if not role_exists:
                 raise HTTTPError.ROLE_NOT_FOUND_404
 
-            return RoleRead.model_validate(role_exists.__dict__)
+            return validate_row(RoleRead, role_exists)
 
     @classmethod
-    async def get_all_roles_db(cls) -> List[RoleRead]:
+    async def get_all_roles_db(cls, session: Optional[AsyncSession] = None) -> List[RoleRead]:
         """Retrieves all roles from the database.
 
+        Args:
+            session (Optional[AsyncSession]): The session of the request, a read-only session of its own if None.
+
         Returns:
             A List[RoleRead], the list of RoleRead objects representing all roles in the database.
         """
-        async with new_session() as session:
-            role_model = await session.execute(select(RolesOrm))
-            role_model = role_model.scalars().all()
-            return [RoleRead.model_validate(role.__dict__) for role in role_model]
+        async with use_session(session, read_only=True) as session:
+            result = await session.execute(select(RolesOrm.id, RolesOrm.role_type, RolesOrm.permissions))
+            return validate_rows(RoleRead, result.all())
 
     @classmethod
-    async def add_new_role_db(cls, role_data: RoleCreate):
+    async def add_new_role_db(cls, role_data: RoleCreate, session: Optional[AsyncSession] = None):
         """Adds a new role to the database.
 
         Args:
             role_data (RoleCreate): The data for the new role to be added.
+            session (Optional[AsyncSession]): The session of the request, a session of its own if None.
 
         Returns:
             A int, the ID of the newly created role.
         """
-        async with new_session() as session:
-            role_dict = role_data.model_dump()
-            role = RolesOrm(**role_dict)
+        async with use_session(session) as session:
+            role = RolesOrm(role_type=role_data.role_type, permissions=compile_permissions(role_data.permissions))
             session.add(role)
             await session.flush()
-            await session.commit()
-            return role.id
+            role_id = role.id
+            await commit(session)
+
+        await after_commit(session, permission_table.publish_reload)
+        return role_id
 
     @classmethod
-    async def update_role_db(cls, role_id: int, role_data: RoleCreate) -> None:
+    async def update_role_db(cls, role_id: int, role_data: RoleCreate, session: Optional[AsyncSession] = None) -> None:
         """Updates the role information for a given role ID.
 
         Args:
             role_id (int): The ID of the role to be updated.
             role_data (RoleCreate): The new data for the role.
+            session (Optional[AsyncSession]): The session of the request, a session of its own if None.
 
         Returns:
             None
@@ -98,21 +111,25 @@ class RoleRepository:
         Raises:
             HTTTPError.ROLE_NOT_FOUND_404: If the role with the given ID is not found.
         """
-        async with new_session() as session:
+        async with use_session(session) as session:
             result = await session.execute(select(RolesOrm).where(RolesOrm.id == role_id))
             role_old = result.scalars().one_or_none()
             if role_old is None:
                 raise HTTTPError.ROLE_NOT_FOUND_404
 
             role_old.role_type = role_data.role_type
-            await session.commit()
+            role_old.permissions = compile_permissions(role_data.permissions)
+            await commit(session)
+
+        await after_commit(session, permission_table.publish_reload)
 
     @classmethod
-    async def delete_role_by_id(cls, role_id: int) -> None:
+    async def delete_role_by_id(cls, role_id: int, session: Optional[AsyncSession] = None) -> None:
         """Deletes a role by its ID.
 
         Args:
             role_id (int): The ID of the role to be deleted.
+            session (Optional[AsyncSession]): The session of the request, a session of its own if None.
 
         Returns:
             None
@@ -120,10 +137,12 @@ class RoleRepository:
         Raises:
             HTTTPError.ROLE_NOT_FOUND_404: If the role with the given ID is not found.
         """
-        async with new_session() as session:
+        async with use_session(session) as session:
             role = await session.get(RolesOrm, role_id)
             if role:
                 await session.delete(role)
-                await session.commit()
+                await commit(session)
             else:
-                raise HTTTPError.ROLE_NOT_FOUND_404
\ No newline at end of file
+                raise HTTTPError.ROLE_NOT_FOUND_404
+
+        await after_commit(session, permission_table.publish_reload)
\ No newline at end of file
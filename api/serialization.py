@@ -0,0 +1,85 @@
+from functools import lru_cache
+from typing import Any, Iterable, List, Type, TypeVar
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+
+T = TypeVar("T")
+
+
+@lru_cache(maxsize=None)
+def get_adapter(tp: Any) -> TypeAdapter:
+    """Returns the TypeAdapter of a type, built once per type.
+
+    Args:
+        tp (Any): The type, e.g. BookRead or List[UserInfo].
+
+    Returns:
+        A TypeAdapter, validator and serializer of the type.
+    """
+    return TypeAdapter(tp)
+
+
+def validate_row(model: Type[T], row: Any) -> T:
+    """Validates a Core row (or any object with attributes) as a model.
+
+    Args:
+        model (Type[T]): The pydantic model.
+        row (Any): The row.
+
+    Returns:
+        A T, the validated model.
+    """
+    return get_adapter(model).validate_python(row, from_attributes=True)
+
+
+def validate_rows(model: Type[T], rows: Iterable[Any]) -> List[T]:
+    """Validates Core rows as a list of models in one call.
+
+    Args:
+        model (Type[T]): The pydantic model.
+        rows (Iterable[Any]): The rows.
+
+    Returns:
+        A List[T], the validated models.
+    """
+    return get_adapter(List[model]).validate_python(rows, from_attributes=True)
+
+
+def dump_json(tp: Any, value: Any) -> bytes:
+    """Serializes already validated data straight to JSON bytes.
+
+    Args:
+        tp (Any): The type of the value, e.g. BookRead or List[UserInfo].
+        value (Any): The value.
+
+    Returns:
+        A bytes, JSON.
+    """
+    return get_adapter(tp).dump_json(value)
+
+
+class RawJSONResponse(Response):
+    """JSON response whose content is already serialized bytes.
+
+    Returned by routes instead of models, so FastAPI does not validate and
+    encode the content again through response_model.
+    """
+    media_type = "application/json"
+
+    def render(self, content: bytes) -> bytes:
+        return content
+
+
+def json_response(tp: Any, value: Any, **kwargs: Any) -> RawJSONResponse:
+    """Serializes a value with the cached adapter of its type into a response.
+
+    Args:
+        tp (Any): The type of the value, the same as response_model of the route.
+        value (Any): The value.
+        **kwargs: Other arguments of the response (status_code, headers).
+
+    Returns:
+        A RawJSONResponse.
+    """
+    return RawJSONResponse(content=dump_json(tp, value), **kwargs)
@@ -1,16 +1,43 @@
 from datetime import datetime, timezone, timedelta
+from typing import Optional, Tuple
+from uuid import uuid4
 from passlib.context import CryptContext
-from jose import jwt
 from fastapi import Response
 from ..config import (
-    SECRET_KEY_JWT,
     ALGORITHM,
     ACCESS_TOKEN_EXPIRE_MINUTES,
     REFRESH_TOKEN_EXPIRE_DAYS,
+    PASSWORD_HASH_SCHEME,
+    BCRYPT_ROUNDS,
+    ARGON2_TIME_COST,
+    ARGON2_MEMORY_COST,
+    ARGON2_PARALLELISM,
 )
+from .tokens import jwt_backend, key_ring
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+REFRESH_TOKEN_TYPE = "refresh"
+"""The "typ" claim of refresh tokens."""
+
+ACCESS_TOKEN_TYPE = "access"
+"""The "typ" claim of access tokens, also the type of tokens issued without one."""
+
+PASSWORD_HASH_SCHEMES = ("bcrypt", "argon2")
+"""Schemes whose hashes are verified, argon2 needs the optional argon2-cffi package."""
+
+pwd_context = CryptContext(
+    schemes=[PASSWORD_HASH_SCHEME, *(scheme for scheme in PASSWORD_HASH_SCHEMES if scheme != PASSWORD_HASH_SCHEME)],
+    default=PASSWORD_HASH_SCHEME,
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    argon2__time_cost=ARGON2_TIME_COST,
+    argon2__memory_cost=ARGON2_MEMORY_COST,
+    argon2__parallelism=ARGON2_PARALLELISM,
+)
+"""Hashes with PASSWORD_HASH_SCHEME and its configured cost, see python -m api.users.calibrate.
+
+Hashes of the other scheme or with another cost still verify, needs_update reports them.
+"""
 
 
 def get_password_hash(password: str) -> str:
@@ -38,19 +65,57 @@ def verify_password(default_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(default_password, hashed_password)
 
 
+def verify_and_update_password(default_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verifies password and rehashes it if the hash uses an outdated scheme or cost.
+
+    Args:
+        default_password (str): Password to check.
+        hashed_password (str): Hashed password.
+
+    Returns:
+        A Tuple[bool, Optional[str]], True if password success verified, else False,
+            and the new hash to store if the password was verified and needs a rehash, else None.
+    """
+    return pwd_context.verify_and_update(default_password, hashed_password)
+
+
+def new_token_id() -> str:
+    """Creates a unique ID for the "jti" and "fam" claims.
+
+    Returns:
+        A str, random hex ID.
+    """
+    return uuid4().hex
+
+
+def sign_token(claims: dict) -> str:
+    """Signs claims with the current key of key_ring, naming the key in the "kid" header.
+
+    Args:
+        claims (dict): The claims.
+
+    Returns:
+        A str, encoded token.
+    """
+    kid, key = key_ring.signing_key()
+    return jwt_backend.encode(claims, key, algorithm=ALGORITHM, headers={"kid": kid} if kid is not None else None)
+
+
 def create_access_token(data: dict) -> str:
-    """Creates encoded access token.
+    """Creates encoded access token with a unique "jti".
 
     Args:
-        data (dict): Information for encoding in access token.
+        data (dict): Information for encoding in access token,
+            the user ID in "sub", the role ID in "role" and the refresh token family in "fam".
 
     Returns:
         A str, encoded token.
     """
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encode_jwt = jwt.encode(to_encode, SECRET_KEY_JWT, algorithm=ALGORITHM)
+    to_encode.setdefault("jti", new_token_id())
+    to_encode.update({"exp": expire, "typ": ACCESS_TOKEN_TYPE})
+    encode_jwt = sign_token(to_encode)
     return encode_jwt
 
 
@@ -59,15 +124,16 @@ def create_refresh_token(response: Response, data: dict) -> None:
 
     Args:
         response (Response): The HTTP response object
-        data (dict): Information for encoding in access token.
+        data (dict): Information for encoding in refresh token,
+            the user ID in "sub", the family in "fam" and the "jti" registered in token_revocation.
 
     Returns:
         None
     """
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire})
-    encode_jwt = jwt.encode(to_encode, SECRET_KEY_JWT, algorithm=ALGORITHM)
+    to_encode.update({"exp": expire, "typ": REFRESH_TOKEN_TYPE})
+    encode_jwt = sign_token(to_encode)
     response.set_cookie(
         key="refresh_token",
         value=encode_jwt,
@@ -0,0 +1,13 @@
+from .schemas import Principal
+from ..cache import TwoTierCache
+from ..config import PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL_SECONDS, PRINCIPAL_CACHE_REDIS_TTL_SECONDS
+
+
+principal_cache: TwoTierCache[Principal] = TwoTierCache(
+    namespace="principals",
+    model=Principal,
+    maxsize=PRINCIPAL_CACHE_SIZE,
+    ttl=PRINCIPAL_CACHE_TTL_SECONDS,
+    redis_ttl=PRINCIPAL_CACHE_REDIS_TTL_SECONDS,
+)
+"""Principals by user ID, read-through in UserRepository.get_principal."""
@@ -0,0 +1,154 @@
+"""Picks the password hashing cost that fits the latency budget on this host.
+
+Usage: python -m api.users.calibrate [--budget-ms 250] [--scheme bcrypt|argon2] [--samples 5] [--max-memory-mib 256]
+
+Measures one hash at a time, as a worker of password_hasher runs it, and prints the settings
+to put into .env. Without --scheme argon2 is picked if argon2-cffi is installed, else bcrypt.
+Passwords hashed with the previous settings are rehashed on the next successful login.
+"""
+import argparse
+from statistics import median
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+from passlib.hash import argon2, bcrypt
+from ..config import PASSWORD_HASH_BUDGET_MS, ARGON2_PARALLELISM
+
+
+PASSWORD = "calibration_password"
+
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 20
+ARGON2_MIN_MEMORY_KIB = 16 * 1024
+ARGON2_MIN_TIME_COST = 2
+ARGON2_MAX_TIME_COST = 10
+
+
+def measure_ms(handler, samples: int) -> float:
+    """Returns the median time of hashing PASSWORD with a configured passlib handler.
+
+    Args:
+        handler: A passlib handler with its cost set by using().
+        samples (int): The number of hashes.
+
+    Returns:
+        A float, milliseconds.
+    """
+    times = []
+    for _ in range(samples):
+        started = perf_counter()
+        handler.hash(PASSWORD)
+        times.append((perf_counter() - started) * 1000)
+    return median(times)
+
+
+def calibrate_bcrypt(budget_ms: float, samples: int) -> Tuple[Dict[str, int], float, List[str]]:
+    """Finds the most bcrypt rounds within the budget, every round doubles the time.
+
+    Args:
+        budget_ms (float): The latency budget of one hash.
+        samples (int): The number of hashes per measured cost.
+
+    Returns:
+        A Tuple[Dict[str, int], float, List[str]], the settings, their hash time and the measurements.
+    """
+    settings, chosen_ms, log = {"BCRYPT_ROUNDS": BCRYPT_MIN_ROUNDS}, None, []
+    for rounds in range(BCRYPT_MIN_ROUNDS, BCRYPT_MAX_ROUNDS + 1):
+        elapsed = measure_ms(bcrypt.using(rounds=rounds), samples)
+        log.append(f"bcrypt rounds={rounds}: {elapsed:.1f} ms")
+        if elapsed > budget_ms and chosen_ms is not None:
+            break
+        settings, chosen_ms = {"BCRYPT_ROUNDS": rounds}, elapsed
+        if elapsed > budget_ms:
+            break
+    return settings, chosen_ms, log
+
+
+def calibrate_argon2(budget_ms: float, samples: int, max_memory_kib: int) -> Tuple[Dict[str, int], float, List[str]]:
+    """Finds the most argon2 memory within the budget, then the most passes with that memory.
+
+    Memory is raised first because it is what makes guessing expensive on GPUs.
+
+    Args:
+        budget_ms (float): The latency budget of one hash.
+        samples (int): The number of hashes per measured cost.
+        max_memory_kib (int): The memory limit of one hash, every pool worker needs it.
+
+    Returns:
+        A Tuple[Dict[str, int], float, List[str]], the settings, their hash time and the measurements.
+    """
+    log = []
+
+    def measure(memory_cost: int, time_cost: int) -> float:
+        handler = argon2.using(memory_cost=memory_cost, time_cost=time_cost, parallelism=ARGON2_PARALLELISM)
+        elapsed = measure_ms(handler, samples)
+        log.append(f"argon2 memory_cost={memory_cost} time_cost={time_cost}: {elapsed:.1f} ms")
+        return elapsed
+
+    memory_cost, time_cost = ARGON2_MIN_MEMORY_KIB, ARGON2_MIN_TIME_COST
+    chosen_ms = measure(memory_cost, time_cost)
+    while chosen_ms <= budget_ms and memory_cost * 2 <= max_memory_kib:
+        elapsed = measure(memory_cost * 2, time_cost)
+        if elapsed > budget_ms:
+            break
+        memory_cost, chosen_ms = memory_cost * 2, elapsed
+    else:
+        while chosen_ms <= budget_ms and time_cost < ARGON2_MAX_TIME_COST:
+            elapsed = measure(memory_cost, time_cost + 1)
+            if elapsed > budget_ms:
+                break
+            time_cost, chosen_ms = time_cost + 1, elapsed
+
+    settings = {
+        "ARGON2_MEMORY_COST": memory_cost,
+        "ARGON2_TIME_COST": time_cost,
+        "ARGON2_PARALLELISM": ARGON2_PARALLELISM,
+    }
+    return settings, chosen_ms, log
+
+
+def calibrate(budget_ms: float, scheme: Optional[str], samples: int, max_memory_kib: int) -> List[str]:
+    """Calibrates a scheme and returns the report lines.
+
+    Args:
+        budget_ms (float): The latency budget of one hash.
+        scheme (Optional[str]): "bcrypt", "argon2" or None to pick the best installed one.
+        samples (int): The number of hashes per measured cost.
+        max_memory_kib (int): The argon2 memory limit of one hash.
+
+    Returns:
+        A List[str], the measurements, then the settings for .env.
+
+    Raises:
+        SystemExit: If argon2 is requested but argon2-cffi is not installed.
+    """
+    if scheme is None:
+        scheme = "argon2" if argon2.has_backend() else "bcrypt"
+    if scheme == "argon2" and not argon2.has_backend():
+        raise SystemExit("argon2 needs the argon2-cffi package: pip install argon2-cffi")
+
+    if scheme == "argon2":
+        settings, chosen_ms, log = calibrate_argon2(budget_ms, samples, max_memory_kib)
+    else:
+        settings, chosen_ms, log = calibrate_bcrypt(budget_ms, samples)
+
+    if chosen_ms > budget_ms:
+        log.append(f"the cheapest allowed cost takes {chosen_ms:.1f} ms, more than the budget of {budget_ms:.0f} ms")
+    log.append("")
+    log.append(f"# {chosen_ms:.1f} ms per hash, budget {budget_ms:.0f} ms")
+    log.append(f"PASSWORD_HASH_SCHEME={scheme}")
+    log.extend(f"{name}={value}" for name, value in settings.items())
+    return log
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=PASSWORD_HASH_BUDGET_MS)
+    parser.add_argument("--scheme", choices=["bcrypt", "argon2"], default=None)
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--max-memory-mib", type=int, default=256)
+    args = parser.parse_args()
+    print("\n".join(calibrate(args.budget_ms, args.scheme, args.samples, args.max_memory_mib * 1024)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,83 +1,296 @@
-from fastapi import HTTPException, Depends, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import JWTError, jwt, ExpiredSignatureError
-from .auth import SECRET_KEY_JWT, ALGORITHM, create_access_token
-from .database import UsersOrm
+import secrets
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from fastapi import HTTPException, Depends, Request, Response, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials, HTTPBasic, HTTPBasicCredentials
+from jose import JWTError, ExpiredSignatureError
+from sqlalchemy.ext.asyncio import AsyncSession
+from .auth import ACCESS_TOKEN_TYPE, REFRESH_TOKEN_TYPE, create_access_token, create_refresh_token, new_token_id
+from .limits import introspect_limiter, client_ip
 from .responses.http_errors import HTTTPError
-from .schemas import UserInfo
+from .revocation import token_revocation
+from .schemas import UserInfo, Principal, TokenIntrospection
 from .service import UserRepository
+from .tokens import token_verifier
+from ..config import INTROSPECT_CLIENTS
+from ..database import get_session
+from ..serialization import validate_row
 
 
 http_bearer = HTTPBearer()
 
+http_basic = HTTPBasic(auto_error=False)
 
-async def descript_and_check_token(token: str) -> UsersOrm:
-    """Decodes and validates a JWT token, retrieves the corresponding user, and checks the user's status.
+
+def verify_token(token: str, token_type: Optional[str] = ACCESS_TOKEN_TYPE) -> Mapping[str, Any]:
+    """Decodes and validates a JWT token without looking at its user.
 
     Args:
         token (str): The JWT token to be decoded and validated.
+        token_type (Optional[str]): The "typ" the token must have, None accepts access and refresh tokens.
+            Tokens issued without "typ" are access tokens.
 
     Returns:
-        A UsersOrm, the user object corresponding to the validated token.
+        A Mapping[str, Any], the claims of the token, "sub" is a user ID.
 
     Raises:
         HTTTPError.BAD_CREDENTIALS_403: If the token has expired.
-        HTTTPError.INVALID_TOKEN_401: If the token is invalid or does not contain a user ID.
-        HTTTPError.DATA_OUT_OF_DATE_403: If the user corresponding to the token does not exist.
-        HTTTPError.USER_NOT_ACTIVE_403: If the user corresponding to the token is not active.
+        HTTTPError.INVALID_TOKEN_401: If the token is invalid, of another type or does not contain a user ID.
+        HTTTPError.TOKEN_REVOKED_401: If the token family was revoked.
     """
     try:
-        payload = jwt.decode(token, SECRET_KEY_JWT, algorithms=[ALGORITHM])
+        payload = token_verifier.decode(token)
     except ExpiredSignatureError:
         raise HTTTPError.BAD_CREDENTIALS_403
     except JWTError:
         raise HTTTPError.INVALID_TOKEN_401
 
+    # A refresh token lives far longer than an access token and must never work as a bearer token
+    if token_type is not None and payload.get('typ', ACCESS_TOKEN_TYPE) != token_type:
+        raise HTTTPError.INVALID_TOKEN_401
+
+    # In-memory check, revocations are replicated into every worker
+    family = payload.get('fam')
+    if family and token_revocation.is_revoked(family):
+        raise HTTTPError.TOKEN_REVOKED_401
+
     user_id = payload.get('sub')
-    if not user_id:
+    if not isinstance(user_id, str) or not user_id.isdigit():
         raise HTTTPError.INVALID_TOKEN_401
 
-    user = await UserRepository.find_one_or_none_by_id(int(user_id))
+    return payload
+
+
+def check_principal(payload: Mapping[str, Any], user: Optional[Principal]) -> Principal:
+    """Checks the user of a validated token.
+
+    Args:
+        payload (Mapping[str, Any]): The claims of the token.
+        user (Optional[Principal]): The authorization data of the user in "sub", None if not found.
+
+    Returns:
+        A Principal, the user.
+
+    Raises:
+        HTTTPError.DATA_OUT_OF_DATE_403: If the user corresponding to the token does not exist
+            or the role of the user changed after the token was issued.
+        HTTTPError.USER_NOT_ACTIVE_403: If the user corresponding to the token is not active.
+    """
     if not user:
         raise HTTTPError.DATA_OUT_OF_DATE_403
 
     if not user.is_active:
         raise HTTTPError.USER_NOT_ACTIVE_403
 
+    # Access tokens carry the role they were issued for, refresh tokens don't
+    role_id = payload.get('role')
+    if role_id is not None and role_id != user.role_id:
+        raise HTTTPError.DATA_OUT_OF_DATE_403
+
     return user
 
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(http_bearer)) -> UserInfo:
-    """Retrieves the current user based on the provided JWT token.
+async def decode_and_check_token(
+        token: str,
+        session: Optional[AsyncSession] = None,
+        token_type: str = ACCESS_TOKEN_TYPE,
+) -> Tuple[Mapping[str, Any], Principal]:
+    """Decodes and validates a JWT token, retrieves the corresponding user, and checks the user's status.
+
+    Args:
+        token (str): The JWT token to be decoded and validated.
+        session (Optional[AsyncSession]): The session of the request, a session of its own if None.
+        token_type (str): The "typ" the token must have.
+
+    Returns:
+        A Tuple[Mapping[str, Any], Principal], the claims of the token and the authorization data of its user.
+
+    Raises:
+        HTTTPError.BAD_CREDENTIALS_403: If the token has expired.
+        HTTTPError.INVALID_TOKEN_401: If the token is invalid, of another type or does not contain a user ID.
+        HTTTPError.TOKEN_REVOKED_401: If the token family was revoked.
+        HTTTPError.DATA_OUT_OF_DATE_403: If the user corresponding to the token does not exist
+            or the role of the user changed after the token was issued.
+        HTTTPError.USER_NOT_ACTIVE_403: If the user corresponding to the token is not active.
+    """
+    payload = verify_token(token, token_type)
+    user = await UserRepository.get_principal(int(payload['sub']), session)
+    return payload, check_principal(payload, user)
+
+
+async def introspect_tokens(tokens: List[str]) -> List[TokenIntrospection]:
+    """Checks several tokens like decode_and_check_token, their users are found with one query.
+
+    Args:
+        tokens (List[str]): The JWT tokens.
+
+    Returns:
+        A List[TokenIntrospection], the state of every token, in the same order.
+    """
+    payloads: Dict[int, Mapping[str, Any]] = {}
+    results: List[Optional[TokenIntrospection]] = []
+    for index, token in enumerate(tokens):
+        try:
+            payloads[index] = verify_token(token, token_type=None)
+            results.append(None)
+        except HTTPException as error:
+            results.append(TokenIntrospection(active=False, reason=error.detail["code"]))
+
+    ids = list({int(payload['sub']) for payload in payloads.values()})
+    users = await UserRepository.get_principals(ids) if ids else {}
+
+    for index, payload in payloads.items():
+        try:
+            check_principal(payload, users.get(int(payload['sub'])))
+        except HTTPException as error:
+            results[index] = TokenIntrospection(active=False, reason=error.detail["code"])
+            continue
+        results[index] = TokenIntrospection(
+            active=True,
+            token_type=payload.get('typ', ACCESS_TOKEN_TYPE),
+            sub=payload['sub'],
+            role=payload.get('role'),
+            exp=payload.get('exp'),
+            jti=payload.get('jti'),
+            fam=payload.get('fam'),
+        )
+    return results
+
+
+async def get_introspection_client(
+        request: Request,
+        credentials: Optional[HTTPBasicCredentials] = Depends(http_basic),
+) -> str:
+    """Authenticates the gateway calling introspection by its client ID and secret from INTROSPECT_CLIENTS.
+
+    Args:
+        request (Request): The HTTP request.
+        credentials (Optional[HTTPBasicCredentials]): The client ID and secret, as HTTP Basic credentials.
+
+    Returns:
+        A str, the client ID.
+
+    Raises:
+        HTTPException: 429 like HTTTPError.TOO_MANY_REQUESTS_429, if the IP or the client is over its limit.
+        HTTTPError.INVALID_CLIENT_401: If the credentials are missing or wrong.
+    """
+    client = credentials.username if credentials is not None else ""
+    await introspect_limiter.check(request.app.redis, ip=client_ip(request), client=client)
+
+    secret = INTROSPECT_CLIENTS.get(client, "")
+    password = credentials.password if credentials is not None else ""
+    # Compared in constant time, and also for an unknown client
+    if not secrets.compare_digest(password.encode(), secret.encode()) or not secret:
+        raise HTTTPError.INVALID_CLIENT_401
+    return client
+
+
+async def descript_and_check_token(token: str, session: Optional[AsyncSession] = None) -> Principal:
+    """Decodes and validates an access token, see decode_and_check_token.
+
+    Args:
+        token (str): The JWT token to be decoded and validated.
+        session (Optional[AsyncSession]): The session of the request, a session of its own if None.
+
+    Returns:
+        A Principal, the authorization data of the user corresponding to the validated token.
+    """
+    _, user = await decode_and_check_token(token, session)
+    return user
+
+
+async def get_current_principal(
+        credentials: HTTPAuthorizationCredentials = Depends(http_bearer),
+        session: AsyncSession = Depends(get_session),
+) -> Principal:
+    """Retrieves the authorization data of the current user based on the provided JWT token.
 
     Args:
         credentials (HTTPAuthorizationCredentials): The HTTP authorization credentials containing the JWT token.
+        session (AsyncSession): The session of the request, used on a principal cache miss.
 
     Returns:
-        UserInfo: The user object corresponding to the valid JWT token.
+        Principal: The authorization data of the user corresponding to the valid JWT token.
     """
     token = credentials.credentials
 
-    user = await descript_and_check_token(token)
+    return await descript_and_check_token(token, session)
 
-    return UserInfo.model_validate(user.__dict__)
 
+async def get_current_user(
+        principal: Principal = Depends(get_current_principal),
+        session: AsyncSession = Depends(get_session),
+) -> UserInfo:
+    """Retrieves the current user based on the provided JWT token.
 
-async def refresh_access_token(refresh_token: str) -> str:
-    """Refreshes the access token using a provided refresh token.
+    Args:
+        principal (Principal): The authorization data of the current user.
+        session (AsyncSession): The session of the request, the same one the principal was loaded with.
+
+    Returns:
+        UserInfo: The user object corresponding to the valid JWT token.
+
+    Raises:
+        HTTTPError.DATA_OUT_OF_DATE_403: If the user was deleted after the principal was cached.
+    """
+    user = await UserRepository.find_one_or_none_by_id(principal.id, session)
+    if not user:
+        raise HTTTPError.DATA_OUT_OF_DATE_403
+
+    return validate_row(UserInfo, user)
+
+
+async def refresh_access_token(refresh_token: str, response: Response) -> str:
+    """Refreshes the access token and rotates the refresh token using a provided refresh token.
 
     Args:
         refresh_token (str): The refresh token used to generate a new access token.
+        response (Response): The HTTP response object, gets the new refresh token cookie.
 
     Returns:
         A str, new access token.
+
+    Raises:
+        HTTTPError.INVALID_TOKEN_401: If the token is not a refresh token.
+        HTTTPError.TOKEN_REVOKED_401: If the token is not the current one of its family,
+            the whole family is revoked then.
+        HTTTPError.TOKENS_UNAVAILABLE_503: If Redis can't be reached.
     """
-    user = await descript_and_check_token(refresh_token)
+    payload, user = await decode_and_check_token(refresh_token, token_type=REFRESH_TOKEN_TYPE)
+    family, jti = payload.get('fam'), payload.get('jti')
+    if not family or not jti:
+        raise HTTTPError.INVALID_TOKEN_401
 
-    new_access_token = create_access_token({"sub": str(user.id)})
+    new_jti = new_token_id()
+    if not await token_revocation.rotate(family, jti, new_jti):
+        raise HTTTPError.TOKEN_REVOKED_401
+
+    create_refresh_token(response=response, data={"sub": str(user.id), "fam": family, "jti": new_jti})
+    new_access_token = create_access_token({"sub": str(user.id), "role": user.role_id, "fam": family})
     return new_access_token
 
 
+async def revoke_refresh_token(refresh_token: str) -> None:
+    """Revokes the family of a refresh token, an invalid or expired token is ignored.
+
+    Args:
+        refresh_token (str): The refresh token to revoke.
+
+    Returns:
+        None
+
+    Raises:
+        HTTTPError.TOKENS_UNAVAILABLE_503: If Redis can't be reached.
+    """
+    try:
+        payload = token_verifier.decode(refresh_token)
+    except JWTError:
+        return
+
+    family = payload.get('fam')
+    if payload.get('typ') == REFRESH_TOKEN_TYPE and family:
+        await token_revocation.revoke(family)
+
+
 # # Проверка на роль студента
 # async def get_current_student(current_user: UserCreate = Depends(get_current_user)):
 #     """Checks if the current user has the role of a student.
@@ -0,0 +1,169 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from typing import Callable, Optional, Tuple, TypeVar
+from .auth import get_password_hash, verify_password, verify_and_update_password
+from .responses.http_errors import HTTTPError
+from ..config import PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE
+
+
+R = TypeVar("R")
+
+
+def _timed_hash(password: str) -> Tuple[str, float]:
+    started = perf_counter()
+    return get_password_hash(password), perf_counter() - started
+
+
+def _timed_verify(password: str, hashed_password: str) -> Tuple[bool, float]:
+    started = perf_counter()
+    return verify_password(password, hashed_password), perf_counter() - started
+
+
+def _timed_verify_and_update(password: str, hashed_password: str) -> Tuple[Tuple[bool, Optional[str]], float]:
+    started = perf_counter()
+    return verify_and_update_password(password, hashed_password), perf_counter() - started
+
+
+def _ping() -> None:
+    return None
+
+
+class PasswordHasher:
+    """Runs password hashing and verification in a process pool instead of the event loop.
+
+    At most workers + max_queue calls wait for the pool, further calls are rejected at once
+    with HTTTPError.HASHING_OVERLOADED_503 rather than queued behind seconds of bcrypt work.
+    """
+    def __init__(self, workers: int, max_queue: int) -> None:
+        self.workers = workers
+        self.max_queue = max_queue
+        self.hashes = 0
+        self.verifies = 0
+        self.rehashes = 0
+        self.rejected = 0
+        self.pending = 0
+        self.completed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.hash_total = 0.0
+        self.hash_max = 0.0
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    async def start(self) -> None:
+        """Starts the worker processes.
+
+        Returns:
+            None
+        """
+        # spawn: forking the event loop process with its open connections and threads is unsafe
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._pool, _ping) for _ in range(self.workers)))
+
+    async def stop(self) -> None:
+        """Stops the worker processes, waiting for the running calls.
+
+        Returns:
+            None
+        """
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await asyncio.get_running_loop().run_in_executor(None, pool.shutdown)
+
+    async def hash(self, password: str) -> str:
+        """Hashes a password, see get_password_hash.
+
+        Args:
+            password (str): The plaintext password to be hashed.
+
+        Returns:
+            A str, the hashed password.
+
+        Raises:
+            HTTTPError.HASHING_OVERLOADED_503: If the pool queue is full.
+        """
+        self.hashes += 1
+        return await self._run(_timed_hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """Verifies a password, see verify_password.
+
+        Args:
+            password (str): Password to check.
+            hashed_password (str): Hashed password.
+
+        Returns:
+            A bool, if password success verified True, else False.
+
+        Raises:
+            HTTTPError.HASHING_OVERLOADED_503: If the pool queue is full.
+        """
+        self.verifies += 1
+        return await self._run(_timed_verify, password, hashed_password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verifies a password and rehashes it in the same call if needed, see verify_and_update_password.
+
+        Args:
+            password (str): Password to check.
+            hashed_password (str): Hashed password.
+
+        Returns:
+            A Tuple[bool, Optional[str]], the verification result and the new hash to store, if any.
+
+        Raises:
+            HTTTPError.HASHING_OVERLOADED_503: If the pool queue is full.
+        """
+        self.verifies += 1
+        verified, new_hash = await self._run(_timed_verify_and_update, password, hashed_password)
+        if new_hash is not None:
+            self.rehashes += 1
+        return verified, new_hash
+
+    async def _run(self, func: Callable[..., Tuple[R, float]], *args) -> R:
+        if self._pool is None:
+            raise RuntimeError("PasswordHasher is not started")
+        if self.pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise HTTTPError.HASHING_OVERLOADED_503
+
+        self.pending += 1
+        started = perf_counter()
+        try:
+            result, hash_time = await asyncio.get_running_loop().run_in_executor(self._pool, func, *args)
+        finally:
+            self.pending -= 1
+
+        wait_time = perf_counter() - started - hash_time
+        self.completed += 1
+        self.wait_total += wait_time
+        self.wait_max = max(self.wait_max, wait_time)
+        self.hash_total += hash_time
+        self.hash_max = max(self.hash_max, hash_time)
+        return result
+
+    def stats(self) -> dict:
+        """Returns pool counters, times are in milliseconds.
+
+        Returns:
+            A dict, calls, rejections, current queue depth, queue wait and hash time.
+        """
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "pending": self.pending,
+            "hashes": self.hashes,
+            "verifies": self.verifies,
+            "rehashes": self.rehashes,
+            "rejected": self.rejected,
+            "wait_ms_mean": round(self.wait_total / self.completed * 1000, 2) if self.completed else None,
+            "wait_ms_max": round(self.wait_max * 1000, 2),
+            "hash_ms_mean": round(self.hash_total / self.completed * 1000, 2) if self.completed else None,
+            "hash_ms_max": round(self.hash_max * 1000, 2),
+        }
+
+
+password_hasher = PasswordHasher(workers=PASSWORD_HASH_WORKERS, max_queue=PASSWORD_HASH_MAX_QUEUE)
+"""Hashing of register, login and password reset, started in the application lifespan."""
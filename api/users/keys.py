@@ -0,0 +1,337 @@
+"""Signing keys of the tokens and their rotation.
+
+Usage: python -m api.users.keys rotate [--force]
+
+With an asymmetric ALGORITHM (RS256, EdDSA) the private keys are PEM files <kid>.pem in JWT_KEYS_DIR.
+The kid starts with the time the key starts signing, so a key is published in the JWKS before it is used.
+Run rotate daily (cron): it adds a key once the newest one is JWT_KEY_ROTATION_DAYS old
+and deletes keys no token signed with them can still be valid for.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import secrets
+from time import time
+from typing import Any, Dict, List, Optional, Tuple
+from jose import JWTError
+from ..config import (
+    ALGORITHM,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    REFRESH_TOKEN_EXPIRE_DAYS,
+    JWT_KEYS_DIR,
+    JWT_KEY_ROTATION_DAYS,
+    JWT_KEY_ACTIVATION_MINUTES,
+)
+
+
+RETIRE_AFTER_SECONDS = REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60 + ACCESS_TOKEN_EXPIRE_MINUTES * 60
+"""The longest lifetime of a token, a key is kept this long after a newer key started signing."""
+
+
+def is_symmetric(algorithm: str) -> bool:
+    """Checks if an algorithm signs with a shared secret instead of a key pair.
+
+    Args:
+        algorithm (str): The JWT "alg".
+
+    Returns:
+        A bool, True for the HS algorithms.
+    """
+    return algorithm.startswith("HS")
+
+
+def generate_private_key(algorithm: str) -> str:
+    """Generates a private key for an asymmetric algorithm.
+
+    Args:
+        algorithm (str): RS256, RS384, RS512 or EdDSA.
+
+    Returns:
+        A str, the PEM of the private key.
+
+    Raises:
+        ValueError: If the algorithm is not supported.
+        ImportError: If EdDSA is requested without the cryptography package.
+    """
+    if algorithm in ("RS256", "RS384", "RS512"):
+        import rsa
+        _, private_key = rsa.newkeys(2048)
+        return private_key.save_pkcs1().decode("ascii")
+    if algorithm == "EdDSA":
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+        return Ed25519PrivateKey.generate().private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption(),
+        ).decode("ascii")
+    raise ValueError(f"Unsupported signing algorithm {algorithm}")
+
+
+def key_not_before(kid: str) -> int:
+    """Returns the time a key starts signing, the first part of its kid.
+
+    Args:
+        kid (str): The key ID, "<unix time>-<random hex>".
+
+    Returns:
+        A int, unix time.
+
+    Raises:
+        ValueError: If the kid has another format.
+    """
+    return int(kid.split("-", 1)[0])
+
+
+def list_kids(directory: str) -> List[str]:
+    """Lists the keys of a directory.
+
+    Args:
+        directory (str): The keys directory.
+
+    Returns:
+        A List[str], the kids sorted by the time they start signing.
+    """
+    kids = [name[:-len(".pem")] for name in os.listdir(directory) if name.endswith(".pem")]
+    return sorted(kids, key=key_not_before)
+
+
+def retired_kids(kids: List[str], retire_after: float) -> List[str]:
+    """Finds the keys no token signed with can still be valid.
+
+    Args:
+        kids (List[str]): All kids, sorted by the time they start signing.
+        retire_after (float): The longest token lifetime in seconds.
+
+    Returns:
+        A List[str], the kids of keys a newer key has been replacing for longer than retire_after.
+    """
+    cutoff = time() - retire_after
+    return [kid for index, kid in enumerate(kids) if any(key_not_before(other) <= cutoff for other in kids[index + 1:])]
+
+
+class SigningKey:
+    """A loaded key pair, the key objects are prepared by the JWT backend once."""
+    def __init__(self, kid: str, private_key: Any, public_key: Any, jwk: Dict[str, str]) -> None:
+        self.kid = kid
+        self.not_before = key_not_before(kid)
+        self.private_key = private_key
+        self.public_key = public_key
+        self.jwk = jwk
+
+
+class KeyRing:
+    """Keys that sign and verify the tokens, held in memory.
+
+    With an HS algorithm it holds only SECRET_KEY_JWT, tokens have no kid and nothing is published.
+    Otherwise it signs with the newest key whose time has come, verifies with the key named by
+    the kid of a token and publishes the public keys as a JWKS, including the keys not used yet.
+    The keys directory is reloaded every reload_seconds, so rotated keys need no restart.
+    """
+    def __init__(
+        self,
+        backend: Any,
+        algorithm: str,
+        secret: Optional[str],
+        directory: str,
+        retire_after: float,
+        reload_seconds: float,
+    ) -> None:
+        self.backend = backend
+        self.algorithm = algorithm
+        self.secret = secret
+        self.directory = directory
+        self.retire_after = retire_after
+        self.reload_seconds = reload_seconds
+        self.reloads = 0
+        self.unknown_kids = 0
+        self._keys: List[SigningKey] = []
+        self._by_kid: Dict[str, SigningKey] = {}
+        self._kids: Optional[List[str]] = None
+        self.jwks = b'{"keys":[]}'
+        self.jwks_etag = self._etag(self.jwks)
+        self._reloader: Optional[asyncio.Task] = None
+
+    @property
+    def symmetric(self) -> bool:
+        return is_symmetric(self.algorithm)
+
+    @staticmethod
+    def _etag(content: bytes) -> str:
+        return f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+
+    def signing_key(self) -> Tuple[Optional[str], Any]:
+        """Returns the key that signs new tokens.
+
+        Returns:
+            A Tuple[Optional[str], Any], the kid (None for an HS algorithm) and the key.
+
+        Raises:
+            RuntimeError: If no key may sign yet.
+        """
+        if self.symmetric:
+            return None, self.secret
+
+        now = time()
+        for key in reversed(self._keys):
+            if key.not_before <= now:
+                return key.kid, key.private_key
+        raise RuntimeError(f"No active signing key in {self.directory}, run python -m api.users.keys rotate")
+
+    def verification_key(self, kid: Optional[str]) -> Any:
+        """Returns the key that verifies a token.
+
+        Args:
+            kid (Optional[str]): The "kid" header of the token.
+
+        Returns:
+            A Any, the key.
+
+        Raises:
+            JWTError: If the kid names no loaded key.
+        """
+        if self.symmetric:
+            return self.secret
+
+        key = self._by_kid.get(kid) if isinstance(kid, str) else None
+        if key is None:
+            self.unknown_kids += 1
+            raise JWTError("Unknown signing key")
+        return key.public_key
+
+    def load(self) -> None:
+        """Loads the keys from the directory if its files changed, skipping retired keys.
+
+        Returns:
+            None
+        """
+        if self.symmetric:
+            return
+
+        kids = list_kids(self.directory)
+        if kids == self._kids:
+            return
+
+        retired = set(retired_kids(kids, self.retire_after))
+        keys = []
+        for kid in kids:
+            if kid in retired:
+                continue
+            with open(os.path.join(self.directory, f"{kid}.pem"), encoding="ascii") as file:
+                private_key = self.backend.prepare_key(file.read(), self.algorithm)
+            public_key = private_key.public_key()
+            jwk = {**self.backend.public_jwk(public_key, self.algorithm), "kid": kid, "alg": self.algorithm, "use": "sig"}
+            keys.append(SigningKey(kid, private_key, public_key, jwk))
+
+        self._keys = keys
+        self._by_kid = {key.kid: key for key in keys}
+        self._kids = kids
+        self.jwks = json.dumps({"keys": [key.jwk for key in keys]}, separators=(",", ":")).encode("utf-8")
+        self.jwks_etag = self._etag(self.jwks)
+        self.reloads += 1
+
+    async def start(self) -> None:
+        """Loads the keys and starts reloading them in the background.
+
+        Returns:
+            None
+        """
+        self.load()
+        if not self.symmetric:
+            self.signing_key()
+            self._reloader = asyncio.create_task(self._reload())
+
+    async def stop(self) -> None:
+        if self._reloader is not None:
+            self._reloader.cancel()
+            try:
+                await self._reloader
+            except asyncio.CancelledError:
+                pass
+        self._reloader = None
+
+    async def _reload(self) -> None:
+        while True:
+            await asyncio.sleep(self.reload_seconds)
+            try:
+                self.load()
+            except (OSError, ValueError):
+                # Keeps the loaded keys, e.g. while a key file is being written
+                pass
+
+    def stats(self) -> dict:
+        """Returns the loaded keys and counters.
+
+        Returns:
+            A dict, the algorithm, the kids, the signing kid, reloads and tokens with an unknown kid.
+        """
+        if self.symmetric:
+            return {"algorithm": self.algorithm}
+
+        try:
+            signing_kid, _ = self.signing_key()
+        except RuntimeError:
+            signing_kid = None
+        return {
+            "algorithm": self.algorithm,
+            "kids": [key.kid for key in self._keys],
+            "signing_kid": signing_kid,
+            "reloads": self.reloads,
+            "unknown_kids": self.unknown_kids,
+        }
+
+
+def rotate(directory: str, algorithm: str, rotation_days: float, activation_minutes: float, force: bool) -> List[str]:
+    """Adds a new key if the newest one is due and deletes the retired keys.
+
+    The first key signs at once, later keys after activation_minutes,
+    so services that cached the JWKS fetch the new key before they see a token signed with it.
+
+    Args:
+        directory (str): The keys directory.
+        algorithm (str): The signing algorithm.
+        rotation_days (float): The age of the newest key after which a new one is added.
+        activation_minutes (float): The delay before a new key signs.
+        force (bool): Add a key even if the newest one is not due.
+
+    Returns:
+        A List[str], what was done.
+    """
+    os.makedirs(directory, exist_ok=True)
+    kids = list_kids(directory)
+    now = int(time())
+    log = []
+
+    if force or not kids or key_not_before(kids[-1]) + rotation_days * 24 * 60 * 60 <= now:
+        not_before = now + int(activation_minutes * 60) if kids else now
+        kid = f"{not_before}-{secrets.token_hex(4)}"
+        path = os.path.join(directory, f"{kid}.pem")
+        # Written under another name first, workers only load complete .pem files
+        with open(f"{path}.tmp", "w", encoding="ascii") as file:
+            file.write(generate_private_key(algorithm))
+        os.chmod(f"{path}.tmp", 0o600)
+        os.replace(f"{path}.tmp", path)
+        kids.append(kid)
+        log.append(f"added {kid}, signs from {not_before}")
+
+    for kid in retired_kids(kids, RETIRE_AFTER_SECONDS):
+        os.remove(os.path.join(directory, f"{kid}.pem"))
+        log.append(f"deleted {kid}")
+    return log
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["rotate"])
+    parser.add_argument("--force", action="store_true", help="add a key even if the newest one is not due")
+    args = parser.parse_args()
+    if is_symmetric(ALGORITHM):
+        raise SystemExit(f"ALGORITHM is {ALGORITHM}, tokens are signed with SECRET_KEY_JWT")
+    log = rotate(JWT_KEYS_DIR, ALGORITHM, JWT_KEY_ROTATION_DAYS, JWT_KEY_ACTIVATION_MINUTES, args.force)
+    print("\n".join(log) if log else "nothing to do")
+
+
+if __name__ == "__main__":
+    main()
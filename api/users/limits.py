@@ -0,0 +1,47 @@
+from fastapi import Request
+from ..config import (
+    AUTH_RATE_WINDOW_SECONDS,
+    LOGIN_RATE_LIMIT_PER_IP,
+    LOGIN_RATE_LIMIT_PER_EMAIL,
+    FORGOT_PASSWORD_RATE_LIMIT_PER_IP,
+    FORGOT_PASSWORD_RATE_LIMIT_PER_EMAIL,
+    INTROSPECT_RATE_LIMIT_PER_IP,
+    INTROSPECT_RATE_LIMIT_PER_CLIENT,
+)
+from ..limiter import SlidingWindowLimiter
+
+
+login_limiter = SlidingWindowLimiter(
+    name="login",
+    window=AUTH_RATE_WINDOW_SECONDS,
+    limits={"ip": LOGIN_RATE_LIMIT_PER_IP, "email": LOGIN_RATE_LIMIT_PER_EMAIL},
+)
+"""Login attempts, checked before the user lookup and the password verification."""
+
+forgot_password_limiter = SlidingWindowLimiter(
+    name="forgot_password",
+    window=AUTH_RATE_WINDOW_SECONDS,
+    limits={"ip": FORGOT_PASSWORD_RATE_LIMIT_PER_IP, "email": FORGOT_PASSWORD_RATE_LIMIT_PER_EMAIL},
+)
+"""Password recovery requests, checked before the user lookup and the email."""
+
+introspect_limiter = SlidingWindowLimiter(
+    name="introspect",
+    window=AUTH_RATE_WINDOW_SECONDS,
+    limits={"ip": INTROSPECT_RATE_LIMIT_PER_IP, "client": INTROSPECT_RATE_LIMIT_PER_CLIENT},
+)
+"""Introspection requests, checked before the client credentials so guessing them is throttled too."""
+
+
+def client_ip(request: Request) -> str:
+    """Returns the IP the limits are keyed by.
+
+    Behind a proxy run uvicorn with --proxy-headers and --forwarded-allow-ips, so this is the client and not the proxy.
+
+    Args:
+        request (Request): The HTTP request.
+
+    Returns:
+        A str, the client IP.
+    """
+    return request.client.host if request.client else "unknown"
@@ -20,18 +20,30 @@ class UserErrorCode:
         BAD_CREDENTIALS: Bad credentials.
         USER_NOT_ACTIVE: User is not active.
         INVALID_TOKEN: Invalid token.
+        TOKEN_REVOKED: The token was revoked.
+        INVALID_CLIENT: Unknown client or wrong client secret.
         ENDPOINT_NOT_FOUND: Endpoint not found.
         NO_ACCESS_RIGHTS: No required access rights.
         DATA_OUT_OF_DATE: The data is out of date.
         EMAIL_ALREADY_EXISTS: Email is already taken.
+        HASHING_OVERLOADED: Too many password checks in progress.
+        TOO_MANY_REQUESTS: Too many attempts from the IP or for the email.
+        SERVICE_OVERLOADED: Too many requests of the endpoint group in progress.
+        TOKENS_UNAVAILABLE: The refresh token families can't be read or changed.
     """
     BAD_CREDENTIALS = "BAD_CREDENTIALS"
     USER_NOT_ACTIVE = "USER_NOT_ACTIVE"
     INVALID_TOKEN = "INVALID_TOKEN"
+    TOKEN_REVOKED = "TOKEN_REVOKED"
+    INVALID_CLIENT = "INVALID_CLIENT"
     ENDPOINT_NOT_FOUND = "ENDPOINT_NOT_FOUND"
     NO_ACCESS_RIGHTS = "NO_ACCESS_RIGHTS"
     DATA_OUT_OF_DATE = "DATA_OUT_OF_DATE"
     EMAIL_ALREADY_EXISTS = "EMAIL_ALREADY_EXISTS"
+    HASHING_OVERLOADED = "HASHING_OVERLOADED"
+    TOO_MANY_REQUESTS = "TOO_MANY_REQUESTS"
+    SERVICE_OVERLOADED = "SERVICE_OVERLOADED"
+    TOKENS_UNAVAILABLE = "TOKENS_UNAVAILABLE"
 
 
 class HTTTPError:
@@ -41,12 +53,18 @@ class HTTTPError:
         BAD_CREDENTIALS_400: Bad credentials.
         BAD_CREDENTIALS_401: Could not validate credentials.
         INVALID_TOKEN_401: Invalid token.
+        TOKEN_REVOKED_401: The token was revoked by logout or a reused refresh token.
+        INVALID_CLIENT_401: The client credentials of a gateway are missing or wrong.
         BAD_CREDENTIALS_403: Access token expires but refresh exists.
         NO_ACCESS_RIGHTS_403: No required access rights.
         USER_NOT_ACTIVE_403: User is not active.
         DATA_OUT_OF_DATE_403: User data is out of date, please re-login.
         EMAIL_ALREADY_EXISTS_409: Email is already taken.
         ENDPOINT_NOT_FOUND_500: Endpoint not found.
+        HASHING_OVERLOADED_503: Too many password checks in progress, retry later.
+        TOO_MANY_REQUESTS_429: Too many attempts, retry after the Retry-After seconds.
+        SERVICE_OVERLOADED_503: The bulkhead of the endpoint is full, retry later.
+        TOKENS_UNAVAILABLE_503: Redis, which keeps the refresh token families, can't be reached, retry later.
     """
     BAD_CREDENTIALS_400 = HTTPException(
         status_code=status.HTTP_400_BAD_REQUEST,
@@ -72,6 +90,23 @@ class HTTTPError:
         ).model_dump(),
     )
 
+    TOKEN_REVOKED_401 = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=ErrorDetail(
+            code=UserErrorCode.TOKEN_REVOKED,
+            reason="Token was revoked, please re-login"
+        ).model_dump(),
+    )
+
+    INVALID_CLIENT_401 = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=ErrorDetail(
+            code=UserErrorCode.INVALID_CLIENT,
+            reason="Invalid client credentials"
+        ).model_dump(),
+        headers={"WWW-Authenticate": "Basic"},
+    )
+
     BAD_CREDENTIALS_403 = HTTPException(
         status_code=status.HTTP_403_FORBIDDEN,
         detail=ErrorDetail(
@@ -118,4 +153,39 @@ class HTTTPError:
             code=UserErrorCode.ENDPOINT_NOT_FOUND,
             reason="Endpoint not found"
         ).model_dump(),
-    )
\ No newline at end of file
+    )
+
+    HASHING_OVERLOADED_503 = HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=ErrorDetail(
+            code=UserErrorCode.HASHING_OVERLOADED,
+            reason="Too many password checks in progress, retry later"
+        ).model_dump(),
+        headers={"Retry-After": "1"},
+    )
+
+    TOO_MANY_REQUESTS_429 = HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=ErrorDetail(
+            code=UserErrorCode.TOO_MANY_REQUESTS,
+            reason="Too many attempts, retry later"
+        ).model_dump(),
+    )
+
+    SERVICE_OVERLOADED_503 = HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=ErrorDetail(
+            code=UserErrorCode.SERVICE_OVERLOADED,
+            reason="Too many requests in progress, retry later"
+        ).model_dump(),
+        headers={"Retry-After": "1"},
+    )
+
+    TOKENS_UNAVAILABLE_503 = HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=ErrorDetail(
+            code=UserErrorCode.TOKENS_UNAVAILABLE,
+            reason="Tokens can't be issued or revoked right now, retry later"
+        ).model_dump(),
+        headers={"Retry-After": "5"},
+    )
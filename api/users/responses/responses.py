@@ -7,6 +7,7 @@ base_auth_responses = {
     status.HTTP_401_UNAUTHORIZED: convert_to_example([
         HTTTPError.BAD_CREDENTIALS_401,
         HTTTPError.INVALID_TOKEN_401,
+        HTTTPError.TOKEN_REVOKED_401,
     ]),
     status.HTTP_403_FORBIDDEN: convert_to_example([
         HTTTPError.BAD_CREDENTIALS_403,
@@ -27,27 +28,48 @@ class UsersResponse:
         register_post: Responses for register
         login_post: Responses for login
         refresh_post: Responses for refresh token
+        logout_post: Responses for logout
     """
     register_post = {
         status.HTTP_409_CONFLICT: convert_to_example([
             HTTTPError.EMAIL_ALREADY_EXISTS_409,
         ]),
+        status.HTTP_503_SERVICE_UNAVAILABLE: convert_to_example([
+            HTTTPError.HASHING_OVERLOADED_503,
+        ]),
     }
 
     login_post = {
         status.HTTP_400_BAD_REQUEST: convert_to_example([
             HTTTPError.BAD_CREDENTIALS_400,
         ]),
+        status.HTTP_429_TOO_MANY_REQUESTS: convert_to_example([
+            HTTTPError.TOO_MANY_REQUESTS_429,
+        ]),
+        status.HTTP_503_SERVICE_UNAVAILABLE: convert_to_example([
+            HTTTPError.HASHING_OVERLOADED_503,
+            HTTTPError.TOKENS_UNAVAILABLE_503,
+        ]),
     }
 
     refresh_post = {
         status.HTTP_401_UNAUTHORIZED: convert_to_example([
             HTTTPError.BAD_CREDENTIALS_401,
             HTTTPError.INVALID_TOKEN_401,
+            HTTTPError.TOKEN_REVOKED_401,
         ]),
         status.HTTP_403_FORBIDDEN: convert_to_example([
             HTTTPError.BAD_CREDENTIALS_403,
             HTTTPError.DATA_OUT_OF_DATE_403,
             HTTTPError.USER_NOT_ACTIVE_403,
-        ])
+        ]),
+        status.HTTP_503_SERVICE_UNAVAILABLE: convert_to_example([
+            HTTTPError.TOKENS_UNAVAILABLE_503,
+        ]),
+    }
+
+    logout_post = {
+        status.HTTP_503_SERVICE_UNAVAILABLE: convert_to_example([
+            HTTTPError.TOKENS_UNAVAILABLE_503,
+        ]),
     }
\ No newline at end of file
@@ -0,0 +1,214 @@
+import asyncio
+from time import time
+from typing import Dict, Optional
+from redis.asyncio.client import PubSub
+from redis.exceptions import RedisError
+from ..config import REFRESH_TOKEN_EXPIRE_DAYS
+from ..res_passwd.redis import RedisDB
+from .responses.http_errors import HTTTPError
+
+
+class TokenRevocation:
+    """Refresh token families in Redis and the revoked families replicated into every worker.
+
+    A family starts at login, its refresh token is rotated on every refresh: Redis keeps the jti
+    of the only refresh token of the family that may still be used. Presenting any other one
+    (a stolen token reused after rotation) revokes the whole family.
+
+    A revoked family is published to every worker, which keeps it in memory for the lifetime
+    of a refresh token, the longest-lived token of a family: checking any token of the family
+    costs no network call, and none of them is accepted again once the entry expires.
+    """
+    key = "tokens:revoked"
+    channel = "tokens:revoked"
+
+    def __init__(self, refresh_ttl: int) -> None:
+        self.refresh_ttl = refresh_ttl
+        self.rotations = 0
+        self.failed_rotations = 0
+        self.revocations = 0
+        self.redis_errors = 0
+        self._revoked: Dict[str, float] = {}
+        self._prune_at = 1024
+        self._redis: Optional[RedisDB] = None
+        self._listener: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _family_key(family: str) -> str:
+        return f"tokens:family:{family}"
+
+    def is_revoked(self, family: str) -> bool:
+        """Checks the in-memory revocation list, no network call.
+
+        Args:
+            family (str): The "fam" claim of a token.
+
+        Returns:
+            A bool, True if the family was revoked.
+        """
+        expires_at = self._revoked.get(family)
+        return expires_at is not None and expires_at > time()
+
+    async def start_family(self, family: str, jti: str) -> None:
+        """Registers the first refresh token of a new family.
+
+        Args:
+            family (str): The family ID.
+            jti (str): The "jti" claim of the refresh token.
+
+        Returns:
+            None
+
+        Raises:
+            HTTTPError.TOKENS_UNAVAILABLE_503: If Redis can't be reached.
+        """
+        try:
+            await self._redis.set_value(self._family_key(family), jti, self.refresh_ttl)
+        except RedisError:
+            self.redis_errors += 1
+            raise HTTTPError.TOKENS_UNAVAILABLE_503
+
+    async def rotate(self, family: str, jti: str, new_jti: str) -> bool:
+        """Replaces the refresh token of a family, revokes the family if the token is not its current one.
+
+        Args:
+            family (str): The family ID.
+            jti (str): The "jti" claim of the presented refresh token.
+            new_jti (str): The "jti" claim of the refresh token replacing it.
+
+        Returns:
+            A bool, True if rotated, False if the family was revoked, expired or the token was reused.
+
+        Raises:
+            HTTTPError.TOKENS_UNAVAILABLE_503: If Redis can't be reached.
+        """
+        try:
+            rotated = await self._redis.compare_and_set(self._family_key(family), jti, new_jti, self.refresh_ttl)
+        except RedisError:
+            self.redis_errors += 1
+            raise HTTTPError.TOKENS_UNAVAILABLE_503
+        if rotated:
+            self.rotations += 1
+            return True
+
+        self.failed_rotations += 1
+        await self.revoke(family)
+        return False
+
+    async def revoke(self, family: str) -> None:
+        """Revokes every token of a family in all workers.
+
+        The family is revoked in this worker even if Redis can't be reached, the caller is told
+        to retry so the other workers learn it too.
+
+        Args:
+            family (str): The family ID.
+
+        Returns:
+            None
+
+        Raises:
+            HTTTPError.TOKENS_UNAVAILABLE_503: If Redis can't be reached.
+        """
+        expires_at = time() + self.refresh_ttl
+        self._add(family, expires_at)
+        self.revocations += 1
+        try:
+            await self._redis.delete_value(self._family_key(family))
+            await self._redis.add_scored(self.key, family, expires_at)
+            await self._redis.trim_scored(self.key, time())
+            await self._redis.publish(self.channel, f"{family} {expires_at}")
+        except RedisError:
+            self.redis_errors += 1
+            raise HTTTPError.TOKENS_UNAVAILABLE_503
+
+    def _add(self, family: str, expires_at: float) -> None:
+        self._revoked[family] = expires_at
+        if len(self._revoked) >= self._prune_at:
+            now = time()
+            self._revoked = {key: value for key, value in self._revoked.items() if value > now}
+            self._prune_at = max(1024, 2 * len(self._revoked))
+
+    async def start(self, redis_db: RedisDB) -> None:
+        """Connects to Redis, loads the revoked families and starts replicating the revocations of other workers.
+
+        The revoked families are loaded before it returns, so no token of a revoked family is accepted
+        by a worker that just started.
+
+        Args:
+            redis_db (RedisDB): The application Redis.
+
+        Returns:
+            None
+
+        Raises:
+            RedisError: If Redis can't be reached.
+        """
+        self._redis = redis_db
+        pubsub = await self._subscribe()
+        self._listener = asyncio.create_task(self._listen(pubsub))
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        self._listener = None
+        self._redis = None
+        self._revoked = {}
+
+    async def _subscribe(self) -> PubSub:
+        # Subscribed first, so a revocation published while the list is read is not missed
+        pubsub = self._redis.pubsub()
+        try:
+            await pubsub.subscribe(self.channel)
+            for family, expires_at in await self._redis.get_scored(self.key):
+                self._add(family, expires_at)
+        except RedisError:
+            await pubsub.reset()
+            raise
+        return pubsub
+
+    async def _listen(self, pubsub: PubSub) -> None:
+        while True:
+            try:
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        family, expires_at = message["data"].decode("utf-8").split(" ")
+                        self._add(family, float(expires_at))
+            except RedisError:
+                self.redis_errors += 1
+            finally:
+                await pubsub.reset()
+            pubsub = await self._resubscribe()
+
+    async def _resubscribe(self) -> PubSub:
+        # Revocations may have been missed while disconnected, _subscribe loads them again
+        while True:
+            await asyncio.sleep(1)
+            try:
+                return await self._subscribe()
+            except RedisError:
+                self.redis_errors += 1
+
+    def stats(self) -> dict:
+        """Returns rotation and revocation counters.
+
+        Returns:
+            A dict, counters of this worker and the size of its revocation list.
+        """
+        return {
+            "revoked": len(self._revoked),
+            "rotations": self.rotations,
+            "failed_rotations": self.failed_rotations,
+            "revocations": self.revocations,
+            "redis_errors": self.redis_errors,
+        }
+
+
+token_revocation = TokenRevocation(
+    refresh_ttl=REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60,
+)
+"""Refresh token families and revoked families, started in the application lifespan."""
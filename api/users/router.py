@@ -1,3 +1,4 @@
+from time import time
 from fastapi import (
     APIRouter,
     Depends,
@@ -5,15 +6,30 @@ from fastapi import (
     Request,
     Response,
 )
-from .auth import get_password_hash, create_access_token, create_refresh_token
-from .dependencies import get_current_user, refresh_access_token
+from .auth import create_access_token, create_refresh_token, new_token_id
+from .dependencies import (
+    get_current_user,
+    get_introspection_client,
+    refresh_access_token,
+    revoke_refresh_token,
+    introspect_tokens,
+)
+from .hashing import password_hasher
+from .limits import login_limiter, client_ip
 from .responses.http_errors import HTTTPError
 from .responses.responses import base_auth_responses, UsersResponse
-from .schemas import UserCreate, UserRead, Token, UserInfo
+from .schemas import UserCreate, UserRead, Token, UserInfo, IntrospectRequest, IntrospectResponse
+from .revocation import token_revocation
 from .service import UserRepository
+from .tokens import key_ring
+from ..bulkhead import auth_bulkhead
+from ..config import JWKS_MAX_AGE_SECONDS, INTROSPECT_CACHE_MAX_AGE_SECONDS
+from ..serialization import RawJSONResponse, json_response
+
 
+router = APIRouter(prefix="/auth", tags=["Auth 🙎🏻‍♂️"], dependencies=[Depends(auth_bulkhead.enter)])
 
-router = APIRouter(prefix="/auth", tags=["Auth 🙎🏻‍♂️"])
+jwks_router = APIRouter(tags=["Auth 🙎🏻‍♂️"])
 
 
 @router.post(
@@ -25,7 +41,7 @@ router = APIRouter(prefix="/auth", tags=["Auth 🙎🏻‍♂️"])
     responses=UsersResponse.register_post,
 )
 async def register_user(user_data: UserCreate):
-    user_data.password = get_password_hash(user_data.password)
+    user_data.password = await password_hasher.hash(user_data.password)
     await UserRepository.add_user(user_data)
     return Response(status_code=status.HTTP_201_CREATED)
 
@@ -39,13 +55,17 @@ async def register_user(user_data: UserCreate):
     response_model=Token,
     responses=UsersResponse.login_post,
 )
-async def auth_user(response: Response, user_data: UserRead):
+async def auth_user(request: Request, response: Response, user_data: UserRead):
+    await login_limiter.check(request.app.redis, ip=client_ip(request), email=str(user_data.email).lower())
+
     check = await UserRepository.authenticate_user(email=user_data.email, password=user_data.password)
     if check is None:
         raise HTTTPError.BAD_CREDENTIALS_400
 
-    access_token = create_access_token(data={"sub": str(check.id)})
-    create_refresh_token(response=response, data={"sub": str(check.id)})
+    family, refresh_jti = new_token_id(), new_token_id()
+    await token_revocation.start_family(family, refresh_jti)
+    access_token = create_access_token(data={"sub": str(check.id), "role": check.role_id, "fam": family})
+    create_refresh_token(response=response, data={"sub": str(check.id), "fam": family, "jti": refresh_jti})
 
     return Token(access_token=access_token, token_type="Bearer")
 
@@ -59,12 +79,12 @@ async def auth_user(response: Response, user_data: UserRead):
     response_model=Token,
     responses=UsersResponse.refresh_post,
 )
-async def refresh_token_endpoint(request: Request):
+async def refresh_token_endpoint(request: Request, response: Response):
     refresh_token = request.cookies.get("refresh_token")
     if not refresh_token:
         raise HTTTPError.BAD_CREDENTIALS_401
 
-    access_token = await refresh_access_token(refresh_token=refresh_token)
+    access_token = await refresh_access_token(refresh_token=refresh_token, response=response)
     return Token(access_token=access_token, token_type="Bearer")
 
 
@@ -74,8 +94,13 @@ async def refresh_token_endpoint(request: Request):
     description="Logout account",
     response_description="HTTP 204 STATUS",
     status_code=status.HTTP_204_NO_CONTENT,
+    responses=UsersResponse.logout_post,
 )
-async def logout_user(response: Response):
+async def logout_user(request: Request, response: Response):
+    refresh_token = request.cookies.get("refresh_token")
+    if refresh_token:
+        await revoke_refresh_token(refresh_token)
+
     response.delete_cookie(
         key="refresh_token",
         secure=False,
@@ -96,3 +121,45 @@ async def logout_user(response: Response):
 )
 async def get_me(user_data: UserInfo = Depends(get_current_user)):
     return user_data
+
+
+@router.post(
+    path="/introspect",
+    summary="Check several tokens",
+    description="Whether each token is active and its claims, for gateways checking many tokens in one call. "
+                "Gateways authenticate with their client ID and secret (HTTP Basic)",
+    response_description="The state of every token in the order of the request, "
+                         "Cache-Control max-age until the first of them expires",
+    status_code=status.HTTP_200_OK,
+    response_model=IntrospectResponse,
+    dependencies=[Depends(get_introspection_client)],
+)
+async def introspect(data: IntrospectRequest):
+    results = await introspect_tokens(data.tokens)
+
+    # Capped, a revoked or deactivated token stays active in the caller's cache until max-age
+    max_age = INTROSPECT_CACHE_MAX_AGE_SECONDS
+    now = time()
+    for result in results:
+        if result.active and result.exp is not None:
+            max_age = min(max_age, max(0, int(result.exp - now)))
+    return json_response(
+        IntrospectResponse,
+        IntrospectResponse(results=results),
+        headers={"Cache-Control": f"private, max-age={max_age}"},
+    )
+
+
+@jwks_router.get(
+    path="/.well-known/jwks.json",
+    summary="Public keys of the tokens",
+    description="JSON Web Key Set to verify access tokens without calling this service, "
+                "empty when tokens are signed with a shared secret (HS256)",
+    response_description="JWKS, including the keys that will sign soon",
+    status_code=status.HTTP_200_OK,
+)
+async def get_jwks(request: Request):
+    headers = {"Cache-Control": f"public, max-age={JWKS_MAX_AGE_SECONDS}", "ETag": key_ring.jwks_etag}
+    if request.headers.get("if-none-match") == key_ring.jwks_etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return RawJSONResponse(content=key_ring.jwks, headers=headers)
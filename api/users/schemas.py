@@ -1,4 +1,6 @@
+from typing import List, Optional
 from pydantic import BaseModel, EmailStr, Field
+from ..config import INTROSPECT_MAX_TOKENS
 
 class UserCreate(BaseModel):
     email: EmailStr = Field(description="Электронная почта")
@@ -64,6 +66,19 @@ class UserInfo(BaseModel):
     }
 
 
+class Principal(BaseModel):
+    """The authenticated user as seen by the authorization checks.
+
+        Attributes:
+            id: User ID.
+            is_active: Whether the user may sign in.
+            role_id: User role ID.
+    """
+    id: int
+    is_active: bool
+    role_id: int
+
+
 class Token(BaseModel):
     """An Access token that returns to user.
 
@@ -72,4 +87,53 @@ class Token(BaseModel):
             token_type: Token type (Bearer).
     """
     access_token: str
-    token_type: str
\ No newline at end of file
+    token_type: str
+
+class IntrospectRequest(BaseModel):
+    tokens: List[str] = Field(
+        min_length=1,
+        max_length=INTROSPECT_MAX_TOKENS,
+        description=f"Токены доступа или обновления, от 1 до {INTROSPECT_MAX_TOKENS}",
+    )
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "tokens": ["eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9..."],
+                }
+            ]
+        }
+    }
+
+
+class TokenIntrospection(BaseModel):
+    """The state of one token, claims are set only for an active token.
+
+        Attributes:
+            active: Whether the token is valid and its user may use it.
+            reason: Error code why the token is not active.
+            token_type: "access" or "refresh".
+            sub: User ID.
+            role: Role ID the access token was issued for.
+            exp: Expiration time, unix seconds.
+            jti: Token ID.
+            fam: Refresh token family.
+    """
+    active: bool
+    reason: Optional[str] = None
+    token_type: Optional[str] = None
+    sub: Optional[str] = None
+    role: Optional[int] = None
+    exp: Optional[int] = None
+    jti: Optional[str] = None
+    fam: Optional[str] = None
+
+
+class IntrospectResponse(BaseModel):
+    """Results of introspection.
+
+        Attributes:
+            results: The state of every token, in the order of the request.
+    """
+    results: List[TokenIntrospection]
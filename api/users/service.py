@@ -1,37 +1,63 @@
 from pydantic import EmailStr
-from sqlalchemy import select
+from sqlalchemy import select, update, any_, bindparam, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.exc import IntegrityError
-from .auth import verify_password
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional
+from .cache import principal_cache
 from .database import UsersOrm
+from .hashing import password_hasher
 from .responses.http_errors import HTTTPError
-from .schemas import UserCreate
-from ..database import new_session
+from .schemas import UserCreate, UserInfo, Principal
+from ..database import new_session, use_session, commit
+from ..serialization import validate_row
+
+
+USER_INFO_COLUMNS = tuple(getattr(UsersOrm, name) for name in UserInfo.model_fields)
+"""Columns of UserInfo, selected as Core rows instead of ORM instances."""
+
+# Hot statements are built once: SQLAlchemy memoizes their cache key, the compiled SQL comes from
+# the engine's cache and asyncpg keeps them prepared on every connection
+USER_BY_EMAIL = select(UsersOrm).where(UsersOrm.email == bindparam("email"))
+USER_BY_ID = select(*USER_INFO_COLUMNS).where(UsersOrm.id == bindparam("id_user"))
+PRINCIPAL_BY_ID = select(UsersOrm.id, UsersOrm.is_active, UsersOrm.role_id).where(UsersOrm.id == bindparam("id_user"))
+# One parameter whatever the number of IDs, so the statement stays the same for every batch
+PRINCIPALS_BY_IDS = select(UsersOrm.id, UsersOrm.is_active, UsersOrm.role_id).where(
+    UsersOrm.id == any_(bindparam("ids", type_=ARRAY(Integer)))
+)
+UPDATE_PASSWORD_HASH = (
+    update(UsersOrm)
+    .where(UsersOrm.id == bindparam("id_user"), UsersOrm.password == bindparam("old_hash"))
+    .values(password=bindparam("new_hash"))
+)
 
 
 class UserRepository:
     @classmethod
-    async def find_one_or_none(cls, email: str):
+    async def find_one_or_none(cls, email: str, session: Optional[AsyncSession] = None):
         """Finds a user by email.
 
         Args:
             email: The email of the user to find.
+            session (Optional[AsyncSession]): The session of the request, a session of its own if None.
 
         Returns:
             A Optional[UsersOrm], the user object if found, otherwise None.
         """
-        async with new_session() as session:
-            result = await session.execute(select(UsersOrm).where(UsersOrm.email == email))
+        async with use_session(session) as session:
+            result = await session.execute(USER_BY_EMAIL, {"email": email})
             user = result.scalar_one_or_none()
             return user
 
     @classmethod
-    async def add_user(cls, data: UserCreate) -> int:
+    async def add_user(cls, data: UserCreate, session: Optional[AsyncSession] = None) -> int:
         """Adds a new user to the database.
 
         This method adds a new user to the database and returns the ID of the created user.
 
         Args:
             data: The data for the new user.
+            session (Optional[AsyncSession]): The session of the request, a session of its own if None.
 
         Returns:
             A int, the ID of the newly created user.
@@ -39,13 +65,13 @@ class UserRepository:
         Raises:
             HTTTPError.EMAIL_ALREADY_EXISTS_409: If a user with the same email already exists.
         """
-        async with new_session() as session:
+        async with use_session(session) as session:
             try:
                 user_dict = data.model_dump()
                 user = UsersOrm(**user_dict)
                 session.add(user)
                 await session.flush()
-                await session.commit()
+                await commit(session)
                 return user.id
             except IntegrityError:
                 await session.rollback()
@@ -55,30 +81,87 @@ class UserRepository:
     async def authenticate_user(cls, email: EmailStr, password: str):
         """Authenticates a user by email and password.
 
+        A password hashed with an outdated scheme or cost is rehashed and stored on success.
+        It does not take the session of the request, its connection would be held for the whole hash.
+
         Args:
             email: The email of the user to authenticate.
             password: The password of the user to authenticate.
 
         Returns:
             A Optional[UsersOrm], the user object if authentication is successful, otherwise None.
+
+        Raises:
+            HTTTPError.HASHING_OVERLOADED_503: If too many passwords are being checked.
         """
         user = await cls.find_one_or_none(email)
-        if not user or verify_password(default_password=password, hashed_password=user.password) is False:
+        if not user:
             return None
+
+        verified, new_hash = await password_hasher.verify_and_update(password, user.password)
+        if not verified:
+            return None
+        if new_hash is not None:
+            await cls._update_password_hash(user.id, user.password, new_hash)
+            user.password = new_hash
         return user
 
     @classmethod
-    async def find_one_or_none_by_id(cls, id_user: int):
-        """Finds a user by ID.
+    async def _update_password_hash(cls, id_user: int, old_hash: str, new_hash: str) -> None:
+        # Only replaces the verified hash, a password reset in the meantime wins
+        async with new_session() as session:
+            await session.execute(UPDATE_PASSWORD_HASH, {"id_user": id_user, "old_hash": old_hash, "new_hash": new_hash})
+            await session.commit()
+
+    @classmethod
+    async def find_one_or_none_by_id(cls, id_user: int, session: Optional[AsyncSession] = None):
+        """Finds the profile of a user by ID, only the columns of UserInfo.
 
         Args:
             id_user (int): The ID of the user to find.
+            session (Optional[AsyncSession]): The session of the request, a session of its own if None.
 
         Returns:
-            A Optional[UsersOrm], the user object if found, otherwise None.
+            A Optional[Row], the UserInfo columns of the user if found, otherwise None.
+        """
+        async with use_session(session, read_only=True) as session:
+            result = await session.execute(USER_BY_ID, {"id_user": id_user})
+            return result.one_or_none()
+
+    @classmethod
+    async def get_principal(cls, id_user: int, session: Optional[AsyncSession] = None) -> Optional[Principal]:
+        """Finds the authorization data of a user by ID, cached in principal_cache.
+
+        Args:
+            id_user (int): The ID of the user to find.
+            session (Optional[AsyncSession]): The session of the request for a cache miss, a session of its own if None.
+
+        Returns:
+            A Optional[Principal], the principal if the user exists, otherwise None.
         """
+        return await principal_cache.get_or_load(id_user, lambda: cls._db_get_principal(id_user, session))
+
+    @classmethod
+    async def _db_get_principal(cls, id_user: int, session: Optional[AsyncSession] = None) -> Optional[Principal]:
+        async with use_session(session) as session:
+            result = await session.execute(PRINCIPAL_BY_ID, {"id_user": id_user})
+            row = result.one_or_none()
+            return validate_row(Principal, row) if row is not None else None
+
+    @classmethod
+    async def get_principals(cls, ids: List[int]) -> Dict[int, Principal]:
+        """Finds the authorization data of several users, the ones not cached in this worker with one query.
+
+        Args:
+            ids (List[int]): The IDs of the users to find.
+
+        Returns:
+            A Dict[int, Principal], the principals by user ID, missing users are skipped.
+        """
+        return await principal_cache.get_many_or_load(ids, cls._db_get_principals)
+
+    @classmethod
+    async def _db_get_principals(cls, ids: List[int]) -> Dict[int, Principal]:
         async with new_session() as session:
-            user = await session.get(UsersOrm, id_user)
-            if user:
-                return user
-            return None
+            result = await session.execute(PRINCIPALS_BY_IDS, {"ids": ids})
+            return {row.id: validate_row(Principal, row) for row in result.all()}
@@ -0,0 +1,176 @@
+import hashlib
+from abc import ABC, abstractmethod
+from time import time
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Type
+from jose import jwk as jose_jwk, jwt as jose_jwt, JWTError, ExpiredSignatureError
+from .keys import KeyRing, RETIRE_AFTER_SECONDS
+from ..cache import TTLCache
+from ..config import SECRET_KEY_JWT, ALGORITHM, JWT_BACKEND, TOKEN_CACHE_SIZE, JWT_KEYS_DIR, JWT_KEYS_RELOAD_SECONDS
+
+
+class JWTBackend(ABC):
+    """Encodes and decodes JWTs.
+
+    Whatever library is behind it, decode raises jose.ExpiredSignatureError for an expired token
+    and jose.JWTError for any other invalid token, so callers don't depend on the backend.
+    Keys are a secret str for the HS algorithms, otherwise key objects made by prepare_key.
+    """
+    name = ""
+
+    @abstractmethod
+    def encode(self, claims: Dict[str, Any], key: Any, algorithm: str, headers: Optional[Dict[str, Any]] = None) -> str:
+        ...
+
+    @abstractmethod
+    def decode(self, token: str, key: Any, algorithms: List[str]) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def get_unverified_header(self, token: str) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def prepare_key(self, pem: str, algorithm: str) -> Any:
+        """Parses a PEM private key once, its public_key() method returns the verification key."""
+
+    @abstractmethod
+    def public_jwk(self, public_key: Any, algorithm: str) -> Dict[str, str]:
+        ...
+
+
+class JoseBackend(JWTBackend):
+    """python-jose, the default backend. Supports RS256, not EdDSA."""
+    name = "jose"
+
+    def encode(self, claims: Dict[str, Any], key: Any, algorithm: str, headers: Optional[Dict[str, Any]] = None) -> str:
+        return jose_jwt.encode(claims, key, algorithm=algorithm, headers=headers)
+
+    def decode(self, token: str, key: Any, algorithms: List[str]) -> Dict[str, Any]:
+        return jose_jwt.decode(token, key, algorithms=algorithms)
+
+    def get_unverified_header(self, token: str) -> Dict[str, Any]:
+        return jose_jwt.get_unverified_header(token)
+
+    def prepare_key(self, pem: str, algorithm: str) -> Any:
+        return jose_jwk.construct(pem, algorithm)
+
+    def public_jwk(self, public_key: Any, algorithm: str) -> Dict[str, str]:
+        return public_key.to_dict()
+
+
+class PyJWTBackend(JWTBackend):
+    """PyJWT, an alternative to python-jose. Optional: pip install PyJWT, RS256 and EdDSA need cryptography."""
+    name = "pyjwt"
+
+    def __init__(self) -> None:
+        import jwt
+        self._jwt = jwt
+
+    def encode(self, claims: Dict[str, Any], key: Any, algorithm: str, headers: Optional[Dict[str, Any]] = None) -> str:
+        return self._jwt.encode(claims, key, algorithm=algorithm, headers=headers)
+
+    def decode(self, token: str, key: Any, algorithms: List[str]) -> Dict[str, Any]:
+        try:
+            return self._jwt.decode(token, key, algorithms=algorithms)
+        except self._jwt.ExpiredSignatureError as error:
+            raise ExpiredSignatureError(str(error)) from error
+        except self._jwt.InvalidTokenError as error:
+            raise JWTError(str(error)) from error
+
+    def get_unverified_header(self, token: str) -> Dict[str, Any]:
+        try:
+            return self._jwt.get_unverified_header(token)
+        except self._jwt.InvalidTokenError as error:
+            raise JWTError(str(error)) from error
+
+    def _algorithm(self, algorithm: str):
+        algorithms = self._jwt.algorithms.get_default_algorithms()
+        if algorithm not in algorithms:
+            raise ValueError(f"PyJWT does not support {algorithm}, it may need the cryptography package")
+        return algorithms[algorithm]
+
+    def prepare_key(self, pem: str, algorithm: str) -> Any:
+        return self._algorithm(algorithm).prepare_key(pem)
+
+    def public_jwk(self, public_key: Any, algorithm: str) -> Dict[str, str]:
+        return self._algorithm(algorithm).to_jwk(public_key, as_dict=True)
+
+
+JWT_BACKENDS: Dict[str, Type[JWTBackend]] = {
+    JoseBackend.name: JoseBackend,
+    PyJWTBackend.name: PyJWTBackend,
+}
+"""Backends by the JWT_BACKEND setting."""
+
+
+class TokenVerifier:
+    """Decodes JWTs and remembers the verified claims of a token until the token expires.
+
+    Entries are keyed by a SHA-256 digest of the token, so the tokens themselves are not kept.
+    Only successfully verified tokens with an "exp" claim are remembered.
+    The key is taken from the key ring by the "kid" header of the token.
+    """
+    def __init__(self, backend: JWTBackend, keys: KeyRing, maxsize: int) -> None:
+        self.backend = backend
+        self.keys = keys
+        self.algorithms = [keys.algorithm]
+        self.cache = TTLCache(maxsize=maxsize, ttl=0)
+
+    def decode(self, token: str) -> Mapping[str, Any]:
+        """Verifies a token and returns its claims.
+
+        Args:
+            token (str): The encoded JWT.
+
+        Returns:
+            A Mapping[str, Any], the read-only claims, shared between the requests with this token.
+
+        Raises:
+            ExpiredSignatureError: If the token has expired.
+            JWTError: If the token is invalid.
+        """
+        digest = hashlib.sha256(token.encode("utf-8")).digest()
+        claims = self.cache.get(digest)
+        if claims is not None:
+            return claims
+
+        kid = None if self.keys.symmetric else self.backend.get_unverified_header(token).get("kid")
+        claims = MappingProxyType(self.backend.decode(token, self.keys.verification_key(kid), self.algorithms))
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)) and exp > time():
+            self.cache.set(digest, claims, ttl=exp - time())
+        return claims
+
+    def stats(self) -> dict:
+        """Returns hit and miss counters of the verified tokens.
+
+        Returns:
+            A dict, the backend, counters and the current number of remembered tokens.
+        """
+        lookups = self.cache.hits + self.cache.misses
+        return {
+            "backend": self.backend.name,
+            "size": len(self.cache),
+            "maxsize": self.cache.maxsize,
+            "hits": self.cache.hits,
+            "misses": self.cache.misses,
+            "hit_ratio": round(self.cache.hits / lookups, 4) if lookups else None,
+        }
+
+
+jwt_backend: JWTBackend = JWT_BACKENDS[JWT_BACKEND]()
+"""Signs and verifies the access and refresh tokens."""
+
+key_ring = KeyRing(
+    backend=jwt_backend,
+    algorithm=ALGORITHM,
+    secret=SECRET_KEY_JWT,
+    directory=JWT_KEYS_DIR,
+    retire_after=RETIRE_AFTER_SECONDS,
+    reload_seconds=JWT_KEYS_RELOAD_SECONDS,
+)
+"""Signing and verification keys, loaded in the application lifespan."""
+
+token_verifier = TokenVerifier(backend=jwt_backend, keys=key_ring, maxsize=TOKEN_CACHE_SIZE)
+"""Verified access and refresh tokens, used by descript_and_check_token."""
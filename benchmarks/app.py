@@ -0,0 +1,29 @@
+"""The application with benchmark stand-ins: python -m uvicorn benchmarks.app:app
+
+Expects DATABASE_URL and REDIS_URL in the environment (set by benchmarks.load).
+Adds a "db" section with the number of executed SQL statements to /metrics.
+"""
+import os
+from .standins import NullSmtp, configure_environment
+
+configure_environment(os.environ["DATABASE_URL"], os.environ["REDIS_URL"])
+
+from sqlalchemy import Engine, event  # noqa: E402
+import api.main  # noqa: E402
+from api import metrics  # noqa: E402
+
+
+api.main.SmtpTools = NullSmtp
+
+queries = {"executed": 0}
+
+
+# On the Engine class, so the statements of every connection pool are counted
+@event.listens_for(Engine, "before_cursor_execute")
+def count_query(conn, cursor, statement, parameters, context, executemany):
+    queries["executed"] += 1
+
+
+metrics.register("db", lambda: dict(queries))
+
+app = api.main.app
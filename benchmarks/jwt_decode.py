@@ -0,0 +1,78 @@
+"""Compares cold and warm verification of access tokens for every available JWT backend.
+
+Usage: python -m benchmarks.jwt_decode [--tokens 2000] [--repeat 5] [--algorithm HS256|RS256|EdDSA]
+
+Cold decodes every token with an empty TokenVerifier, warm decodes the same tokens again
+from its memo. No database or Redis is needed. Backends with a missing optional dependency
+or without support for the algorithm are skipped. Asymmetric keys are generated in a temporary directory.
+"""
+import argparse
+import json
+import tempfile
+from datetime import datetime, timedelta, timezone
+from time import perf_counter
+from typing import Callable, List
+from jose.exceptions import JOSEError
+from api.users.keys import KeyRing, rotate
+from api.users.tokens import JWT_BACKENDS, TokenVerifier
+
+
+KEY = "benchmark_secret_key_of_32_bytes_"
+
+
+def time_per_token_us(decode: Callable[[str], object], tokens: List[str]) -> float:
+    started = perf_counter()
+    for token in tokens:
+        decode(token)
+    return (perf_counter() - started) / len(tokens) * 1_000_000
+
+
+def run(tokens_count: int, repeat: int, algorithm: str, keys_dir: str) -> dict:
+    expire = datetime.now(timezone.utc) + timedelta(minutes=30)
+    report = {"tokens": tokens_count, "repeat": repeat, "algorithm": algorithm, "backends": {}}
+    for name, backend_class in JWT_BACKENDS.items():
+        try:
+            backend = backend_class()
+            keys = KeyRing(backend, algorithm, secret=KEY, directory=keys_dir, retire_after=0, reload_seconds=0)
+            keys.load()
+            kid, key = keys.signing_key()
+        except (ImportError, ValueError, JOSEError) as error:
+            report["backends"][name] = {"skipped": str(error)}
+            continue
+
+        headers = {"kid": kid} if kid is not None else None
+        started = perf_counter()
+        tokens = [
+            backend.encode({"sub": str(i), "role": 1, "exp": expire}, key, algorithm, headers=headers)
+            for i in range(tokens_count)
+        ]
+        sign_us = (perf_counter() - started) / tokens_count * 1_000_000
+        cold, warm = [], []
+        for _ in range(repeat):
+            verifier = TokenVerifier(backend=backend, keys=keys, maxsize=tokens_count)
+            cold.append(time_per_token_us(verifier.decode, tokens))
+            warm.append(time_per_token_us(verifier.decode, tokens))
+
+        report["backends"][name] = {
+            "sign_us_per_token": round(sign_us, 2),
+            "cold_us_per_token": round(min(cold), 2),
+            "warm_us_per_token": round(min(warm), 2),
+            "speedup": round(min(cold) / min(warm), 1),
+        }
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--algorithm", choices=["HS256", "RS256", "EdDSA"], default="HS256")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as keys_dir:
+        if args.algorithm != "HS256":
+            rotate(keys_dir, args.algorithm, rotation_days=30, activation_minutes=0, force=False)
+        print(json.dumps(run(args.tokens, args.repeat, args.algorithm, keys_dir), indent=2))
+
+
+if __name__ == "__main__":
+    main()
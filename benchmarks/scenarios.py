@@ -0,0 +1,90 @@
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List
+import httpx
+from .seed import BENCH_PASSWORD, SeedInfo
+
+
+@dataclass
+class Context:
+    """State shared by the scenarios of one run.
+
+    Attributes:
+        seed: The seeded data.
+        user_token: Access token of the user.
+        admin_token: Access token of the admin.
+        redis: The application Redis client, to read recovery codes.
+    """
+    seed: SeedInfo
+    user_token: str
+    admin_token: str
+    redis: object
+
+
+Scenario = Callable[[httpx.AsyncClient, Context, int, int], Awaitable[bool]]
+"""Runs one iteration: (client, context, worker number, iteration number) -> success."""
+
+
+async def login(client: httpx.AsyncClient, email: str) -> str:
+    response = await client.post("/auth/login", json={"email": email, "password": BENCH_PASSWORD})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def books_list(client: httpx.AsyncClient, context: Context, worker: int, iteration: int) -> bool:
+    response = await client.get("/books/", params={"limit": 50})
+    return response.status_code == 200
+
+
+async def books_get(client: httpx.AsyncClient, context: Context, worker: int, iteration: int) -> bool:
+    book_ids = context.seed.book_ids
+    id_book = book_ids[(iteration * 7919) % len(book_ids)]
+    response = await client.get(f"/books/{id_book}")
+    return response.status_code == 200
+
+
+async def books_create(client: httpx.AsyncClient, context: Context, worker: int, iteration: int) -> bool:
+    response = await client.post("/books/", json={"name": f"Bench {worker}-{iteration}", "description": "Benchmark"})
+    return response.status_code == 201
+
+
+async def auth_login(client: httpx.AsyncClient, context: Context, worker: int, iteration: int) -> bool:
+    response = await client.post("/auth/login", json={"email": context.seed.user_email, "password": BENCH_PASSWORD})
+    return response.status_code == 200
+
+
+async def auth_me(client: httpx.AsyncClient, context: Context, worker: int, iteration: int) -> bool:
+    response = await client.get("/auth/me", headers={"Authorization": f"Bearer {context.user_token}"})
+    return response.status_code == 200
+
+
+async def admin_all_users(client: httpx.AsyncClient, context: Context, worker: int, iteration: int) -> bool:
+    response = await client.get("/admin/all_users", headers={"Authorization": f"Bearer {context.admin_token}"})
+    return response.status_code == 200
+
+
+async def password_reset(client: httpx.AsyncClient, context: Context, worker: int, iteration: int) -> bool:
+    # Every worker has its own user, so concurrent flows don't overwrite each other's codes
+    email = context.seed.reset_emails[worker]
+    response = await client.post("/auth/forgot_password", json={"email": email})
+    if not response.is_success:
+        return False
+
+    code = await context.redis.get_email_code(email)
+    response = await client.post("/auth/reset_password", json={"email": email, "password": BENCH_PASSWORD, "code": code})
+    return response.is_success
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "books_list": books_list,
+    "books_get": books_get,
+    "books_create": books_create,
+    "auth_login": auth_login,
+    "auth_me": auth_me,
+    "admin_all_users": admin_all_users,
+    "password_reset": password_reset,
+}
+"""All scenarios by name, password_reset is the forgot_password + reset_password pair."""
+
+
+def select_scenarios(names: List[str]) -> Dict[str, Scenario]:
+    return {name: SCENARIOS[name] for name in names}
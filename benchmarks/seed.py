@@ -0,0 +1,96 @@
+from dataclasses import dataclass, field
+from typing import List
+from sqlalchemy import select
+
+
+BENCH_PASSWORD = "bench_password"
+
+
+@dataclass
+class SeedInfo:
+    """Data the scenarios need.
+
+    Attributes:
+        book_ids: IDs of the seeded books.
+        user_email: Email of a user with the "user" role.
+        admin_email: Email of a user with the "admin" role.
+        reset_emails: Emails used by the password reset scenario, one per concurrent client.
+    """
+    book_ids: List[int]
+    user_email: str
+    admin_email: str
+    reset_emails: List[str] = field(default_factory=list)
+
+
+async def seed(books: int, users: int, reset_users: int) -> SeedInfo:
+    """Recreates all tables of the benchmark database, empties the benchmark Redis and fills them.
+
+    Redis is emptied so the caches don't serve entries of the previous run under reused IDs.
+
+    Args:
+        books (int): The number of books.
+        users (int): The number of additional users listed by /admin/all_users.
+        reset_users (int): The number of users for the password reset scenario.
+
+    Returns:
+        A SeedInfo, what was created.
+    """
+    import redis.asyncio as redis
+    from api.admin.service import AdminRepository
+    from api.books.database import BookOrm
+    from api.books.schemas import BookCreate
+    from api.books.service import BookRepository
+    from api.config import REDIS_URL
+    from api.database import Model, engine, new_session
+    from api.roles.database import RolesOrm
+    from api.roles.service import RoleRepository
+    from api.users.auth import get_password_hash
+    from api.users.schemas import UserCreate
+    from api.users.service import UserRepository
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Model.metadata.drop_all)
+        await connection.run_sync(Model.metadata.create_all)
+    await RoleRepository.create_default_roles()
+
+    redis_client = redis.from_url(REDIS_URL)
+    await redis_client.flushdb()
+    await redis_client.aclose()
+
+    chunk = 5000
+    for start in range(0, books, chunk):
+        await BookRepository.db_add_many([
+            BookCreate(name=f"Book {number}", description=f"Description of the book number {number}" if number % 3 else None)
+            for number in range(start, min(books, start + chunk))
+        ])
+
+    password = get_password_hash(BENCH_PASSWORD)
+
+    async def add_user(email: str) -> int:
+        return await UserRepository.add_user(UserCreate.model_construct(
+            email=email,
+            password=password,
+            phone_number="+79999999999",
+            first_name="Bench",
+            last_name="User",
+        ))
+
+    admin_id = await add_user("admin@bench.example.com")
+    await add_user("user@bench.example.com")
+    for number in range(users):
+        await add_user(f"user{number}@bench.example.com")
+    reset_emails = [f"reset{number}@bench.example.com" for number in range(reset_users)]
+    for email in reset_emails:
+        await add_user(email)
+
+    async with new_session() as session:
+        admin_role_id = await session.scalar(select(RolesOrm.id).where(RolesOrm.role_type == "admin"))
+        book_ids = list(await session.scalars(select(BookOrm.id).order_by(BookOrm.id)))
+    await AdminRepository.change_role(admin_id, admin_role_id)
+
+    return SeedInfo(
+        book_ids=book_ids,
+        user_email="user@bench.example.com",
+        admin_email="admin@bench.example.com",
+        reset_emails=reset_emails,
+    )
@@ -0,0 +1,86 @@
+"""Compares the old and the new serialization path of list responses.
+
+Usage: python -m benchmarks.serialization [--rows 10000] [--repeat 30]
+
+Both paths run through a real FastAPI route and an in-process ASGI client,
+no database is needed: the rows are generated in memory as tuples with
+attributes, like the Core rows returned by the repositories.
+"""
+import argparse
+import asyncio
+import json
+from collections import namedtuple
+from types import SimpleNamespace
+from typing import List
+import httpx
+from fastapi import FastAPI
+from api.books.schemas import BookRead
+from api.serialization import json_response, validate_rows
+from api.users.schemas import UserInfo
+from .utils import measure, summarize
+
+
+BookRow = namedtuple("BookRow", ["id", "name", "description", "version"])
+UserRow = namedtuple("UserRow", ["id", "email", "password", "phone_number", "first_name", "last_name", "is_active", "role_id"])
+
+
+def make_app(rows: int) -> FastAPI:
+    book_rows = [BookRow(i, f"Book {i}", f"Description of the book number {i}", 1) for i in range(1, rows + 1)]
+    user_rows = [
+        UserRow(i, f"user{i}@example.com", "$2b$12$" + "x" * 53, "+79999999999", "First", "Last", True, 1)
+        for i in range(1, rows + 1)
+    ]
+    # ORM instances: __dict__ also carries _sa_instance_state
+    user_instances = [SimpleNamespace(_sa_instance_state=object(), **row._asdict()) for row in user_rows]
+
+    app = FastAPI()
+
+    @app.get("/legacy/books", response_model=List[BookRead])
+    async def legacy_books():
+        books = [BookRead(id=row.id, name=row.name, description=row.description, version=row.version) for row in book_rows]
+        return [BookRead.model_validate(book) for book in books]
+
+    @app.get("/fast/books", response_model=List[BookRead])
+    async def fast_books():
+        return json_response(List[BookRead], validate_rows(BookRead, book_rows))
+
+    @app.get("/legacy/users", response_model=List[UserInfo])
+    async def legacy_users():
+        return [UserInfo.model_validate(user.__dict__) for user in user_instances]
+
+    @app.get("/fast/users", response_model=List[UserInfo])
+    async def fast_users():
+        return json_response(List[UserInfo], validate_rows(UserInfo, user_rows))
+
+    return app
+
+
+async def run(rows: int, repeat: int) -> dict:
+    app = make_app(rows)
+    report = {"rows": rows, "repeat": repeat, "cases": {}}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for case in ("books", "users"):
+            legacy_body = (await client.get(f"/legacy/{case}")).json()
+            fast_body = (await client.get(f"/fast/{case}")).json()
+            assert legacy_body == fast_body, f"{case}: responses differ"
+
+            legacy = summarize(await measure(lambda: client.get(f"/legacy/{case}"), repeat))
+            fast = summarize(await measure(lambda: client.get(f"/fast/{case}"), repeat))
+            report["cases"][case] = {
+                "legacy": legacy,
+                "fast": fast,
+                "speedup_p50": round(legacy["p50_ms"] / fast["p50_ms"], 2),
+            }
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.rows, args.repeat)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
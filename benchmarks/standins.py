@@ -0,0 +1,51 @@
+import os
+
+
+METRICS_CLIENT = ("bench", "benchmark_metrics_secret")
+"""HTTP Basic credentials of the load generator reading /metrics, registered as an introspection client."""
+
+
+def configure_environment(database_url: str, redis_url: str) -> None:
+    """Points the application to the benchmark Postgres and Redis, must run before importing api.
+
+    Also lifts the auth rate limits unless they are set in the environment and registers METRICS_CLIENT.
+
+    Args:
+        database_url (str): SQLAlchemy URL of the benchmark database.
+        redis_url (str): URL of the benchmark Redis.
+
+    Returns:
+        None
+    """
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["REDIS_URL"] = redis_url
+    os.environ.setdefault("SMTP_HOST", "localhost")
+    os.environ.setdefault("SMTP_PORT", "465")
+    os.environ.setdefault("SMTP_EMAIL", "bench@example.com")
+    os.environ.setdefault("SMTP_PASSWORD", "bench")
+    os.environ.setdefault("SECRET_KEY_JWT", "benchmark_jwt_secret_key")
+    clients = [item for item in os.getenv("INTROSPECT_CLIENTS", "").split(",") if item]
+    os.environ["INTROSPECT_CLIENTS"] = ",".join([*clients, ":".join(METRICS_CLIENT)])
+    # The scenarios log in and reset passwords far faster than the default limits allow
+    for limit in (
+        "LOGIN_RATE_LIMIT_PER_IP",
+        "LOGIN_RATE_LIMIT_PER_EMAIL",
+        "FORGOT_PASSWORD_RATE_LIMIT_PER_IP",
+        "FORGOT_PASSWORD_RATE_LIMIT_PER_EMAIL",
+    ):
+        os.environ.setdefault(limit, "1000000")
+
+
+class NullSmtp:
+    """Stand-in for SmtpTools: accepts emails without a mail server.
+
+    The recovery code is read back from Redis by the password reset scenario.
+    """
+    def __init__(self, host: str, port: int, email: str, password: str):
+        self.sent = 0
+
+    async def send_email(self, to_email: str, code: str):
+        self.sent += 1
+
+    def __del__(self):
+        pass
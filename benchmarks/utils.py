@@ -0,0 +1,60 @@
+import math
+import statistics
+from time import perf_counter
+from typing import Awaitable, Callable, Dict, List
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Returns the q-th percentile (0..100) of samples, nearest-rank method.
+
+    Args:
+        samples (List[float]): The measured values.
+        q (float): The percentile.
+
+    Returns:
+        A float, the percentile value.
+    """
+    ordered = sorted(samples)
+    # The smallest value with at least q percent of the samples at or below it;
+    # rounded first so float error in q * n does not move it to the next rank
+    rank = math.ceil(round(q * len(ordered) / 100, 9))
+    return ordered[max(0, min(len(ordered) - 1, rank - 1))]
+
+
+def summarize(samples_ms: List[float]) -> Dict[str, float]:
+    """Summarizes latencies in milliseconds.
+
+    Args:
+        samples_ms (List[float]): The measured latencies.
+
+    Returns:
+        A Dict[str, float], mean and p50/p95/p99.
+    """
+    return {
+        "mean_ms": round(statistics.fmean(samples_ms), 3),
+        "p50_ms": round(percentile(samples_ms, 50), 3),
+        "p95_ms": round(percentile(samples_ms, 95), 3),
+        "p99_ms": round(percentile(samples_ms, 99), 3),
+    }
+
+
+async def measure(call: Callable[[], Awaitable[object]], repeat: int, warmup: int = 3) -> List[float]:
+    """Runs call sequentially and measures every run.
+
+    Args:
+        call (Callable[[], Awaitable[object]]): The measured coroutine function.
+        repeat (int): The number of measured runs.
+        warmup (int): The number of runs before measuring.
+
+    Returns:
+        A List[float], latencies in milliseconds.
+    """
+    for _ in range(warmup):
+        await call()
+
+    samples = []
+    for _ in range(repeat):
+        started = perf_counter()
+        await call()
+        samples.append((perf_counter() - started) * 1000)
+    return samples
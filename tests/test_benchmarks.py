@@ -0,0 +1,41 @@
+import httpx
+import pytest
+from benchmarks.load import run_scenario
+from benchmarks.utils import percentile, summarize
+
+
+def test_percentile_is_a_nearest_rank():
+    samples = [float(value) for value in range(100, 0, -1)]
+
+    assert [percentile(samples, q) for q in (0, 50, 95, 99, 100)] == [1.0, 50.0, 95.0, 99.0, 100.0]
+    assert percentile([7.0], 99) == 7.0
+
+
+def test_summary_is_in_milliseconds():
+    assert summarize([1.0, 2.0, 3.0, 4.0]) == {"mean_ms": 2.5, "p50_ms": 2.0, "p95_ms": 4.0, "p99_ms": 4.0}
+
+
+@pytest.mark.anyio
+async def test_scenario_runs_every_request_once_and_counts_failures():
+    iterations = []
+    queries = 0
+
+    async def scenario(client, context, worker, iteration) -> bool:
+        nonlocal queries
+        iterations.append(iteration)
+        queries += 2
+        if iteration == 3:
+            raise httpx.ConnectError("refused")
+        response = await client.get("/books")
+        return response.status_code == 200 and iteration != 5
+
+    async def read_queries() -> int:
+        return queries
+
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json=[]))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        result = await run_scenario(client, scenario, None, requests=10, concurrency=3, read_queries=read_queries)
+
+    assert sorted(iterations) == list(range(10))
+    assert (result["requests"], result["errors"], result["db_queries_per_request"]) == (10, 2, 2.0)
+    assert result["rps"] > 0
@@ -0,0 +1,82 @@
+import pytest
+from api.books import router as books_router
+from api.books.responses.http_errors import HTTTPError
+from api.books.schemas import BookCreate, BookRead, BookUpdate
+from api.books.service import BookRepository
+from api.books.utils import book_etag, conditional_response, if_match_versions, is_not_modified
+
+
+def test_if_match_versions():
+    assert if_match_versions('"7-2", W/"7-3", "8-4", "7-x", "7-5"', 7) == [2, 5]
+    assert if_match_versions('"8-4"', 7) == []
+    assert if_match_versions("*", 7) is None
+
+
+def test_if_none_match_uses_weak_comparison():
+    etag = book_etag(7, 2)
+
+    assert is_not_modified(f'"1-1", W/{etag}', etag)
+    assert is_not_modified("*", etag)
+    assert not is_not_modified('"7-1"', etag)
+    assert not is_not_modified(None, etag)
+
+
+def test_conditional_response():
+    book = BookRead(id=7, name="Dune", version=2)
+    etag = book_etag(book.id, book.version)
+
+    not_modified = conditional_response(book, etag, etag)
+    assert not_modified.status_code == 304
+    assert not_modified.body == b""
+    assert not_modified.headers["ETag"] == etag
+
+    modified = conditional_response(book, etag, '"7-1"')
+    assert modified.status_code == 200
+    assert modified.headers["ETag"] == etag
+
+
+@pytest.fixture
+def stale_book(monkeypatch) -> list:
+    calls = []
+
+    async def db_update(data, id_book, versions=None, session=None):
+        calls.append(versions)
+        return None
+
+    monkeypatch.setattr(BookRepository, "db_update", db_update)
+    return calls
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("handler, data", [
+    (books_router.update_book, BookCreate(name="Dune")),
+    (books_router.patch_book, BookUpdate(name="Dune")),
+])
+async def test_failed_if_match_is_412(stale_book, handler, data):
+    with pytest.raises(type(HTTTPError.VERSION_MISMATCH_412)) as error:
+        await handler(data, 7, if_match='"7-2"', session=None)
+    assert error.value is HTTTPError.VERSION_MISMATCH_412
+    assert stale_book == [[2]]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("handler, data", [
+    (books_router.update_book, BookCreate(name="Dune")),
+    (books_router.patch_book, BookUpdate(name="Dune")),
+])
+async def test_missing_book_without_if_match_is_404(stale_book, handler, data):
+    with pytest.raises(type(HTTTPError.BOOK_NOT_FOUNT_404)) as error:
+        await handler(data, 7, if_match=None, session=None)
+    assert error.value is HTTTPError.BOOK_NOT_FOUNT_404
+    assert stale_book == [None]
+
+
+@pytest.mark.anyio
+async def test_update_returns_the_new_etag(monkeypatch):
+    async def db_update(data, id_book, versions=None, session=None):
+        return BookRead(id=id_book, name=data.name, version=3)
+
+    monkeypatch.setattr(BookRepository, "db_update", db_update)
+
+    response = await books_router.update_book(BookCreate(name="Dune"), 7, if_match='"7-2"', session=None)
+    assert response.headers["ETag"] == '"7-3"'
@@ -0,0 +1,35 @@
+import pytest
+from api.books.responses.http_errors import HTTTPError
+from api.books.utils import decode_cursor, encode_cursor, prefix_upper_bound
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("name", ["Dune", 42])
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, "name", (str, int)) == ["Dune", 42]
+
+
+@pytest.mark.parametrize("cursor, sort, types", [
+    (encode_cursor("id", [42]), "name", (str, int)),
+    (encode_cursor("name", ["Dune", "42"]), "name", (str, int)),
+    (encode_cursor("id", [42, 43]), "id", (int,)),
+    (encode_cursor("id", [True]), "id", (int,)),
+    ("not a cursor", "id", (int,)),
+    ("", "id", (int,)),
+])
+def test_foreign_or_malformed_cursor_is_rejected(cursor, sort, types):
+    with pytest.raises(type(HTTTPError.BAD_CURSOR_400)) as error:
+        decode_cursor(cursor, sort, types)
+    assert error.value is HTTTPError.BAD_CURSOR_400
+
+
+@pytest.mark.parametrize("prefix, bound", [
+    ("abc", "abd"),
+    ("a\U0010ffff", "b"),
+    ("\U0010ffff", None),
+    # The next code point after U+D7FF would be a surrogate
+    ("a\ud7ff", "a\ue000"),
+])
+def test_prefix_upper_bound(prefix, bound):
+    assert prefix_upper_bound(prefix) == bound
@@ -0,0 +1,53 @@
+import csv
+import io
+import json
+from collections import namedtuple
+import pytest
+from api.books.utils import encode_csv, encode_ndjson
+
+BookRow = namedtuple("BookRow", ["id", "name", "description"])
+
+BATCHES = [
+    [BookRow(1, "Dune", "Spice, \"melange\"\nand sand"), BookRow(2, "Солярис", None)],
+    [BookRow(3, "Ubik", "")],
+]
+
+
+async def rows(batches):
+    for batch in batches:
+        yield batch
+
+
+async def read(chunks) -> list:
+    return [chunk async for chunk in chunks]
+
+
+@pytest.mark.anyio
+async def test_ndjson_export_is_one_chunk_per_batch():
+    chunks = await read(encode_ndjson(rows(BATCHES)))
+
+    assert len(chunks) == 2
+    lines = b"".join(chunks).decode("utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == [row._asdict() for batch in BATCHES for row in batch]
+    assert "Солярис" in lines[1]
+
+
+@pytest.mark.anyio
+async def test_csv_export_round_trips():
+    chunks = await read(encode_csv(rows(BATCHES)))
+
+    assert len(chunks) == 2
+    assert chunks[0].startswith(b"id,name,description\r\n")
+    records = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+    assert records == [
+        ["id", "name", "description"],
+        ["1", "Dune", "Spice, \"melange\"\nand sand"],
+        ["2", "Солярис", ""],
+        ["3", "Ubik", ""],
+    ]
+
+
+@pytest.mark.anyio
+async def test_empty_catalog():
+    assert await read(encode_ndjson(rows([]))) == []
+    assert await read(encode_csv(rows([]))) == [b"id,name,description\r\n"]
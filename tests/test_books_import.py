@@ -0,0 +1,105 @@
+import pytest
+from api.books.responses.http_errors import HTTTPError
+from api.books.service import BookRepository
+from api.books.utils import (
+    iter_csv_records,
+    iter_lines,
+    iter_ndjson_records,
+    make_csv_parser,
+    parse_ndjson_record,
+)
+
+
+async def body(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def read(records) -> list:
+    return [record async for record in records]
+
+
+@pytest.mark.anyio
+async def test_lines_are_split_across_chunks():
+    lines = await read(iter_lines(body(b"fir", b"st\r\nsec", b"ond\n\nthi", b"rd")))
+
+    assert lines == [(1, b"first"), (2, b"second"), (3, b""), (4, b"third")]
+
+
+@pytest.mark.anyio
+async def test_ndjson_records_skip_blank_lines():
+    records = await read(iter_ndjson_records(body(b'{"name": "Dune"}\n\n  \n{"name": "Ubik"}\n')))
+
+    assert records == [(1, b'{"name": "Dune"}'), (4, b'{"name": "Ubik"}')]
+    assert parse_ndjson_record(records[0][1]).name == "Dune"
+
+
+@pytest.mark.anyio
+async def test_csv_record_may_span_lines():
+    records = await read(iter_csv_records(body(b'name,description\n\nDune,"Spice\nand ""sand"""\nUbik,\n')))
+
+    assert records == [(1, b"name,description"), (3, b'Dune,"Spice\nand ""sand"""'), (5, b"Ubik,")]
+    parse = make_csv_parser(records[0])
+    assert parse(records[1][1]).description == 'Spice\nand "sand"'
+    # An empty description is no description
+    assert parse(records[2][1]).description is None
+
+
+def test_csv_header_columns_may_be_in_any_order():
+    parse = make_csv_parser((1, "﻿description, name".encode("utf-8")))
+
+    book = parse(b"Spice,Dune")
+    assert (book.name, book.description) == ("Dune", "Spice")
+    with pytest.raises(ValueError):
+        parse(b"Dune")
+
+
+@pytest.mark.parametrize("header", [None, (1, b"title,description")])
+def test_csv_without_a_name_column_is_rejected(header):
+    with pytest.raises(type(HTTTPError.BAD_CSV_HEADER_400)) as error:
+        make_csv_parser(header)
+    assert error.value is HTTTPError.BAD_CSV_HEADER_400
+
+
+@pytest.mark.anyio
+async def test_bulk_import_reports_skipped_rows(monkeypatch):
+    chunks = []
+
+    async def db_add_many(books):
+        chunks.append([book.name for book in books])
+        return len(books)
+
+    monkeypatch.setattr(BookRepository, "db_add_many", db_add_many)
+    lines = [
+        b'{"name": "Dune"}',
+        b'{"name": "Ubik"}',
+        b'{"name": "Dune"}',
+        b'{"description": "no name"}',
+        b"not json",
+        b'{"name": "Solaris"}',
+    ]
+
+    report = await BookRepository.db_bulk_import(
+        iter_ndjson_records(body(b"\n".join(lines))), parse_ndjson_record, chunk_size=2
+    )
+
+    # Rows are only compared within a chunk, the database skips the books it already has
+    assert chunks == [["Dune", "Ubik"], ["Dune", "Solaris"]]
+    assert (report.inserted, report.duplicates, report.failed) == (4, 0, 2)
+    assert [(error.row, error.code) for error in report.errors] == [(4, "INVALID_ROW"), (5, "INVALID_ROW")]
+
+
+@pytest.mark.anyio
+async def test_bulk_import_skips_duplicates_within_a_chunk(monkeypatch):
+    async def db_add_many(books):
+        return len(books)
+
+    monkeypatch.setattr(BookRepository, "db_add_many", db_add_many)
+    lines = [b'{"name": "Dune"}', b'{"name": "Ubik"}', b'{"name": "Dune"}']
+
+    report = await BookRepository.db_bulk_import(
+        iter_ndjson_records(body(b"\n".join(lines))), parse_ndjson_record, chunk_size=10
+    )
+
+    assert (report.inserted, report.duplicates) == (2, 1)
+    assert report.errors[0].reason == "Duplicate of row 1"
@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+import pytest
+from sqlalchemy.dialects import postgresql
+from api.books.schemas import BookCreate, BookUpdate
+from api.books.service import BookRepository
+
+
+class RequestSession:
+    """The session of a request as seen by the repository: runs nothing, returns the given row."""
+    def __init__(self, row) -> None:
+        self.info = {"after_commit": []}
+        self.row = row
+        self.statements = []
+        self.flushes = 0
+
+    async def execute(self, statement, parameters=None):
+        self.statements.append(statement)
+        return SimpleNamespace(one_or_none=lambda: self.row)
+
+    async def flush(self) -> None:
+        self.flushes += 1
+
+    def sql(self) -> str:
+        (statement,) = self.statements
+        return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def updated_row(**values) -> SimpleNamespace:
+    return SimpleNamespace(**{"id": 7, "name": "Dune", "description": "Spice", "version": 3, **values})
+
+
+@pytest.mark.anyio
+async def test_patch_is_one_update_returning_the_book():
+    session = RequestSession(updated_row())
+
+    book = await BookRepository.db_update(BookUpdate(name="Dune"), 7, versions=[2], session=session)
+
+    assert book.name == "Dune" and book.version == 3
+    sql = session.sql()
+    assert sql.startswith("UPDATE books SET name=%(name)s, version=(books.version + %(version_1)s) WHERE")
+    assert "description" not in sql.split("WHERE")[0]
+    assert "books.version IN" in sql
+    assert sql.endswith("RETURNING books.id, books.name, books.description, books.version")
+    # The request session is only flushed, the cache is invalidated after get_session commits
+    assert session.flushes == 1
+    assert len(session.info["after_commit"]) == 1
+
+
+@pytest.mark.anyio
+async def test_patch_with_null_removes_the_description():
+    session = RequestSession(updated_row(description=None))
+
+    await BookRepository.db_update(BookUpdate(description=None), 7, session=session)
+
+    assert session.sql().startswith("UPDATE books SET description=%(description)s, version=")
+    assert session.statements[0].compile().params["description"] is None
+
+
+@pytest.mark.anyio
+async def test_empty_patch_keeps_the_version():
+    session = RequestSession(updated_row())
+
+    book = await BookRepository.db_update(BookUpdate(), 7, session=session)
+
+    assert book.version == 3
+    assert session.sql().startswith("UPDATE books SET version=books.version WHERE")
+    assert session.info["after_commit"] == []
+
+
+@pytest.mark.anyio
+async def test_put_replaces_every_field():
+    session = RequestSession(updated_row(description=None))
+
+    await BookRepository.db_update(BookCreate(name="Dune"), 7, session=session)
+
+    assert session.sql().startswith("UPDATE books SET name=%(name)s, description=%(description)s, version=")
+
+
+@pytest.mark.anyio
+async def test_missing_or_changed_book_is_none():
+    session = RequestSession(None)
+
+    assert await BookRepository.db_update(BookUpdate(name="Dune"), 7, versions=[2], session=session) is None
+    assert session.info["after_commit"] == []
@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+import pytest
+from sqlalchemy.dialects import postgresql
+from api.books.responses.http_errors import HTTTPError
+from api.books.service import BookRepository
+
+
+class RequestSession:
+    """The session of a request as seen by the repository: runs nothing, returns the given rows."""
+    def __init__(self, rows) -> None:
+        self.info = {}
+        self.rows = rows
+        self.statements = []
+
+    async def execute(self, statement, parameters=None):
+        self.statements.append(statement)
+        return SimpleNamespace(all=lambda: self.rows)
+
+    def compiled(self):
+        return self.statements[-1].compile(dialect=postgresql.dialect())
+
+
+def match(id_book: int, rank: float) -> SimpleNamespace:
+    return SimpleNamespace(id=id_book, name=f"Book {id_book}", description=None, version=1, rank=rank)
+
+
+@pytest.mark.anyio
+async def test_matches_are_ranked_and_paged_by_rank_and_id():
+    session = RequestSession([match(3, 0.5), match(1, 0.2), match(2, 0.2)])
+
+    page = await BookRepository.db_search("dune -sequel", limit=2, session=session)
+
+    assert [book.id for book in page.items] == [3, 1]
+    sql = str(session.compiled())
+    assert "books.search_vector @@ websearch_to_tsquery(%(websearch_to_tsquery_1)s, %(websearch_to_tsquery_2)s)" in sql
+    assert sql.endswith(")) DESC, books.id \n LIMIT %(param_1)s")
+    params = session.compiled().params
+    assert (params["websearch_to_tsquery_1"], params["websearch_to_tsquery_2"], params["param_1"]) == (
+        "simple", "dune -sequel", 3
+    )
+
+    session = RequestSession([match(2, 0.2)])
+    page = await BookRepository.db_search("dune -sequel", limit=2, after=page.next_cursor, session=session)
+
+    assert [book.id for book in page.items] == [2] and page.next_cursor is None
+    compiled = session.compiled()
+    assert "< %(ts_rank_cd_1)s OR" in str(compiled) and "AND books.id > %(id_1)s" in str(compiled)
+    assert (compiled.params["ts_rank_cd_1"], compiled.params["ts_rank_cd_2"], compiled.params["id_1"]) == (0.2, 0.2, 1)
+
+
+@pytest.mark.anyio
+async def test_search_reads_may_go_to_a_replica():
+    session = RequestSession([])
+    reads = []
+
+    async def execute(statement, parameters=None):
+        reads.append(session.info.get("replica_reads"))
+        return SimpleNamespace(all=lambda: [])
+
+    session.execute = execute
+    await BookRepository.db_search("dune", limit=10, session=session)
+    assert reads == [True]
+
+
+@pytest.mark.anyio
+async def test_cursor_of_another_listing_is_rejected():
+    page = await BookRepository.db_get_page(limit=1, session=RequestSession([match(1, 0), match(2, 0)]))
+
+    with pytest.raises(type(HTTTPError.BAD_CURSOR_400)) as error:
+        await BookRepository.db_search("dune", limit=1, after=page.next_cursor, session=RequestSession([]))
+    assert error.value is HTTTPError.BAD_CURSOR_400
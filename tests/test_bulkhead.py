@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+from api.bulkhead import Bulkhead, BulkheadStreamingResponse
+from api.database import session_factory, shared_sessionmaker
+from api.users.responses.http_errors import HTTTPError
+
+
+def bulkhead(queue_timeout: float = 0.05) -> Bulkhead:
+    group = Bulkhead(name="books", max_concurrent=1, queue_timeout=queue_timeout, pool_size=0)
+    # Stands for the sessionmaker of a pool of the group, nothing here connects
+    group._sessionmaker = "sessions of the books pool"
+    return group
+
+
+@pytest.mark.anyio
+async def test_full_bulkhead_rejects_after_the_queue_timeout():
+    group = bulkhead()
+
+    async with group.slot():
+        with pytest.raises(type(HTTTPError.SERVICE_OVERLOADED_503)) as error:
+            async with group.slot():
+                pass
+    assert error.value is HTTTPError.SERVICE_OVERLOADED_503
+    assert error.value.headers["Retry-After"]
+
+    stats = group.stats()
+    assert (stats["admitted"], stats["rejected"], stats["active"], stats["waiting"]) == (1, 1, 0, 0)
+
+
+@pytest.mark.anyio
+async def test_queued_request_gets_the_freed_slot():
+    group = bulkhead(queue_timeout=5)
+    release = asyncio.Event()
+
+    async def request(wait: bool) -> int:
+        async with group.slot():
+            if wait:
+                await release.wait()
+            return group.active
+
+    running = asyncio.create_task(request(wait=True))
+    await asyncio.sleep(0)
+    queued = asyncio.create_task(request(wait=False))
+    await asyncio.sleep(0)
+    assert (group.active, group.waiting) == (1, 1)
+
+    release.set()
+    assert await asyncio.gather(running, queued) == [1, 1]
+    assert (group.admitted, group.rejected, group.active, group.waiting) == (2, 0, 0, 0)
+
+
+@pytest.mark.anyio
+async def test_slot_uses_the_sessions_of_the_group():
+    group = bulkhead()
+
+    async with group.slot():
+        assert session_factory.get() == "sessions of the books pool"
+    assert session_factory.get() is shared_sessionmaker
+
+
+@pytest.mark.anyio
+async def test_streamed_body_is_sent_in_a_slot():
+    group = bulkhead()
+    seen = []
+
+    async def body():
+        seen.append((group.active, session_factory.get()))
+        # The slot is taken: a request arriving now is rejected
+        with pytest.raises(type(HTTTPError.SERVICE_OVERLOADED_503)):
+            async with group.slot():
+                pass
+        yield b"{}\n"
+
+    messages = []
+
+    async def send(message) -> None:
+        messages.append(message)
+
+    async def receive() -> dict:
+        await asyncio.Event().wait()
+
+    response = BulkheadStreamingResponse(group, body(), media_type="application/x-ndjson")
+    await response({"type": "http"}, receive, send)
+
+    assert seen == [(1, "sessions of the books pool")]
+    assert [message["type"] for message in messages] == ["http.response.start", "http.response.body", "http.response.body"]
+    assert group.active == 0
@@ -0,0 +1,119 @@
+import asyncio
+import fakeredis
+import pytest
+from pydantic import BaseModel
+from api.cache import TwoTierCache
+from api.res_passwd import redis as redis_module
+from api.res_passwd.redis import RedisDB
+
+
+class Book(BaseModel):
+    id: int
+    name: str
+
+
+@pytest.fixture
+def redis_server(monkeypatch) -> fakeredis.FakeServer:
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis_module.redis, "from_url", lambda url: fakeredis.FakeAsyncRedis(server=server))
+    return server
+
+
+def worker_cache(with_redis: bool = True) -> TwoTierCache[Book]:
+    """The cache of one worker, connected to the shared fake Redis without listening for invalidations."""
+    cache = TwoTierCache("books", Book, maxsize=10, ttl=60, redis_ttl=60)
+    if with_redis:
+        cache._redis = RedisDB("redis://fake")
+    return cache
+
+
+class Loader:
+    """Loads the current row, the load can be held while the row changes."""
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.calls = 0
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self) -> Book:
+        self.calls += 1
+        name = self.name
+        self.started.set()
+        await self.release.wait()
+        return Book(id=1, name=name)
+
+
+@pytest.mark.anyio
+async def test_a_miss_is_loaded_once_into_both_tiers(redis_server):
+    cache, other_worker = worker_cache(), worker_cache()
+    loader = Loader("Dune")
+
+    assert (await cache.get_or_load(1, loader)).name == "Dune"
+    assert (await cache.get_or_load(1, loader)).name == "Dune"
+    assert (await other_worker.get_or_load(1, loader)).name == "Dune"
+    assert loader.calls == 1
+    assert other_worker.redis_hits == 1
+
+
+@pytest.mark.anyio
+async def test_a_load_racing_an_invalidation_is_not_cached(redis_server):
+    cache = worker_cache()
+    loader = Loader("Dune")
+    loader.release.clear()
+
+    load = asyncio.create_task(cache.get_or_load(1, loader))
+    await loader.started.wait()
+    await cache.invalidate(1)
+    loader.release.set()
+
+    assert (await load).name == "Dune"
+    assert cache.local.get("1") is None
+    assert await cache.get(1) is None
+
+
+@pytest.mark.anyio
+async def test_an_invalidation_by_another_worker_keeps_the_stale_load_out_of_redis(redis_server):
+    cache, other_worker = worker_cache(), worker_cache()
+    loader = Loader("Dune")
+    loader.release.clear()
+
+    load = asyncio.create_task(cache.get_or_load(1, loader))
+    await loader.started.wait()
+    # Another worker changes the book and invalidates it, this worker has not heard of it yet
+    await other_worker.invalidate(1)
+    loader.release.set()
+    await load
+
+    assert await other_worker.get(1) is None
+    assert (await other_worker.get_or_load(1, Loader("Dune Messiah"))).name == "Dune Messiah"
+
+
+@pytest.mark.anyio
+async def test_get_many_skips_the_local_tier_after_an_invalidation():
+    cache = worker_cache(with_redis=False)
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def load_many(keys):
+        started.set()
+        await release.wait()
+        return {key: Book(id=key, name="Dune") for key in keys}
+
+    load = asyncio.create_task(cache.get_many_or_load([1, 2], load_many))
+    await started.wait()
+    await cache.invalidate(2)
+    release.set()
+
+    assert set(await load) == {1, 2}
+    assert cache.local.get("1") is None and cache.local.get("2") is None
+
+
+@pytest.mark.anyio
+async def test_redis_errors_fall_back_to_the_loader(redis_server):
+    cache = worker_cache()
+    redis_server.connected = False
+    loader = Loader("Dune")
+
+    assert (await cache.get_or_load(1, loader)).name == "Dune"
+    assert loader.calls == 1
+    assert cache.redis_errors >= 1
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from passlib.hash import bcrypt
+from api.users import hashing
+from api.users.hashing import PasswordHasher
+from api.users.responses.http_errors import HTTTPError
+
+
+@pytest.fixture
+def hasher():
+    group = PasswordHasher(workers=1, max_queue=1)
+    # Threads stand for the worker processes, the calls are the same
+    group._pool = ThreadPoolExecutor(max_workers=1)
+    yield group
+    group._pool.shutdown()
+
+
+@pytest.mark.anyio
+async def test_password_is_hashed_and_verified_in_the_pool(hasher, monkeypatch):
+    monkeypatch.setattr(hashing, "get_password_hash", bcrypt.using(rounds=4).hash)
+
+    hashed_password = await hasher.hash("password")
+    assert await hasher.verify("password", hashed_password)
+    assert not await hasher.verify("wrong password", hashed_password)
+
+    stats = hasher.stats()
+    assert (stats["hashes"], stats["verifies"], stats["rejected"], stats["pending"]) == (1, 2, 0, 0)
+    assert stats["hash_ms_mean"] is not None
+
+
+@pytest.mark.anyio
+async def test_full_queue_rejects_at_once(hasher, monkeypatch):
+    release = threading.Event()
+
+    def slow_hash(password: str) -> str:
+        release.wait()
+        return password
+
+    monkeypatch.setattr(hashing, "get_password_hash", slow_hash)
+    # One call runs in the worker, one waits in the queue
+    running = [asyncio.create_task(hasher.hash("password")) for _ in range(2)]
+    await asyncio.sleep(0)
+    assert hasher.pending == 2
+
+    try:
+        with pytest.raises(type(HTTTPError.HASHING_OVERLOADED_503)) as error:
+            await asyncio.wait_for(hasher.hash("password"), timeout=1)
+        assert error.value is HTTTPError.HASHING_OVERLOADED_503
+    finally:
+        release.set()
+    assert await asyncio.gather(*running) == ["password", "password"]
+    assert (hasher.hashes, hasher.rejected, hasher.pending) == (3, 1, 0)
+
+
+@pytest.mark.anyio
+async def test_hasher_must_be_started():
+    with pytest.raises(RuntimeError):
+        await PasswordHasher(workers=1, max_queue=1).hash("password")
@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+import fakeredis
+import pytest
+from fastapi import HTTPException, Request
+from fastapi.security import HTTPBasicCredentials
+from api.res_passwd import redis as redis_module
+from api.res_passwd.redis import RedisDB
+from api.users import dependencies
+from api.users.dependencies import get_introspection_client
+from api.users.limits import introspect_limiter
+from api.users.responses.http_errors import HTTTPError
+
+
+@pytest.fixture
+def request_from_gateway(monkeypatch) -> Request:
+    monkeypatch.setattr(redis_module.redis, "from_url", lambda url: fakeredis.FakeAsyncRedis())
+    monkeypatch.setattr(dependencies, "INTROSPECT_CLIENTS", {"gateway": "secret"})
+    app = SimpleNamespace(redis=RedisDB("redis://fake"))
+    return Request({"type": "http", "app": app, "client": ("10.0.0.1", 1234), "headers": []})
+
+
+@pytest.mark.anyio
+async def test_gateway_is_authenticated(request_from_gateway):
+    credentials = HTTPBasicCredentials(username="gateway", password="secret")
+
+    assert await get_introspection_client(request_from_gateway, credentials) == "gateway"
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("credentials", [
+    None,
+    HTTPBasicCredentials(username="gateway", password="wrong"),
+    HTTPBasicCredentials(username="unknown", password=""),
+])
+async def test_missing_or_wrong_credentials_are_rejected(request_from_gateway, credentials):
+    with pytest.raises(HTTPException) as error:
+        await get_introspection_client(request_from_gateway, credentials)
+    assert error.value is HTTTPError.INVALID_CLIENT_401
+
+
+@pytest.mark.anyio
+async def test_client_is_rate_limited(request_from_gateway, monkeypatch):
+    monkeypatch.setitem(introspect_limiter.limits, "client", 2)
+    credentials = HTTPBasicCredentials(username="gateway", password="secret")
+
+    for _ in range(2):
+        await get_introspection_client(request_from_gateway, credentials)
+    with pytest.raises(HTTPException) as error:
+        await get_introspection_client(request_from_gateway, credentials)
+    assert error.value.status_code == 429
@@ -0,0 +1,69 @@
+import fakeredis
+import pytest
+from fastapi import HTTPException
+from api.limiter import SlidingWindowLimiter
+from api.res_passwd import redis as redis_module
+from api.res_passwd.redis import RedisDB
+
+
+@pytest.fixture
+def redis_server(monkeypatch) -> fakeredis.FakeServer:
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis_module.redis, "from_url", lambda url: fakeredis.FakeAsyncRedis(server=server))
+    return server
+
+
+async def is_limited(limiter: SlidingWindowLimiter, redis_db: RedisDB, **keys: str) -> bool:
+    try:
+        await limiter.check(redis_db, **keys)
+    except HTTPException as error:
+        assert error.status_code == 429
+        assert 1 <= int(error.headers["Retry-After"]) <= limiter.window
+        return True
+    return False
+
+
+@pytest.mark.anyio
+async def test_every_scope_has_its_own_limit(redis_server):
+    limiter = SlidingWindowLimiter(name="login", window=60, limits={"ip": 3, "email": 2})
+    redis_db = RedisDB("redis://fake")
+
+    assert not await is_limited(limiter, redis_db, ip="1.1.1.1", email="a@example.com")
+    assert not await is_limited(limiter, redis_db, ip="1.1.1.1", email="a@example.com")
+    assert await is_limited(limiter, redis_db, ip="1.1.1.1", email="a@example.com")
+    # The rejected request was not counted for the IP
+    assert not await is_limited(limiter, redis_db, ip="1.1.1.1", email="b@example.com")
+    assert await is_limited(limiter, redis_db, ip="1.1.1.1", email="c@example.com")
+    assert not await is_limited(limiter, redis_db, ip="2.2.2.2", email="c@example.com")
+
+    assert limiter.allowed == 4
+    assert limiter.limited == {"ip": 1, "email": 1}
+
+
+@pytest.mark.anyio
+async def test_hits_leave_the_window(redis_server):
+    limiter = SlidingWindowLimiter(name="login", window=60, limits={"ip": 2})
+    redis_db = RedisDB("redis://fake")
+    assert not await is_limited(limiter, redis_db, ip="1.1.1.1")
+    assert not await is_limited(limiter, redis_db, ip="1.1.1.1")
+    assert await is_limited(limiter, redis_db, ip="1.1.1.1")
+
+    # Moves the oldest hit out of the window, the other one stays in it
+    client = fakeredis.FakeAsyncRedis(server=redis_server)
+    key = "limit:login:ip:1.1.1.1"
+    (oldest, score), _ = await client.zrange(key, 0, -1, withscores=True)
+    await client.zadd(key, {oldest: score - 61_000})
+
+    assert not await is_limited(limiter, redis_db, ip="1.1.1.1")
+    assert await is_limited(limiter, redis_db, ip="1.1.1.1")
+
+
+@pytest.mark.anyio
+async def test_requests_are_let_through_without_redis(redis_server):
+    limiter = SlidingWindowLimiter(name="login", window=60, limits={"ip": 1})
+    redis_db = RedisDB("redis://fake")
+    redis_server.connected = False
+
+    assert not await is_limited(limiter, redis_db, ip="1.1.1.1")
+    assert not await is_limited(limiter, redis_db, ip="1.1.1.1")
+    assert limiter.redis_errors == 2
@@ -0,0 +1,49 @@
+import asyncio
+import pytest
+from api.loader import BatchLoader
+
+
+class Table:
+    """load_many over a dict, the first load waits until it is released."""
+    def __init__(self) -> None:
+        self.rows = {1: "old"}
+        self.generation = 0
+        self.loads = []
+        self.release = asyncio.Event()
+
+    async def load_many(self, keys):
+        self.loads.append(list(keys))
+        values = {key: self.rows[key] for key in keys if key in self.rows}
+        if len(self.loads) == 1:
+            await self.release.wait()
+        return values
+
+
+@pytest.mark.anyio
+async def test_concurrent_lookups_share_one_load():
+    table = Table()
+    loader = BatchLoader(table.load_many, max_batch_size=10, generation=lambda: table.generation)
+    table.release.set()
+
+    assert await asyncio.gather(loader.load(1), loader.load(1), loader.load(2)) == ["old", "old", None]
+    assert table.loads == [[1, 2]]
+    assert loader.coalesced == 1
+
+
+@pytest.mark.anyio
+async def test_lookup_after_invalidation_does_not_join_the_running_load():
+    table = Table()
+    loader = BatchLoader(table.load_many, max_batch_size=10, generation=lambda: table.generation)
+    first = asyncio.create_task(loader.load(1))
+    while not table.loads:
+        await asyncio.sleep(0)
+
+    # The row changes and the cache is invalidated while the first load is running
+    table.rows[1] = "new"
+    table.generation += 1
+    assert await loader.load(1) == "new"
+    table.release.set()
+
+    assert await first == "old"
+    assert table.loads == [[1], [1]]
+    assert loader.coalesced == 0
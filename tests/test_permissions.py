@@ -0,0 +1,56 @@
+import pytest
+from api.admin.dependencies import require_permissions
+from api.roles.permissions import (
+    DEFAULT_PERMISSIONS,
+    Permission,
+    compile_permissions,
+    permission_names,
+    permission_table,
+)
+from api.users.responses.http_errors import HTTTPError
+from api.users.schemas import Principal
+
+
+def test_names_compile_to_a_bitmask_and_back():
+    mask = compile_permissions(["users_read", "roles_write", "users_read"])
+
+    assert mask == Permission.USERS_READ | Permission.ROLES_WRITE
+    assert permission_names(mask) == ["users_read", "roles_write"]
+    assert permission_names(Permission.ALL) == ["users_read", "users_write", "roles_read", "roles_write"]
+    assert compile_permissions([]) == Permission.NONE == DEFAULT_PERMISSIONS["user"]
+
+
+def test_unknown_name_is_rejected():
+    with pytest.raises(KeyError):
+        compile_permissions(["all"])
+
+
+@pytest.fixture
+def roles(monkeypatch) -> None:
+    monkeypatch.setattr(permission_table, "_masks", {
+        1: Permission.NONE,
+        2: Permission.ALL,
+        3: Permission.USERS_READ | Permission.ROLES_READ,
+    })
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("role_id, required, allowed", [
+    (2, Permission.USERS_WRITE, True),
+    (3, Permission.USERS_READ, True),
+    (3, Permission.USERS_READ | Permission.ROLES_READ, True),
+    (3, Permission.USERS_READ | Permission.USERS_WRITE, False),
+    (1, Permission.ROLES_READ, False),
+    # A role missing from the table, e.g. deleted, has no permissions
+    (4, Permission.ROLES_READ, False),
+])
+async def test_route_guard_needs_every_required_permission(roles, role_id, required, allowed):
+    principal = Principal(id=1, is_active=True, role_id=role_id)
+    check_permissions = require_permissions(required)
+
+    if allowed:
+        assert await check_permissions(current_user=principal) is principal
+    else:
+        with pytest.raises(type(HTTTPError.NO_ACCESS_RIGHTS_403)) as error:
+            await check_permissions(current_user=principal)
+        assert error.value is HTTTPError.NO_ACCESS_RIGHTS_403
@@ -0,0 +1,96 @@
+import sqlite3
+from types import SimpleNamespace
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.util import greenlet_spawn
+from api.pool import InstrumentedPool, PoolTuner
+
+
+def pool(pool_size: int = 2, max_overflow: int = 0) -> InstrumentedPool:
+    # sqlite3 stands for the asyncpg connections, the pool only opens and resets them
+    return InstrumentedPool(
+        lambda: sqlite3.connect(":memory:", check_same_thread=False),
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        timeout=0.01,
+    )
+
+
+def tuner(connections: InstrumentedPool) -> PoolTuner:
+    engine = SimpleNamespace(sync_engine=SimpleNamespace(pool=connections))
+    return PoolTuner(engine, min_overflow=0, max_overflow=4, target_wait=0.01, interval=1)
+
+
+def checkouts(connections: InstrumentedPool, count: int, wait: float) -> None:
+    connections.checkouts += count
+    connections.wait_total += count * wait
+
+
+@pytest.mark.anyio
+async def test_checkouts_and_timeouts_are_counted():
+    connections = pool(pool_size=1)
+
+    connection = await greenlet_spawn(connections.connect)
+    with pytest.raises(PoolTimeoutError):
+        await greenlet_spawn(connections.connect)
+    connection.close()
+    (await greenlet_spawn(connections.connect)).close()
+
+    stats = connections.stats()
+    assert (stats["checkouts"], stats["timeouts"], stats["checked_out"], stats["idle"]) == (2, 1, 0, 1)
+    assert stats["wait_ms_mean"] is not None
+    assert connections.peak_checked_out == 1
+
+
+def test_slow_checkouts_grow_the_overflow_up_to_the_limit():
+    connections = pool()
+    pool_tuner = tuner(connections)
+
+    for expected in (1, 2, 3, 4, 4):
+        checkouts(connections, 10, wait=0.05)
+        pool_tuner.tune()
+        assert connections.max_overflow == expected
+    assert pool_tuner.grows == 4
+
+
+def test_timeouts_grow_the_overflow():
+    connections = pool()
+    pool_tuner = tuner(connections)
+
+    connections.timeouts += 1
+    pool_tuner.tune()
+    assert connections.max_overflow == 1
+
+
+def test_fast_checkouts_shrink_an_idle_overflow():
+    connections = pool(max_overflow=3)
+    pool_tuner = tuner(connections)
+
+    for expected in (2, 1, 0, 0):
+        checkouts(connections, 10, wait=0.001)
+        pool_tuner.tune()
+        assert connections.max_overflow == expected
+    assert pool_tuner.shrinks == 3
+
+
+def test_overflow_in_use_is_kept():
+    connections = pool(max_overflow=3)
+    pool_tuner = tuner(connections)
+
+    checkouts(connections, 10, wait=0.001)
+    connections.peak_checked_out = 4
+    pool_tuner.tune()
+    assert (connections.max_overflow, pool_tuner.shrinks) == (3, 0)
+
+
+def test_recreated_pool_is_not_tuned_from_the_old_counters():
+    connections = pool()
+    pool_tuner = tuner(connections)
+    checkouts(connections, 10, wait=0.001)
+    pool_tuner.tune()
+
+    # engine.dispose() replaced the pool
+    pool_tuner.engine.sync_engine.pool = connections = pool()
+    checkouts(connections, 1, wait=0.05)
+    pool_tuner.tune()
+    assert (connections.max_overflow, pool_tuner.grows) == (0, 0)
@@ -0,0 +1,87 @@
+import pytest
+from api.users.cache import principal_cache
+from api.users.dependencies import check_principal
+from api.users.responses.http_errors import HTTTPError
+from api.users.schemas import Principal
+from api.users.service import UserRepository
+
+
+@pytest.fixture
+def users(monkeypatch):
+    """Users in the database and the IDs of every query, the cache works with its local tier only."""
+    rows = {1: Principal(id=1, is_active=True, role_id=1), 2: Principal(id=2, is_active=True, role_id=2)}
+    queries = []
+
+    async def db_get_principal(id_user, session=None):
+        queries.append([id_user])
+        return rows.get(id_user)
+
+    async def db_get_principals(ids):
+        queries.append(list(ids))
+        return {id_user: rows[id_user] for id_user in ids if id_user in rows}
+
+    monkeypatch.setattr(UserRepository, "_db_get_principal", db_get_principal)
+    monkeypatch.setattr(UserRepository, "_db_get_principals", db_get_principals)
+    principal_cache.local.clear()
+    yield rows, queries
+    principal_cache.local.clear()
+
+
+@pytest.mark.anyio
+async def test_principal_is_loaded_once(users):
+    _, queries = users
+
+    assert (await UserRepository.get_principal(1)).role_id == 1
+    assert (await UserRepository.get_principal(1)).role_id == 1
+    assert queries == [[1]]
+
+
+@pytest.mark.anyio
+async def test_changed_user_is_reloaded_after_the_invalidation(users):
+    rows, queries = users
+    await UserRepository.get_principal(1)
+
+    rows[1] = Principal(id=1, is_active=True, role_id=2)
+    await principal_cache.invalidate(1)
+    assert (await UserRepository.get_principal(1)).role_id == 2
+    assert queries == [[1], [1]]
+
+
+@pytest.mark.anyio
+async def test_missing_user_is_not_cached(users):
+    _, queries = users
+
+    assert await UserRepository.get_principal(3) is None
+    assert await UserRepository.get_principal(3) is None
+    assert queries == [[3], [3]]
+
+
+@pytest.mark.anyio
+async def test_principals_not_cached_are_loaded_with_one_query(users):
+    _, queries = users
+    await UserRepository.get_principal(1)
+
+    principals = await UserRepository.get_principals([1, 2, 3])
+    assert sorted(principals) == [1, 2]
+    assert queries == [[1], [2, 3]]
+
+
+@pytest.mark.parametrize(
+    "payload, user, expected",
+    [
+        ({"role": 1}, None, HTTTPError.DATA_OUT_OF_DATE_403),
+        ({"role": 1}, Principal(id=1, is_active=False, role_id=1), HTTTPError.USER_NOT_ACTIVE_403),
+        ({"role": 2}, Principal(id=1, is_active=True, role_id=1), HTTTPError.DATA_OUT_OF_DATE_403),
+    ],
+)
+def test_cached_principal_is_checked_against_the_token(payload, user, expected):
+    with pytest.raises(type(expected)) as error:
+        check_principal(payload, user)
+    assert error.value is expected
+
+
+def test_refresh_token_has_no_role_to_check():
+    user = Principal(id=1, is_active=True, role_id=1)
+
+    assert check_principal({"role": 1}, user) is user
+    assert check_principal({}, user) is user
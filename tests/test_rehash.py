@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import pytest
+from passlib.hash import argon2, bcrypt
+from api.users import auth
+from api.users.hashing import password_hasher
+from api.users.service import UserRepository
+
+
+@pytest.fixture
+def pwd_context(monkeypatch):
+    # The configured cost, cheap enough for tests
+    context = auth.pwd_context.copy(bcrypt__rounds=5)
+    monkeypatch.setattr(auth, "pwd_context", context)
+    return context
+
+
+@pytest.fixture
+def users(monkeypatch, pwd_context):
+    stored = {"reader@example.com": SimpleNamespace(id=1, password=bcrypt.using(rounds=4).hash("password"))}
+    updates = []
+
+    async def find_one_or_none(email, session=None):
+        return stored.get(email)
+
+    async def update_password_hash(id_user, old_hash, new_hash):
+        updates.append((id_user, old_hash, new_hash))
+
+    monkeypatch.setattr(UserRepository, "find_one_or_none", find_one_or_none)
+    monkeypatch.setattr(UserRepository, "_update_password_hash", update_password_hash)
+    # Threads stand for the worker processes, the calls are the same
+    monkeypatch.setattr(password_hasher, "_pool", ThreadPoolExecutor(max_workers=1))
+    yield stored, updates
+    password_hasher._pool.shutdown()
+
+
+def test_outdated_cost_is_rehashed(pwd_context):
+    outdated = bcrypt.using(rounds=4).hash("password")
+
+    verified, new_hash = auth.verify_and_update_password("password", outdated)
+    assert verified and bcrypt.from_string(new_hash).rounds == 5
+    assert auth.verify_and_update_password("password", new_hash) == (True, None)
+    # Nothing is rehashed without the password
+    assert auth.verify_and_update_password("wrong password", outdated) == (False, None)
+
+
+@pytest.mark.skipif(not argon2.has_backend(), reason="argon2-cffi is not installed")
+def test_other_scheme_verifies_and_is_rehashed(pwd_context):
+    verified, new_hash = auth.verify_and_update_password("password", argon2.using(rounds=1).hash("password"))
+
+    assert verified and new_hash.startswith("$2b$05$")
+
+
+@pytest.mark.anyio
+async def test_login_stores_the_new_hash_once(users):
+    stored, updates = users
+    old_hash = stored["reader@example.com"].password
+
+    user = await UserRepository.authenticate_user("reader@example.com", "password")
+    assert user.password != old_hash
+    assert updates == [(1, old_hash, user.password)]
+
+    assert await UserRepository.authenticate_user("reader@example.com", "password") is user
+    assert len(updates) == 1
+
+
+@pytest.mark.anyio
+async def test_failed_login_keeps_the_hash(users):
+    _, updates = users
+
+    assert await UserRepository.authenticate_user("reader@example.com", "wrong password") is None
+    assert await UserRepository.authenticate_user("nobody@example.com", "password") is None
+    assert updates == []
@@ -0,0 +1,155 @@
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session, registry
+import api.database  # noqa: F401  registers the session listeners marking a request as written
+from api.replicas import ReadYourWritesMiddleware, Replica, ReplicaSet, _RequestWrites, _request_writes, mark_written
+
+
+def replica_set(strategy: str = "round_robin") -> ReplicaSet:
+    # Engines connect lazily, nothing here reaches a database
+    engines = [create_async_engine(f"postgresql+asyncpg://bench@localhost/replica{number}") for number in (1, 2)]
+    replicas = ReplicaSet(engines, strategy=strategy, max_lag=5, interval=1)
+    for replica, latency in zip(replicas.replicas, (0.02, 0.01)):
+        replica.healthy, replica.latency = True, latency
+    return replicas
+
+
+@pytest.fixture
+def request_writes():
+    writes = _RequestWrites(sticky=False)
+    token = _request_writes.set(writes)
+    yield writes
+    _request_writes.reset(token)
+
+
+def test_reads_spread_over_healthy_replicas(request_writes):
+    replicas = replica_set()
+
+    assert [replicas.choose().name for _ in range(3)] == ["replica1", "replica2", "replica1"]
+    replicas.replicas[0].healthy = False
+    assert [replicas.choose().name for _ in range(2)] == ["replica2", "replica2"]
+    replicas.replicas[1].healthy = False
+    assert replicas.choose() is None
+    assert replicas.primary_reads == 1
+
+
+def test_least_latency_picks_the_fastest_replica(request_writes):
+    replicas = replica_set("least_latency")
+
+    assert replicas.choose().name == "replica2"
+
+
+def test_reads_after_a_write_stay_on_the_primary(request_writes):
+    replicas = replica_set()
+    assert isinstance(replicas.choose(), Replica)
+
+    mark_written()
+    assert replicas.choose() is None
+    assert replicas.sticky_reads == 1
+
+
+def test_a_client_that_wrote_recently_reads_from_the_primary():
+    replicas = replica_set()
+    token = _request_writes.set(_RequestWrites(sticky=True))
+    try:
+        assert replicas.choose() is None
+    finally:
+        _request_writes.reset(token)
+    assert replicas.sticky_reads == 1
+
+
+async def run_middleware(app, cookie: str = "") -> tuple:
+    middleware = ReadYourWritesMiddleware(app, window=10)
+    scope = {"type": "http", "headers": [(b"cookie", cookie.encode())] if cookie else []}
+    messages = []
+
+    async def send(message) -> None:
+        messages.append(message)
+
+    await middleware(scope, None, send)
+    headers = dict(messages[0]["headers"])
+    return headers.get(b"set-cookie"), messages
+
+
+async def respond(send) -> None:
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+@pytest.mark.anyio
+async def test_middleware_sets_the_cookie_only_after_a_write():
+    async def reading_app(scope, receive, send):
+        await respond(send)
+
+    async def writing_app(scope, receive, send):
+        mark_written()
+        await respond(send)
+
+    assert (await run_middleware(reading_app))[0] is None
+    cookie, _ = await run_middleware(writing_app)
+    assert cookie.startswith(b"db_primary=1; Max-Age=10;")
+
+
+@pytest.mark.anyio
+async def test_middleware_keeps_a_client_with_the_cookie_on_the_primary():
+    sticky = []
+
+    async def app(scope, receive, send):
+        sticky.append(_request_writes.get().sticky)
+        await respond(send)
+
+    await run_middleware(app, cookie="theme=dark; db_primary=1")
+    await run_middleware(app, cookie="theme=dark")
+    assert sticky == [True, False]
+    assert _request_writes.get() is None
+
+
+items = Table("items", MetaData(), Column("id", Integer, primary_key=True))
+
+
+class Item:
+    pass
+
+
+registry().map_imperatively(Item, items)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    items.create(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def test_a_commit_without_changes_is_not_a_write(request_writes, session):
+    session.execute(select(items))
+    session.commit()
+
+    assert not request_writes.wrote
+
+
+def test_a_statement_changing_rows_is_a_write(request_writes, session):
+    session.execute(insert(items).values(id=1))
+    session.commit()
+
+    assert request_writes.wrote
+
+
+def test_a_flush_is_a_write(request_writes, session):
+    item = Item()
+    item.id = 1
+    session.add(item)
+    session.commit()
+
+    assert request_writes.wrote
+
+
+def test_a_rolled_back_write_is_not_a_write(request_writes, session):
+    session.execute(insert(items).values(id=1))
+    session.rollback()
+    session.commit()
+
+    assert not request_writes.wrote
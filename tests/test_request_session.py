@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from api import database
+from api.books.database import BookOrm
+from api.database import _WROTE, RoutingSession, use_session
+from api.replicas import ReplicaSet, _RequestWrites, _request_writes
+
+# Engines connect lazily, nothing here reaches a database
+primary = create_async_engine("postgresql+asyncpg://bench@localhost/primary")
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    replicas = ReplicaSet(
+        [create_async_engine("postgresql+asyncpg://bench@localhost/replica")], strategy="round_robin", max_lag=5, interval=1
+    )
+    replicas.replicas[0].healthy = True
+    monkeypatch.setattr(database, "replicas", replicas)
+    token = _request_writes.set(_RequestWrites(sticky=False))
+    yield replicas.replicas[0]
+    _request_writes.reset(token)
+
+
+def request_session() -> AsyncSession:
+    return AsyncSession(primary, sync_session_class=RoutingSession)
+
+
+def bind(session: AsyncSession, statement):
+    engine = session.sync_session.get_bind(clause=statement)
+    return "replica" if engine is not primary.sync_engine else "primary"
+
+
+READ = select(BookOrm.id)
+WRITE = insert(BookOrm).values(name="Dune")
+
+
+@pytest.mark.anyio
+async def test_read_only_reads_of_the_request_session_go_to_a_replica(replica):
+    session = request_session()
+
+    async with use_session(session, read_only=True):
+        assert bind(session, READ) == "replica"
+        assert bind(session, READ) == "replica"
+        assert bind(session, WRITE) == "primary"
+    assert bind(session, READ) == "primary"
+    # The replica is picked once for the session
+    assert replica.reads == 1
+
+
+@pytest.mark.anyio
+async def test_reads_after_a_write_of_the_session_stay_on_the_primary(replica):
+    session = request_session()
+    session.info[_WROTE] = True
+
+    async with use_session(session, read_only=True):
+        assert bind(session, READ) == "primary"
+
+
+@pytest.mark.anyio
+async def test_a_client_that_wrote_recently_reads_from_the_primary(replica):
+    _request_writes.get().sticky = True
+    session = request_session()
+
+    async with use_session(session, read_only=True):
+        assert bind(session, READ) == "primary"
+
+
+@pytest.mark.anyio
+async def test_nested_read_only_block_keeps_the_outer_one(replica):
+    session = request_session()
+
+    async with use_session(session, read_only=True):
+        async with use_session(session, read_only=True):
+            pass
+        assert bind(session, READ) == "replica"
+    assert bind(session, READ) == "primary"
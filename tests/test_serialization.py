@@ -0,0 +1,36 @@
+import json
+from collections import namedtuple
+from typing import List
+import pytest
+from pydantic import ValidationError
+from api.books.schemas import BookRead
+from api.serialization import dump_json, get_adapter, json_response, validate_row, validate_rows
+
+BookRow = namedtuple("BookRow", ["id", "name", "description", "version"])
+
+ROWS = [BookRow(1, "Dune", None, 1), BookRow(2, "Солярис", "Океан", 3)]
+
+
+def test_adapter_is_built_once_per_type():
+    assert get_adapter(List[BookRead]) is get_adapter(List[BookRead])
+    assert get_adapter(BookRead) is not get_adapter(List[BookRead])
+
+
+def test_rows_are_validated_from_attributes():
+    books = validate_rows(BookRead, ROWS)
+
+    assert books == [BookRead(**row._asdict()) for row in ROWS]
+    assert validate_row(BookRead, ROWS[1]).description == "Океан"
+    with pytest.raises(ValidationError):
+        validate_row(BookRead, BookRow(1, None, None, 1))
+
+
+def test_response_body_is_the_serialized_json():
+    books = validate_rows(BookRead, ROWS)
+
+    response = json_response(List[BookRead], books, status_code=201, headers={"ETag": '"1"'})
+
+    assert response.body == dump_json(List[BookRead], books)
+    assert json.loads(response.body) == [row._asdict() for row in ROWS]
+    assert (response.status_code, response.media_type, response.headers["etag"]) == (201, "application/json", '"1"')
+    assert response.headers["content-length"] == str(len(response.body))
@@ -0,0 +1,40 @@
+from sqlalchemy.dialects.postgresql import asyncpg
+import api.roles.database  # noqa: F401  resolves the role relationship of UsersOrm
+from api.books.service import BOOK_DELETE, BOOKS_BY_IDS
+from api.config import DB_PREPARED_STATEMENT_CACHE_SIZE, DB_QUERY_CACHE_SIZE
+from api.database import connect_args, make_engine
+from api.users.service import PRINCIPALS_BY_IDS, UPDATE_PASSWORD_HASH, USER_BY_EMAIL, USER_BY_ID
+
+PREDEFINED = [USER_BY_EMAIL, USER_BY_ID, PRINCIPALS_BY_IDS, UPDATE_PASSWORD_HASH, BOOKS_BY_IDS, BOOK_DELETE]
+
+
+def test_cache_key_of_a_predefined_statement_is_built_once():
+    for statement in PREDEFINED:
+        assert statement._generate_cache_key() is statement._generate_cache_key()
+
+
+def test_id_lists_are_one_parameter():
+    dialect = asyncpg.dialect()
+
+    for statement in (PRINCIPALS_BY_IDS, BOOKS_BY_IDS):
+        compiled = statement.compile(dialect=dialect)
+        assert compiled.positiontup == ["ids"]
+        assert "= ANY ($1::INTEGER[])" in compiled.string
+
+
+def test_statements_are_cached_and_kept_prepared():
+    engine = make_engine(pool_size=1, max_overflow=0, pgbouncer=False)
+
+    assert engine.sync_engine._compiled_cache.capacity == DB_QUERY_CACHE_SIZE
+    assert connect_args(statement_timeout_ms=0, pgbouncer=False) == {
+        "prepared_statement_cache_size": DB_PREPARED_STATEMENT_CACHE_SIZE
+    }
+
+
+def test_statements_are_not_kept_prepared_behind_pgbouncer():
+    args = connect_args(statement_timeout_ms=1000, pgbouncer=True)
+
+    assert (args["statement_cache_size"], args["prepared_statement_cache_size"]) == (0, 0)
+    assert "server_settings" not in args
+    # Unique names, a server may be shared with other clients
+    assert args["prepared_statement_name_func"]() != args["prepared_statement_name_func"]()
@@ -0,0 +1,104 @@
+from time import time
+import fakeredis
+import pytest
+from fastapi import Response
+from fastapi.security import HTTPAuthorizationCredentials
+from api.res_passwd import redis as redis_module
+from api.res_passwd.redis import RedisDB
+from api.users import revocation as revocation_module
+from api.users.auth import create_access_token, create_refresh_token, new_token_id
+from api.users.dependencies import get_current_principal, refresh_access_token, verify_token
+from api.users.responses.http_errors import HTTTPError
+from api.users.revocation import TokenRevocation
+
+
+def issue_tokens() -> tuple:
+    family = new_token_id()
+    response = Response()
+    create_refresh_token(response=response, data={"sub": "1", "fam": family, "jti": new_token_id()})
+    refresh_token = response.headers["set-cookie"].split("refresh_token=", 1)[1].split(";", 1)[0]
+    access_token = create_access_token({"sub": "1", "role": 1, "fam": family})
+    return access_token, refresh_token
+
+
+def test_access_token_is_accepted():
+    access_token, _ = issue_tokens()
+
+    assert verify_token(access_token)["sub"] == "1"
+
+
+@pytest.mark.anyio
+async def test_refresh_token_is_rejected_as_bearer():
+    _, refresh_token = issue_tokens()
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=refresh_token)
+
+    with pytest.raises(type(HTTTPError.INVALID_TOKEN_401)) as error:
+        await get_current_principal(credentials=credentials, session=None)
+    assert error.value is HTTTPError.INVALID_TOKEN_401
+
+
+@pytest.mark.anyio
+async def test_access_token_is_rejected_for_refresh():
+    access_token, _ = issue_tokens()
+
+    with pytest.raises(type(HTTTPError.INVALID_TOKEN_401)) as error:
+        await refresh_access_token(access_token, Response())
+    assert error.value is HTTTPError.INVALID_TOKEN_401
+
+
+def test_introspection_accepts_both_types():
+    access_token, refresh_token = issue_tokens()
+
+    assert verify_token(access_token, token_type=None)["typ"] == "access"
+    assert verify_token(refresh_token, token_type=None)["typ"] == "refresh"
+
+
+@pytest.mark.anyio
+async def test_revoked_family_stays_revoked_while_its_refresh_token_is_valid(monkeypatch):
+    monkeypatch.setattr(redis_module.redis, "from_url", lambda url: fakeredis.FakeAsyncRedis())
+    revocation = TokenRevocation(refresh_ttl=30 * 24 * 60 * 60)
+    revocation._redis = RedisDB("redis://fake")
+    now = time()
+
+    await revocation.revoke("family")
+
+    monkeypatch.setattr(revocation_module, "time", lambda: now + 24 * 60 * 60)
+    assert revocation.is_revoked("family")
+    monkeypatch.setattr(revocation_module, "time", lambda: now + 31 * 24 * 60 * 60)
+    assert not revocation.is_revoked("family")
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("call", [
+    lambda revocation: revocation.start_family("family", "jti"),
+    lambda revocation: revocation.rotate("family", "jti", "new-jti"),
+    lambda revocation: revocation.revoke("family"),
+])
+async def test_redis_errors_are_reported_as_unavailable(monkeypatch, call):
+    server = fakeredis.FakeServer()
+    server.connected = False
+    monkeypatch.setattr(redis_module.redis, "from_url", lambda url: fakeredis.FakeAsyncRedis(server=server))
+    revocation = TokenRevocation(refresh_ttl=60)
+    revocation._redis = RedisDB("redis://fake")
+
+    with pytest.raises(type(HTTTPError.TOKENS_UNAVAILABLE_503)) as error:
+        await call(revocation)
+    assert error.value is HTTTPError.TOKENS_UNAVAILABLE_503
+    assert error.value.headers["Retry-After"]
+    assert revocation.redis_errors == 1
+
+
+@pytest.mark.anyio
+async def test_revoked_families_are_loaded_before_start_returns(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis_module.redis, "from_url", lambda url: fakeredis.FakeAsyncRedis(server=server))
+    other_worker = TokenRevocation(refresh_ttl=60)
+    other_worker._redis = RedisDB("redis://fake")
+    await other_worker.revoke("family")
+
+    revocation = TokenRevocation(refresh_ttl=60)
+    await revocation.start(RedisDB("redis://fake"))
+    try:
+        assert revocation.is_revoked("family")
+    finally:
+        await revocation.stop()